@@ -3,9 +3,12 @@
 Edge-TTS MCP Server 启动脚本
 
 使用方式:
-python main.py  # 启动服务器
+python main.py  # 启动服务器（stdio 传输）
+python main.py --transport streamable-http --host 0.0.0.0 --port 8000  # 以 HTTP 服务多个客户端
+python main.py --transport streamable-http --workers 16  # 多进程模式，音频合并等 CPU 密集操作分布到多个核心
 """
 
+import argparse
 import asyncio
 import logging
 import sys
@@ -14,7 +17,8 @@ from pathlib import Path
 # 添加src目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.server import EdgeTTSServer
+from src.config import ServerConfig
+from src.server import EdgeTTSServer, TRANSPORTS
 
 
 logging.basicConfig(
@@ -28,12 +32,34 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    """解析命令行参数，未指定的项沿用配置文件"""
+    parser = argparse.ArgumentParser(description="Edge-TTS MCP Server")
+    parser.add_argument("--config", help="配置文件路径")
+    parser.add_argument("--transport", choices=TRANSPORTS, help="传输方式")
+    parser.add_argument("--host", help="HTTP 传输监听地址")
+    parser.add_argument("--port", type=int, help="HTTP 传输监听端口")
+    parser.add_argument("--workers", type=int, help="工作进程数（仅 streamable-http 传输）")
+    return parser.parse_args()
+
+
 def main():
     """主函数"""
+    args = parse_args()
     logger.info("正在启动 Edge-TTS MCP Server...")
     
     try:
-        server = EdgeTTSServer()
+        config = ServerConfig.load(args.config)
+        for key, value in (
+            ("server.transport", args.transport),
+            ("server.host", args.host),
+            ("server.port", args.port),
+            ("server.worker_processes", args.workers)
+        ):
+            if value is not None:
+                config.set(key, value)
+        
+        server = EdgeTTSServer(config)
         server.run()
     except KeyboardInterrupt:
         logger.info("服务器已正常停止")
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Edge-TTS MCP Server 性能基准测试脚本
+
+使用本地模拟的 edge_tts.Communicate / list_voices 代替真实服务，
+以仓库中的 server-config.yaml（默认开启慢请求追踪）对 EdgeTTSTools 运行单条合成、批量合成、
+字幕合成与语音列表查询负载，输出吞吐量、p50/p99 延迟、峰值内存与事件循环延迟。
+
+示例:
+    python scripts/benchmark.py --requests 200 --concurrency 20
+    python scripts/benchmark.py --workloads single,batch --json result.json
+    python scripts/benchmark.py --baseline result.json --tolerance 0.2
+    python scripts/benchmark.py --no-tracing  # 关闭慢请求追踪，对比追踪的开销
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import aiohttp
+import edge_tts
+
+from src.config import ServerConfig
+from src.executor import LoopLagMonitor
+from src.models import (
+    TextToSpeechRequest,
+    BatchTextToSpeechRequest,
+    SpeechWithSubtitlesRequest,
+    ListVoicesRequest,
+    VoiceSegment
+)
+from src.tools import EdgeTTSTools
+
+
+# 上游固定输出 24kHz 48kbps 单声道 MP3：每帧 144 字节、576 个采样（24 毫秒）
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+FRAME_SECONDS = 576 / 24000
+# 每个字符约对应的语音时长（秒）
+SECONDS_PER_CHAR = 0.06
+TICKS_PER_SECOND = 10000000
+
+SAMPLE_TEXTS = [
+    "The quick brown fox jumps over the lazy dog. It was a bright cold day in April.",
+    "Edge TTS converts text into natural sounding speech. Performance matters under load.",
+    "今天天气很好，我们一起去公园散步吧。阳光明媚，微风不燥。",
+    "Benchmarking helps catch regressions before they reach production users.",
+]
+
+LOCALES = ["en-US", "en-GB", "zh-CN", "zh-TW", "ja-JP", "ko-KR", "fr-FR", "de-DE", "es-ES", "it-IT",
+           "ru-RU", "pt-BR", "ar-SA", "hi-IN", "nl-NL", "sv-SE", "pl-PL", "tr-TR", "th-TH", "vi-VN"]
+
+
+class UpstreamProfile:
+    """模拟上游的延迟与数据块参数"""
+
+    def __init__(
+        self,
+        first_chunk_latency: float,
+        chunk_interval: float,
+        chunk_frames: int,
+        voices_latency: float,
+        piece_bytes: int
+    ):
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_interval = chunk_interval
+        self.chunk_frames = chunk_frames
+        self.voices_latency = voices_latency
+        self.piece_bytes = piece_bytes
+        self.calls = 0
+
+
+PROFILE = UpstreamProfile(0.15, 0.002, 8, 0.3, 64)
+
+
+class FakeCommunicate:
+    """模拟 edge_tts.Communicate：按文本长度生成音频帧，并交替产出边界事件
+
+    与 edge-tts 相同，文本按 piece_bytes 切分，每段各创建一个使用传入连接器的会话，
+    会话结束时关闭连接器，连接器归属的问题会以 Session is closed 失败暴露出来。
+    """
+
+    def __init__(self, text: str, voice: str = "", boundary: str = "SentenceBoundary", **kwargs):
+        self.text = text
+        self.boundary = boundary
+        self.connector = kwargs.get("connector")
+
+    def _pieces(self):
+        pieces, current = [], ""
+        for word in self.text.split(" "):
+            candidate = f"{current} {word}" if current else word
+            if current and len(candidate.encode('utf-8')) > PROFILE.piece_bytes:
+                pieces.append(current)
+                candidate = word
+            current = candidate
+        return pieces + [current]
+
+    async def stream(self):
+        PROFILE.calls += 1
+        for piece in self._pieces():
+            async with aiohttp.ClientSession(connector=self.connector) as session:
+                if session.closed:
+                    # 与 aiohttp 在已关闭的会话上发起请求时的错误一致
+                    raise RuntimeError("Session is closed")
+                async for chunk in self._stream_piece(piece):
+                    yield chunk
+
+    async def _stream_piece(self, text: str):
+        await asyncio.sleep(PROFILE.first_chunk_latency)
+
+        if self.boundary == "WordBoundary":
+            units = text.split()
+        else:
+            units = [unit.strip() + "." for unit in text.replace("。", ".").split(".") if unit.strip()]
+
+        offset = 0
+        for unit in units:
+            frames = max(1, int(len(unit) * SECONDS_PER_CHAR / FRAME_SECONDS))
+            duration = int(frames * FRAME_SECONDS * TICKS_PER_SECOND)
+            yield {"type": self.boundary, "offset": offset, "duration": duration, "text": unit}
+
+            for start in range(0, frames, PROFILE.chunk_frames):
+                count = min(PROFILE.chunk_frames, frames - start)
+                yield {"type": "audio", "data": FRAME * count}
+                if PROFILE.chunk_interval:
+                    await asyncio.sleep(PROFILE.chunk_interval)
+            offset += duration
+
+
+async def fake_list_voices(*args, **kwargs):
+    await asyncio.sleep(PROFILE.voices_latency)
+    voices = []
+    for locale in LOCALES:
+        for i in range(20):
+            name = f"{locale}-Voice{i}Neural"
+            voices.append({
+                "Name": f"Microsoft Server Speech Text to Speech Voice ({locale}, Voice{i}Neural)",
+                "ShortName": name,
+                "Gender": "Female" if i % 2 else "Male",
+                "Locale": locale,
+                "VoiceType": "Neural",
+                "StyleList": ["general", "cheerful"]
+            })
+    voices.append({
+        "Name": "Microsoft Server Speech Text to Speech Voice (en-US, EmmaMultilingualNeural)",
+        "ShortName": "en-US-EmmaMultilingualNeural",
+        "Gender": "Female",
+        "Locale": "en-US",
+        "VoiceType": "Neural"
+    })
+    return voices
+
+
+def install_fake_upstream():
+    edge_tts.Communicate = FakeCommunicate
+    edge_tts.list_voices = fake_list_voices
+
+
+def peak_rss_mb() -> float:
+    """进程峰值常驻内存（MB），Linux 上 ru_maxrss 单位为 KB，macOS 上为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def make_text(index: int) -> str:
+    # 每个请求文本不同，避免命中音频缓存
+    return f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} Request {index}."
+
+
+def make_workloads(tools: EdgeTTSTools, batch_segments: int):
+    # 与服务器处理工具调用时相同，每次调用都在慢请求追踪中执行
+    async def single(i):
+        with tools.tracer.trace("text_to_speech"):
+            return await tools.text_to_speech(TextToSpeechRequest(text=make_text(i)))
+
+    async def batch(i):
+        segments = [VoiceSegment(text=make_text(i * batch_segments + j)) for j in range(batch_segments)]
+        with tools.tracer.trace("batch_text_to_speech"):
+            return await tools.batch_text_to_speech(BatchTextToSpeechRequest(segments=segments))
+
+    async def subtitle(i):
+        with tools.tracer.trace("text_to_speech_with_subtitles"):
+            return await tools.text_to_speech_with_subtitles(SpeechWithSubtitlesRequest(text=make_text(i)))
+
+    async def voices(i):
+        if i % 2:
+            with tools.tracer.trace("list_voices"):
+                return await tools.list_voices(ListVoicesRequest(locale=LOCALES[i % len(LOCALES)]))
+        with tools.tracer.trace("get_voice_info"):
+            return await tools.get_voice_info("zh-CN-Voice3Neural")
+
+    return {"single": single, "batch": batch, "subtitle": subtitle, "voices": voices}
+
+
+async def run_workload(name: str, func, requests: int, concurrency: int) -> dict:
+    """以固定并发执行 requests 次调用并统计结果"""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def call(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await func(i)
+            latencies.append(time.perf_counter() - started)
+            if isinstance(result, dict) and "error" in result:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[call(i) for i in range(requests)])
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+    lag = monitor.stats()
+
+    return {
+        "workload": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "loop_lag_max_ms": lag["max_lag_ms"],
+        "loop_lag_avg_ms": lag["avg_lag_ms"]
+    }
+
+
+def compare(results, baseline_path: str, tolerance: float) -> list:
+    """与基线结果比较，返回超出容忍度的退化项"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {item["workload"]: item for item in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        base = baseline.get(result["workload"])
+        if not base:
+            continue
+        if result["requests_per_sec"] < base["requests_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{result['workload']}: 吞吐量 {result['requests_per_sec']} < 基线 {base['requests_per_sec']}"
+            )
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{result['workload']}: p99 {result['p99_ms']}ms > 基线 {base['p99_ms']}ms")
+    return regressions
+
+
+def print_table(results):
+    columns = [
+        ("workload", "负载"), ("requests_per_sec", "req/s"), ("p50_ms", "p50(ms)"), ("p99_ms", "p99(ms)"),
+        ("errors", "错误"), ("peak_rss_mb", "峰值RSS(MB)"), ("loop_lag_max_ms", "最大循环延迟(ms)")
+    ]
+    print(" | ".join(title for _, title in columns))
+    for result in results:
+        print(" | ".join(str(result[key]) for key, _ in columns))
+
+
+async def main_async(args) -> list:
+    PROFILE.first_chunk_latency = args.latency
+    PROFILE.chunk_interval = args.chunk_interval
+    PROFILE.chunk_frames = args.chunk_frames
+    PROFILE.voices_latency = args.voices_latency
+    PROFILE.piece_bytes = args.piece_bytes
+    install_fake_upstream()
+
+    work_dir = tempfile.mkdtemp(prefix="edge-tts-bench-")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        # 以发布的默认配置运行，只覆盖线程池大小与各类文件目录
+        config = ServerConfig.load(os.path.join(ROOT_DIR, "server-config.yaml"))
+        config.set("server.max_workers", args.workers)
+        config.set("cache.audio_cache_dir", os.path.join(work_dir, "audio-cache"))
+        config.set("cache.voices_snapshot_file", os.path.join(work_dir, "voices.json"))
+        config.set("output.dir", os.path.join(work_dir, "output"))
+        config.set("security.safe_file_paths", [work_dir])
+        if args.audio_cache:
+            config.set("cache.audio_cache_enabled", True)
+        if args.batch_concurrency is not None:
+            config.set("limits.batch_concurrency", args.batch_concurrency)
+        if args.no_tracing:
+            config.set("monitoring.performance_monitoring", False)
+        tools = EdgeTTSTools(config)
+        workloads = make_workloads(tools, args.batch_segments)
+        if not args.cold:
+            # 预先拉取语音列表，避免首批请求的冷启动延迟影响各负载的 p99
+            await tools.client.get_voices()
+
+        results = []
+        for name in args.workloads.split(","):
+            name = name.strip()
+            if name not in workloads:
+                raise SystemExit(f"未知负载: {name}（可选: {', '.join(workloads)}）")
+            print(f"🔊 运行负载 {name} ...")
+            results.append(await run_workload(name, workloads[name], args.requests, args.concurrency))
+
+        tools.executor.shutdown()
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Edge-TTS MCP Server 性能基准测试（本地模拟上游）")
+    parser.add_argument("--workloads", default="single,batch,subtitle,voices", help="要运行的负载，逗号分隔")
+    parser.add_argument("--requests", type=int, default=100, help="每个负载的请求数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发请求数")
+    parser.add_argument("--latency", type=float, default=0.15, help="模拟上游首个数据块延迟（秒）")
+    parser.add_argument("--chunk-interval", type=float, default=0.002, help="模拟上游数据块间隔（秒）")
+    parser.add_argument("--chunk-frames", type=int, default=8, help="每个音频数据块包含的 MP3 帧数")
+    parser.add_argument("--voices-latency", type=float, default=0.3, help="模拟语音列表请求延迟（秒）")
+    parser.add_argument(
+        "--piece-bytes", type=int, default=64,
+        help="模拟上游切分文本的字节数，每段各建立一个会话（edge-tts 为 4096，较小的值让每个请求经过多个会话）"
+    )
+    parser.add_argument("--batch-segments", type=int, default=5, help="批量负载每个请求的语音段数")
+    parser.add_argument("--batch-concurrency", type=int, help="批量合成的语音段并发数（默认取配置文件）")
+    parser.add_argument("--workers", type=int, default=10, help="阻塞操作线程池大小")
+    parser.add_argument("--audio-cache", action="store_true", help="开启音频缓存")
+    parser.add_argument("--cold", action="store_true", help="不预先拉取语音列表，包含冷启动延迟")
+    parser.add_argument("--no-tracing", action="store_true", help="关闭慢请求追踪（默认与发布配置一致开启）")
+    parser.add_argument("--json", dest="json_path", help="将结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与基线 JSON 结果比较，退化时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="与基线比较时允许的退化比例")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print()
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 结果已写入 {args.json_path}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\n❌ 性能退化:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("\n✅ 未发现超出容忍度的性能退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import io
+from typing import List, Optional, Tuple
+
+
+# MPEG 版本位 -> 采样率表（版本位 1 保留）
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+
+# Layer III 比特率表 (kbps)
+_BITRATES_MPEG1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_MPEG2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+# 上游直接输出的格式（edge-tts 固定请求 audio-24khz-48kbitrate-mono-mp3），无需转码
+NATIVE_FORMATS = {'mp3'}
+
+# 转码时各目标格式使用的编码器
+_EXPORT_CODECS = {'ogg': 'libvorbis'}
+
+# VBR 信息帧标记，拼接后其中的帧数不再准确，需要丢弃
+_VBR_TAGS = (b'Xing', b'Info', b'VBRI')
+
+
+def _parse_frame_header(data: bytes, offset: int) -> Optional[Tuple[int, tuple]]:
+    """解析 Layer III 帧头，返回 (帧长度, 流参数)；不是有效帧头时返回 None"""
+    if offset + 4 > len(data):
+        return None
+
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    channel_mode = b3 >> 6
+
+    # 只处理 Layer III（Edge TTS 输出即为 Layer III）
+    if version not in _SAMPLE_RATES or layer != 1:
+        return None
+    if bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        frame_length = 144000 * _BITRATES_MPEG1[bitrate_index] // sample_rate + padding
+    else:
+        frame_length = 72000 * _BITRATES_MPEG2[bitrate_index] // sample_rate + padding
+
+    return frame_length, (version, sample_rate, channel_mode == 3)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    """跳过文件开头的 ID3v2 标签，返回音频帧起始位置"""
+    if len(data) >= 10 and data[:3] == b'ID3':
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def scan_mp3_frames(data: bytes) -> Optional[Tuple[tuple, List[Tuple[int, int]]]]:
+    """扫描 MP3 数据中的音频帧
+
+    返回 (流参数, [(起始位置, 长度), ...])，相邻帧会合并为一个区间。
+    帧序列中出现无法识别的数据或流参数变化时返回 None。
+    """
+    result = _scan(data)
+    if result is None:
+        return None
+    return result[0], result[1]
+
+
+def mp3_duration(data: bytes) -> Optional[float]:
+    """根据音频帧数计算 MP3 时长（秒），无法解析时返回 None"""
+    result = _scan(data)
+    if result is None:
+        return None
+
+    (version, sample_rate, _), _, frame_count = result
+    samples_per_frame = 1152 if version == 3 else 576
+    return frame_count * samples_per_frame / sample_rate
+
+
+def _scan(data: bytes) -> Optional[Tuple[tuple, List[Tuple[int, int]], int]]:
+    offset = _skip_id3v2(data)
+    params = None
+    spans: List[Tuple[int, int]] = []
+    frame_count = 0
+
+    while offset < len(data):
+        # 末尾的 ID3v1 标签
+        if data[offset:offset + 3] == b'TAG' and len(data) - offset == 128:
+            break
+
+        header = _parse_frame_header(data, offset)
+        if header is None:
+            return None
+
+        frame_length, frame_params = header
+        if offset + frame_length > len(data):
+            # 最后一帧不完整，丢弃
+            break
+
+        # 第一帧可能是 Xing/Info/VBRI 信息帧，标记位于帧头后 40 字节内
+        if params is None:
+            params = frame_params
+            head = data[offset + 4:offset + 40]
+            if any(tag in head for tag in _VBR_TAGS):
+                offset += frame_length
+                continue
+        elif frame_params != params:
+            return None
+
+        if spans and spans[-1][0] + spans[-1][1] == offset:
+            spans[-1] = (spans[-1][0], spans[-1][1] + frame_length)
+        else:
+            spans.append((offset, frame_length))
+        offset += frame_length
+        frame_count += 1
+
+    if params is None:
+        return None
+    return params, spans, frame_count
+
+
+def concat_mp3_frames(segments: List[bytes], output_path: str) -> bool:
+    """直接拼接多个 MP3 的音频帧写入文件，无需解码
+
+    所有语音段的采样率、声道等参数一致时才能拼接，否则返回 False 且不写文件。
+    """
+    scanned = []
+    for data in segments:
+        result = scan_mp3_frames(data)
+        if result is None:
+            return False
+        scanned.append(result)
+
+    if len({params for params, _ in scanned}) != 1:
+        return False
+
+    with open(output_path, 'wb') as f:
+        for data, (_, spans) in zip(segments, scanned):
+            view = memoryview(data)
+            for start, length in spans:
+                f.write(view[start:start + length])
+
+    return True
+
+
+def decode_and_merge(segments: List[bytes], output_format: str, output_path: str):
+    """解码所有语音段后合并并编码为目标格式（需要 ffmpeg）"""
+    from pydub import AudioSegment
+
+    decoded = [AudioSegment.from_file(io.BytesIO(data), format="mp3") for data in segments]
+
+    first = decoded[0]
+    if all(
+        (seg.frame_rate, seg.channels, seg.sample_width)
+        == (first.frame_rate, first.channels, first.sample_width)
+        for seg in decoded
+    ):
+        # 参数一致时一次性拼接 PCM 数据，避免反复 += 产生的重复复制
+        combined = AudioSegment(
+            data=b''.join(seg.raw_data for seg in decoded),
+            sample_width=first.sample_width,
+            frame_rate=first.frame_rate,
+            channels=first.channels
+        )
+    else:
+        combined = sum(decoded[1:], first)
+
+    combined.export(output_path, format=output_format, codec=_EXPORT_CODECS.get(output_format))
+
+
+# 校验音频文件头所需的字节数（WAV 的 RIFF....WAVE 最长）
+HEADER_SIZE = 12
+
+
+def has_audio_header(header: bytes, audio_format: str) -> bool:
+    """检查数据开头是否为对应格式的音频文件头"""
+    if audio_format == 'mp3':
+        return header[:3] == b'ID3' or _parse_frame_header(header, 0) is not None
+    if audio_format == 'wav':
+        return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+    if audio_format == 'ogg':
+        return header[:4] == b'OggS'
+    return False
+
+
+def needs_transcode(output_format: str) -> bool:
+    """目标格式是否需要转码"""
+    return output_format not in NATIVE_FORMATS
+
+
+def transcode_file(source_path: str, output_path: str, output_format: str):
+    """将上游输出的 mp3 文件转码为目标格式（需要 ffmpeg，属阻塞操作）"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(source_path, format="mp3")
+    audio.export(output_path, format=output_format, codec=_EXPORT_CODECS.get(output_format))
+
+
+def merge_audio(segments: List[bytes], output_format: str, output_path: str) -> str:
+    """合并语音段并写入文件，返回所用的合并方式
+
+    输出为 mp3 且各段参数一致时直接拼接音频帧，仅在需要格式转换时才解码重编码。
+    """
+    if output_format == 'mp3' and concat_mp3_frames(segments, output_path):
+        return "frame_concat"
+
+    decode_and_merge(segments, output_format, output_path)
+    return "decode"
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .locking import FileLock
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "edge-tts-mcp", "audio-cache")
+
+
+class AudioCache:
+    """基于内容寻址的磁盘音频缓存
+
+    缓存键为规范化请求参数的 SHA-256，音频按键名存放在缓存目录中。
+    超过 ttl 的条目视为过期，条目数超过 max_size 时按最近最少使用淘汰。
+    各方法会在线程池中调用，索引读写由锁保护。写入缓存失败只记录日志，不影响已完成的合成。
+    多个工作进程可以共享同一缓存目录：文件以临时文件重命名的方式原子写入，
+    各进程维护自己的索引，查找未命中索引时会检查其他进程写入的文件。
+    共享时（shared）每次写入后持有目录文件锁，按目录中的实际文件执行过期清理与容量淘汰
+    （按写入时间从旧到新），并以扫描结果重建本进程的索引，max_size 为所有进程合计的上限。
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl: float = 300,
+        max_size: int = 100,
+        enabled: bool = True,
+        shared: bool = False
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        self.enabled = enabled
+        self.shared = shared and enabled
+        self._dir_lock = FileLock(os.path.join(cache_dir, ".lock")) if self.shared else None
+
+        # key -> (文件大小, 创建时间)，按访问顺序排列
+        self._index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    @classmethod
+    def from_config(cls, config) -> "AudioCache":
+        """根据服务器配置创建缓存"""
+        return cls(
+            cache_dir=config.get("cache.audio_cache_dir", DEFAULT_CACHE_DIR),
+            ttl=config.get("cache.audio_cache_ttl", 300),
+            max_size=config.get("cache.audio_cache_max_size", 100),
+            enabled=config.get("cache.audio_cache_enabled", False),
+            shared=config.get("server.worker_processes", 1) > 1
+        )
+
+    @staticmethod
+    def make_key(
+        text: str,
+        voice: str,
+        rate: str,
+        volume: str,
+        pitch: str,
+        boundary: str
+    ) -> str:
+        """根据合成参数生成缓存键"""
+        payload = json.dumps(
+            {
+                "text": text,
+                "voice": voice,
+                "rate": rate,
+                "volume": volume,
+                "pitch": pitch,
+                "boundary": boundary
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _load_index(self):
+        """从缓存目录重建索引，使缓存在重启后仍然有效"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp3'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                # 列出目录后被其他进程删除（过期清理或清空）
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for created_at, key, size in sorted(entries):
+            self._index[key] = (size, created_at)
+
+        self._evict()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """淘汰过期条目及超出容量的最旧条目"""
+        for key, (_, created_at) in list(self._index.items()):
+            if self._is_expired(created_at):
+                self._remove(key)
+                self.expirations += 1
+
+        while self.max_size > 0 and len(self._index) > self.max_size:
+            key = next(iter(self._index))
+            self._remove(key)
+            self.evictions += 1
+
+    def get_path(self, key: str) -> Optional[str]:
+        """查找缓存音频文件路径，未命中返回 None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            return self._lookup(key)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self._index.get(key)
+        if entry is None:
+            entry = self._adopt(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if self._is_expired(entry[1]):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            self._index.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def _adopt(self, key: str) -> Optional[tuple]:
+        """索引中没有但文件已存在时（由共享缓存目录的其他工作进程写入）加入索引"""
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        entry = (stat.st_size, stat.st_mtime)
+        self._index[key] = entry
+        if not self.shared:
+            # 共享目录的容量由写入方持锁统一淘汰
+            self._evict()
+        return self._index.get(key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存音频，未命中返回 None"""
+        path = self.get_path(key)
+        if path is None:
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+
+    def put(self, key: str, audio_data: bytes):
+        """写入缓存音频"""
+        if not self.enabled or not audio_data:
+            return
+
+        # 先写临时文件再重命名，避免读到写了一半的文件
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(audio_data)
+            os.replace(temp_path, path)
+            self._add(key, len(audio_data))
+        except OSError as e:
+            self._discard(temp_path, e)
+
+    def put_file(self, key: str, source_path: str):
+        """将已生成的音频文件复制到缓存，无需整体读入内存"""
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            file_size = os.path.getsize(source_path)
+            if not file_size:
+                return
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+            self._add(key, file_size)
+        except OSError as e:
+            self._discard(temp_path, e)
+
+    @staticmethod
+    def _discard(temp_path: str, error: Exception):
+        logger.warning(f"写入音频缓存失败: {str(error)}")
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _add(self, key: str, size: int):
+        with self._lock:
+            if self.shared:
+                self._evict_shared()
+                return
+            self._index[key] = (size, time.time())
+            self._index.move_to_end(key)
+            self._evict()
+
+    def _evict_shared(self):
+        """持有目录文件锁，按目录中所有进程写入的文件淘汰并重建索引"""
+        with self._dir_lock:
+            self._index.clear()
+            self._load_index()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            entries = len(self._index)
+            total_bytes = sum(size for size, _ in self._index.values())
+
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "total_bytes": total_bytes,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,80 @@
+from typing import Optional, List, Dict, Any, Set
+from .models import VoiceInfo
+
+
+class VoiceCatalog:
+    """带索引的语音目录
+
+    每次刷新语音列表时构建一次：按名称/短名称、语言区域、性别建立字典索引，
+    并预先生成 VoiceInfo 实例，查询时无需再扫描整个列表。
+    """
+
+    def __init__(self, voices: List[Dict[str, Any]]):
+        self.voices = voices
+        self.infos: List[VoiceInfo] = []
+        self.by_name: Dict[str, VoiceInfo] = {}
+        self.by_locale: Dict[str, Set[int]] = {}
+        self.by_gender: Dict[str, Set[int]] = {}
+        self.lower_names: List[str] = []
+        self.locale_stats: Dict[str, int] = {}
+        self.gender_stats: Dict[str, int] = {"Male": 0, "Female": 0}
+
+        for position, voice in enumerate(voices):
+            info = VoiceInfo(
+                name=voice.get('Name', ''),
+                short_name=voice.get('ShortName', ''),
+                gender=voice.get('Gender', ''),
+                locale=voice.get('Locale', ''),
+                supported_styles=voice.get('StyleList', []),
+                voice_type=voice.get('VoiceType', '')
+            )
+            self.infos.append(info)
+            self.lower_names.append(info.name.lower())
+
+            # 名称与短名称都可用于查找，先出现的语音优先
+            for name in (info.name, info.short_name):
+                if name:
+                    self.by_name.setdefault(name, info)
+
+            self.by_locale.setdefault(info.locale.lower(), set()).add(position)
+            self.by_gender.setdefault(info.gender.lower(), set()).add(position)
+
+            # 摘要统计
+            locale = voice.get('Locale', 'unknown')
+            self.locale_stats[locale] = self.locale_stats.get(locale, 0) + 1
+            if info.gender in self.gender_stats:
+                self.gender_stats[info.gender] += 1
+
+    def __len__(self) -> int:
+        return len(self.infos)
+
+    def lookup(self, voice_name: str) -> Optional[VoiceInfo]:
+        """按名称或短名称查找语音"""
+        return self.by_name.get(voice_name)
+
+    def filter(
+        self,
+        locale: Optional[str] = None,
+        gender: Optional[str] = None,
+        name_pattern: Optional[str] = None
+    ) -> List[VoiceInfo]:
+        """按条件过滤语音，结果保持原始顺序"""
+        candidates: Optional[Set[int]] = None
+
+        # 取语言区域与性别索引的交集
+        for index, value in ((self.by_locale, locale), (self.by_gender, gender)):
+            if not value:
+                continue
+            positions = index.get(value.lower(), set())
+            candidates = positions if candidates is None else candidates & positions
+
+        if candidates is None:
+            candidates = range(len(self.infos))
+        else:
+            candidates = sorted(candidates)
+
+        if name_pattern:
+            pattern = name_pattern.lower()
+            return [self.infos[i] for i in candidates if pattern in self.lower_names[i]]
+
+        return [self.infos[i] for i in candidates]
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class SynthesisAbandoned(Exception):
+    """执行合成的请求被取消，等待者需要自行合成"""
+
+
+class RequestCoalescer:
+    """合并参数相同的进行中请求
+
+    第一个请求（执行者）实际执行操作；执行期间到达的相同请求不再访问上游，而是登记后等待执行者的结果。
+    操作输出到文件时，等待者同时登记各自的目标路径，执行者在返回前把文件复制过去，
+    这样执行者随后转码或删除自己的文件也不会影响等待者。执行者被取消时等待者各自重新执行。
+    """
+
+    def __init__(self, copy: Optional[Callable[[str, str], Awaitable[None]]] = None):
+        self._copy = copy
+        # 键 -> 等待者列表 [(目标路径, future)]
+        self._inflight: Dict[str, List[Tuple[Optional[str], asyncio.Future]]] = {}
+        self.coalesced = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(
+        self,
+        key: str,
+        operation: Callable[[], Awaitable[Any]],
+        target_path: Optional[str] = None
+    ) -> Tuple[Any, bool]:
+        """执行操作或等待进行中的相同请求，返回 (结果, 是否复用了其他请求的结果)"""
+        while True:
+            waiters = self._inflight.get(key)
+            if waiters is None:
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            waiters.append((target_path, waiter))
+            try:
+                result = await waiter
+            except SynthesisAbandoned:
+                continue
+            self.coalesced += 1
+            return result, True
+
+        waiters = []
+        self._inflight[key] = waiters
+        try:
+            result = await operation()
+        except BaseException as e:
+            self._inflight.pop(key, None)
+            error = SynthesisAbandoned() if isinstance(e, asyncio.CancelledError) else e
+            for _, waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(error)
+            raise
+
+        # 此后到达的相同请求自行执行（通常会命中音频缓存）
+        self._inflight.pop(key, None)
+        try:
+            for path, waiter in waiters:
+                if waiter.done():
+                    # 等待者已被取消
+                    continue
+                try:
+                    if self._copy is not None and path and os.path.abspath(path) != os.path.abspath(target_path):
+                        await self._copy(target_path, path)
+                except Exception as e:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                else:
+                    if not waiter.done():
+                        waiter.set_result(result)
+        finally:
+            for _, waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(SynthesisAbandoned())
+        return result, False
@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+# 默认配置文件位于项目根目录，可通过环境变量 EDGE_TTS_CONFIG 覆盖
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "server-config.yaml"
+
+
+class ServerConfig:
+    """服务器配置"""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        self.data = data or {}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ServerConfig":
+        """加载配置文件，文件不存在时使用默认值"""
+        config_path = Path(path or os.environ.get("EDGE_TTS_CONFIG") or DEFAULT_CONFIG_PATH)
+
+        if not config_path.exists():
+            return cls()
+
+        with open(config_path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+
+        return cls(data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """按点分路径读取配置项，如 cache.audio_cache_ttl"""
+        node = self.data
+        for part in key.split('.'):
+            if not isinstance(node, dict) or part not in node:
+                return default
+            node = node[part]
+        return default if node is None else node
+
+    def set(self, key: str, value: Any):
+        """按点分路径设置配置项，用于命令行参数覆盖配置文件"""
+        parts = key.split('.')
+        node = self.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        node[parts[-1]] = value
@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from .tracing import span
+
+
+class BlockingExecutor:
+    """阻塞操作专用线程池
+
+    文件读写、音频解码/编码等阻塞操作统一放到这里执行，避免阻塞事件循环。
+    """
+
+    def __init__(self, max_workers: int = 10):
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="edge-tts-io")
+        self.submitted = 0
+        self.active = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行阻塞函数并等待结果"""
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.active += 1
+        try:
+            return await loop.run_in_executor(self.pool, functools.partial(func, *args, **kwargs))
+        finally:
+            self.active -= 1
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "submitted": self.submitted
+        }
+
+
+class AsyncFileWriter:
+    """经由线程池写入文件，小块数据先缓冲再批量写入"""
+
+    def __init__(self, executor: BlockingExecutor, path: str, buffer_size: int = 65536):
+        self.executor = executor
+        self.path = path
+        self.buffer_size = buffer_size
+        self.file = None
+        self.bytes_written = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    async def __aenter__(self) -> "AsyncFileWriter":
+        self.file = await self.executor.run(open, self.path, 'wb')
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.flush()
+        finally:
+            await self.executor.run(self.file.close)
+
+    async def write(self, data: bytes):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self.bytes_written += len(data)
+        if self._buffered >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        data = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        with span("file_write"):
+            await self.executor.run(self.file.write, data)
+
+
+class LoopLagMonitor:
+    """事件循环延迟监控
+
+    周期性休眠固定时长，实际唤醒时间与预期的差值即为事件循环被阻塞的时间。
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """启动监控（需在事件循环中调用，重复调用无副作用）"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+            self.samples += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "samples": self.samples
+        }
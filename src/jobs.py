@@ -0,0 +1,409 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .limits import AdmissionRejected, QUEUE_FULL_ERROR
+
+
+logger = logging.getLogger(__name__)
+
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+# 语音段状态，按字节存放在 bytearray 中
+_SEGMENT_STATES = ("pending", "done", "failed")
+_SEGMENT_DONE = 1
+_SEGMENT_FAILED = 2
+
+
+class Job:
+    """后台合成任务
+
+    使用 __slots__ 并以 bytearray 记录每个语音段的状态，大量任务常驻内存时占用很小。
+    """
+
+    __slots__ = (
+        "id", "tool", "status", "created_at", "started_at", "finished_at",
+        "segments", "result", "error"
+    )
+
+    def __init__(self, tool: str, job_id: Optional[str] = None, total: int = 0):
+        self.id = job_id or uuid.uuid4().hex
+        self.tool = tool
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.segments = bytearray(total)
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+
+    def set_total(self, total: int):
+        """设置语音段总数（长文本在切分后才知道分块数量）"""
+        self.segments = bytearray(total)
+
+    def mark_segment(self, index: int, ok: bool = True):
+        """记录单个语音段完成或失败"""
+        if 0 <= index < len(self.segments):
+            self.segments[index] = _SEGMENT_DONE if ok else _SEGMENT_FAILED
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def progress(self) -> Dict[str, Any]:
+        total = len(self.segments)
+        completed = self.segments.count(_SEGMENT_DONE)
+        failed = self.segments.count(_SEGMENT_FAILED)
+        return {
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "percent": round((completed + failed) * 100 / total, 1) if total else 0.0
+        }
+
+    def to_dict(self, include_segments: bool = False) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress()
+        }
+        if include_segments:
+            data["segments"] = [_SEGMENT_STATES[state] for state in self.segments]
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+    def to_record(self) -> Dict[str, Any]:
+        """持久化使用的记录"""
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "segments": list(self.segments),
+            "result": self.result,
+            "error": self.error
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        job = cls(record["tool"], job_id=record["job_id"])
+        job.status = record["status"]
+        job.created_at = record["created_at"]
+        job.started_at = record.get("started_at")
+        job.finished_at = record.get("finished_at")
+        job.segments = bytearray(record.get("segments", []))
+        job.result = record.get("result")
+        job.error = record.get("error")
+        return job
+
+
+class JobStore:
+    """任务存储
+
+    任务状态保存在内存字典中；配置了持久化目录时，已结束的任务各自写入一个 JSON 文件，
+    重启后重新加载，保留期过后连同文件一起删除。
+    shared 为 True（多进程模式）时各工作进程共享持久化目录，未结束的任务也在状态变化时写入，
+    查询其他进程的任务时从文件读取。
+    get、list、load、save 与 purge_expired 可能读写文件，由 JobManager 在线程池中调用，内存字典由锁保护。
+    """
+
+    def __init__(self, retention: float = 3600, persist_dir: Optional[str] = None, shared: bool = False):
+        self.retention = retention
+        self.persist_dir = persist_dir
+        self.shared = shared and bool(persist_dir)
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.RLock()
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self._load()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.persist_dir, f"{job_id}.json")
+
+    def _load(self):
+        """加载持久化的已结束任务（阻塞操作，仅在启动时调用）"""
+        for path in glob.glob(os.path.join(self.persist_dir, "*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                job = Job.from_record(record)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"任务记录无效，已忽略: {path}: {str(e)}")
+                continue
+            if job.finished:
+                self.jobs[job.id] = job
+            elif not _pid_alive(record.get("pid")):
+                # 已退出进程遗留的未完成任务
+                self._remove(job)
+        self.purge_expired()
+
+    def load(self, job_id: str) -> Optional[Job]:
+        """从共享持久化目录读取其他工作进程的任务（阻塞操作），已结束的任务加入内存"""
+        if not self.shared or os.path.basename(job_id) != job_id:
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            job = Job.from_record(record)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"任务记录无效: {job_id}: {str(e)}")
+            return None
+
+        if not job.finished:
+            if not _pid_alive(record.get("pid")):
+                # 执行任务的工作进程已退出，任务不会再完成
+                job.status = FAILED
+                job.finished_at = job.finished_at or time.time()
+                job.error = {"code": 1005, "message": "执行任务的工作进程已退出", "data": {}}
+            return job
+
+        if self._expired(job, time.time()):
+            self._remove(job)
+            return None
+        with self._lock:
+            self.jobs[job.id] = job
+        return job
+
+    def add(self, job: Job):
+        with self._lock:
+            self.jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """查询任务，已过期时删除（阻塞操作）"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and self._expired(job, time.time()):
+                self._remove(job)
+                return None
+            return job
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        """按创建时间列出任务，先删除已过期的任务（阻塞操作）"""
+        with self._lock:
+            self.purge_expired()
+            jobs = sorted(self.jobs.values(), key=lambda job: job.created_at)
+        if status:
+            jobs = [job for job in jobs if job.status == status]
+        return jobs
+
+    def save(self, job: Job):
+        """持久化任务（阻塞操作），共享模式下同时持久化未结束的任务
+
+        记录所属进程，以便识别已退出进程遗留的未完成任务。
+        """
+        if not self.persist_dir or not (job.finished or self.shared):
+            return
+        record = job.to_record()
+        record["pid"] = os.getpid()
+        path = self._path(job.id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _expired(self, job: Job, now: float) -> bool:
+        return job.finished and now - job.finished_at > self.retention
+
+    def _remove(self, job: Job):
+        with self._lock:
+            self.jobs.pop(job.id, None)
+        if self.persist_dir:
+            try:
+                os.remove(self._path(job.id))
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self) -> int:
+        """删除超过保留期的已结束任务，返回删除数量（阻塞操作）"""
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self.jobs.values() if self._expired(job, now)]
+        for job in expired:
+            self._remove(job)
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {PENDING: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        # 指标采集线程也会调用，先复制一份避免遍历时字典被修改
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 进程存在但无权发送信号
+        return True
+    return True
+
+
+class JobManager:
+    """后台任务管理
+
+    提交的任务进入有界队列，由固定数量的工作协程依次执行；队列已满时立即拒绝。
+    工作协程在首次提交时启动（需在事件循环中）。任务存储的文件读写均在 executor 中执行。
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        max_pending: int = 100,
+        executor=None
+    ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_config(cls, config, executor=None) -> "JobManager":
+        """根据服务器配置创建任务管理器"""
+        store = JobStore(
+            retention=config.get("jobs.retention", 3600),
+            persist_dir=config.get("jobs.persist_dir"),
+            shared=config.get("server.worker_processes", 1) > 1
+        )
+        return cls(
+            store,
+            workers=config.get("jobs.workers", 2),
+            max_pending=config.get("jobs.max_pending", 100),
+            executor=executor
+        )
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._worker()))
+
+    async def submit(self, tool: str, run: Callable[[Job], Awaitable[Dict[str, Any]]], total: int = 0) -> Job:
+        """提交任务，run(job) 返回工具结果；队列已满时抛出 AdmissionRejected"""
+        self._start()
+        await self._run(self.store.purge_expired)
+        if self._queue.full():
+            raise self._queue_full()
+
+        job = Job(tool, total=total)
+        self.store.add(job)
+        # 共享模式下先写入记录再入队，其他工作进程可立即查询到该任务，且不会覆盖工作协程写入的运行状态
+        await self._save(job)
+        try:
+            self._queue.put_nowait((job, run))
+        except asyncio.QueueFull:
+            # 写入记录期间队列被其他提交占满
+            await self._run(self.store._remove, job)
+            raise self._queue_full()
+        return job
+
+    def _queue_full(self) -> AdmissionRejected:
+        return AdmissionRejected(
+            QUEUE_FULL_ERROR,
+            "服务器繁忙: 后台任务队列已满",
+            {"pending": self._queue.qsize()}
+        )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """查询任务，多进程模式下本进程没有时从共享目录读取其他工作进程的任务"""
+        job = await self._run(self.store.get, job_id)
+        if job is None and self.store.shared:
+            job = await self._run(self.store.load, job_id)
+        return job
+
+    async def list(self, status: Optional[str] = None) -> List[Job]:
+        return await self._run(self.store.list, status)
+
+    async def _worker(self):
+        while True:
+            job, run = await self._queue.get()
+            try:
+                await self._execute(job, run)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job, run: Callable[[Job], Awaitable[Dict[str, Any]]]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        await self._save(job)
+        try:
+            result = await run(job)
+            if "error" in result:
+                job.status = FAILED
+                job.error = result["error"]
+            else:
+                job.status = SUCCEEDED
+                job.result = result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"后台任务 {job.id} 执行失败: {str(e)}")
+            job.status = FAILED
+            job.error = {"code": 1005, "message": str(e), "data": {}}
+        finally:
+            job.finished_at = time.time()
+
+        await self._save(job)
+
+    async def _save(self, job: Job):
+        if not (job.finished or self.store.shared):
+            return
+        try:
+            await self._run(self.store.save, job)
+        except OSError as e:
+            logger.warning(f"任务记录保存失败: {job.id}: {str(e)}")
+
+    async def _run(self, func, *args):
+        if self.executor is not None:
+            return await self.executor.run(func, *args)
+        return func(*args)
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "jobs": self.store.stats()
+        }
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from .tracing import span
+
+
+# 准入控制拒绝请求时使用的错误代码
+QUEUE_FULL_ERROR = 1006
+RATE_LIMITED_ERROR = 1007
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入"""
+
+    def __init__(self, code: int, message: str, data: Optional[dict] = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data or {}
+
+    def to_error(self) -> Dict[str, Any]:
+        return {"code": self.code, "message": self.message, "data": self.data}
+
+
+class TokenBucket:
+    """令牌桶限流器"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """距离下一个令牌可用的秒数"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate > 0 else float('inf')
+
+    def is_idle(self) -> bool:
+        """令牌已补满，说明该客户端近期没有请求"""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """请求准入控制
+
+    每个客户端先经过令牌桶限流，超出频率立即拒绝；随后竞争全局并发槽位，
+    槽位已满时进入有界等待队列，队列满或等待超时同样立即拒绝。
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 20,
+        max_requests_per_minute: int = 100,
+        max_queue_size: int = 50,
+        queue_timeout: float = 30
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_rate_limited = 0
+        self.rejected_timeout = 0
+
+    @classmethod
+    def from_config(cls, config) -> "AdmissionController":
+        """根据服务器配置创建准入控制器"""
+        return cls(
+            max_concurrent=config.get("limits.max_concurrent_requests", 20),
+            max_requests_per_minute=config.get("limits.max_requests_per_minute", 100),
+            max_queue_size=config.get("limits.max_queue_size", 50),
+            queue_timeout=config.get("limits.queue_timeout", 30)
+        )
+
+    def _check_rate(self, client_id: str):
+        if self.max_requests_per_minute <= 0:
+            return
+
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            # 顺便清理长时间空闲的客户端，避免字典无限增长
+            if len(self._buckets) >= 1024:
+                for key in [k for k, b in self._buckets.items() if b.is_idle()]:
+                    del self._buckets[key]
+            bucket = TokenBucket(
+                rate=self.max_requests_per_minute / 60,
+                capacity=self.max_requests_per_minute
+            )
+            self._buckets[client_id] = bucket
+
+        if not bucket.try_acquire():
+            self.rejected_rate_limited += 1
+            raise AdmissionRejected(
+                RATE_LIMITED_ERROR,
+                f"请求频率超限: 每分钟最多 {self.max_requests_per_minute} 次",
+                {"retry_after": round(bucket.retry_after(), 3)}
+            )
+
+    async def acquire(self, client_id: str = "default"):
+        """申请执行槽位，被拒绝时抛出 AdmissionRejected"""
+        self._check_rate(client_id)
+
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue_size:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(
+                    QUEUE_FULL_ERROR,
+                    "服务器繁忙: 等待队列已满",
+                    {"in_flight": self.in_flight, "queued": self.queued}
+                )
+
+            self.queued += 1
+            try:
+                with span("admission_wait"):
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise AdmissionRejected(
+                    QUEUE_FULL_ERROR,
+                    f"服务器繁忙: 排队超过 {self.queue_timeout} 秒",
+                    {"in_flight": self.in_flight, "queued": self.queued}
+                )
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self, client_id: str = "default"):
+        """准入上下文，退出时释放槽位"""
+        await self.acquire(client_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_requests_per_minute": self.max_requests_per_minute,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_rate_limited": self.rejected_rate_limited,
+            "rejected_timeout": self.rejected_timeout
+        }
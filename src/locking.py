@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 等平台没有 fcntl，多进程模式仅支持 POSIX，锁退化为进程内锁
+    fcntl = None
+
+
+class FileLock:
+    """基于 flock 的跨进程排他锁
+
+    多个工作进程共享音频缓存目录与语音列表快照时用于协调写入。
+    阻塞获取应在线程池中调用，事件循环中使用 acquire_async；同一进程内的线程之间由内部锁互斥。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """获取锁，blocking 为 False 时锁被占用立即返回 False"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        fd = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            self._thread_lock.release()
+            return False
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        return True
+
+    async def acquire_async(self, poll_interval: float = 0.05):
+        """在事件循环中等待获取锁，以非阻塞方式轮询，可安全取消"""
+        while not self.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+
+    def release(self):
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
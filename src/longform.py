@@ -0,0 +1,128 @@
+from typing import List, Optional, Tuple
+from .audio import mp3_duration
+
+
+# 中日韩全角句末标点，后面无需空白即可断句
+_CJK_TERMINATORS = set('。！？；…')
+# 西文句末标点，后面需跟空白或引号/括号才视为句末（避免拆开 3.14、e.g. 等）
+_LATIN_TERMINATORS = set('.!?;')
+# 紧跟在句末标点后的右引号、右括号归入当前句
+_CLOSERS = set('"\'”’」』）)]】》')
+# 句子过长时退而在分句标点处切分
+_CLAUSE_BREAKS = set('，、：,:')
+
+# 字幕事件的时间单位为 100 纳秒
+TICKS_PER_SECOND = 10000000
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点与换行切分文本，保留标点与原有空白"""
+    sentences = []
+    start = 0
+    i = 0
+    length = len(text)
+
+    while i < length:
+        ch = text[i]
+        is_break = ch in _CJK_TERMINATORS or ch == '\n' or (
+            ch in _LATIN_TERMINATORS
+            and (i + 1 == length or text[i + 1].isspace() or text[i + 1] in _CLOSERS)
+        )
+        if not is_break:
+            i += 1
+            continue
+
+        # 连续的句末标点（如 ！？、……）与右引号归入同一句
+        end = i + 1
+        while end < length and (
+            text[end] in _CJK_TERMINATORS or text[end] in _LATIN_TERMINATORS
+            or text[end] in _CLOSERS or text[end] == '\n'
+        ):
+            end += 1
+        sentences.append(text[start:end])
+        start = i = end
+
+    if start < length:
+        sentences.append(text[start:])
+    return sentences
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """超长句子先在分句标点处切分，仍然过长时按长度硬切"""
+    pieces = []
+    start = 0
+    for i, ch in enumerate(sentence):
+        if ch in _CLAUSE_BREAKS:
+            pieces.append(sentence[start:i + 1])
+            start = i + 1
+    if start < len(sentence):
+        pieces.append(sentence[start:])
+
+    result = []
+    for piece in pieces:
+        while len(piece) > max_chars:
+            result.append(piece[:max_chars])
+            piece = piece[max_chars:]
+        result.append(piece)
+    return _pack(result, max_chars)
+
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """将片段按顺序贪心合并为不超过 max_chars 的文本块"""
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ''
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """将长文本切分为不超过 max_chars 字符的文本块
+
+    优先在句子边界处切分，并尽量将相邻句子合并到同一块中以减少上游请求数。
+    空白块会被丢弃。
+    """
+    pieces = []
+    for sentence in split_sentences(text):
+        if len(sentence) > max_chars:
+            pieces.extend(_split_long_sentence(sentence, max_chars))
+        else:
+            pieces.append(sentence)
+
+    chunks = []
+    for chunk in _pack(pieces, max_chars):
+        chunk = chunk.strip()
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+def measure_durations(segments: List[bytes]) -> List[Optional[float]]:
+    """计算各段音频的时长（秒），无法解析的段为 None（阻塞操作）"""
+    return [mp3_duration(data) for data in segments]
+
+
+def shift_cues(
+    cue_lists: List[List[Tuple[int, int, str]]],
+    durations: List[Optional[float]]
+) -> List[Tuple[int, int, str]]:
+    """将各文本块的字幕按前面所有块的音频时长平移，合并为一条时间轴
+
+    音频时长无法解析时，以该块最后一条字幕的结束时间代替。
+    """
+    merged = []
+    offset = 0
+    for cues, duration in zip(cue_lists, durations):
+        for cue_offset, cue_duration, text in cues:
+            merged.append((cue_offset + offset, cue_duration, text))
+
+        if duration is not None:
+            offset += int(round(duration * TICKS_PER_SECOND))
+        elif cues:
+            offset += cues[-1][0] + cues[-1][1]
+    return merged
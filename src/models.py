@@ -40,6 +40,12 @@ class TextToSpeechRequest(BaseModel):
     pitch: Optional[str] = Field("+0Hz", description="音调调整")
     boundary: Optional[str] = Field("SentenceBoundary", description="边界类型")
     format: Optional[str] = Field("mp3", description="输出格式")
+    response_mode: Literal['file', 'inline'] = Field(
+        "file", description="返回方式：file 返回文件路径；inline 在音频不超过阈值时直接返回音频内容，否则返回文件路径"
+    )
+    unique_filename: Optional[bool] = Field(
+        False, description="是否在文件名后附加随机后缀（默认按合成参数命名，参数相同时复用已生成的文件）"
+    )
 
     @validator('rate', 'volume')
     def validate_percentage(cls, v):
@@ -71,6 +77,9 @@ class BatchTextToSpeechRequest(BaseModel):
     segments: List[VoiceSegment] = Field(..., min_items=1, max_items=20, description="语音段配置列表")
     format: Optional[str] = Field("mp3", description="输出格式")
     output_filename: Optional[str] = Field(None, description="输出文件名")
+    unique_filename: Optional[bool] = Field(
+        False, description="是否在文件名后附加随机后缀（默认按合成参数命名，参数相同时复用已生成的文件）"
+    )
 
     @validator('format')
     def validate_format(cls, v):
@@ -125,6 +134,103 @@ class GenerateSubtitlesRequest(BaseModel):
     boundary_type: Optional[str] = Field("SentenceBoundary", description="边界类型")
 
 
+class SpeechWithSubtitlesRequest(BaseModel):
+    """音频与字幕同步生成请求模型"""
+    text: str = Field(..., min_length=1, max_length=5000, description="要转换的文本内容")
+    voice: Optional[str] = Field("en-US-EmmaMultilingualNeural", description="语音名称")
+    rate: Optional[str] = Field("+0%", description="语速调整")
+    volume: Optional[str] = Field("+0%", description="音量调整")
+    pitch: Optional[str] = Field("+0Hz", description="音调调整")
+    boundary: Optional[str] = Field("SentenceBoundary", description="边界类型")
+    format: Optional[str] = Field("mp3", description="输出格式")
+    subtitle_format: Optional[str] = Field("srt", description="字幕格式")
+    unique_filename: Optional[bool] = Field(
+        False, description="是否在文件名后附加随机后缀（默认按合成参数命名，参数相同时复用已生成的文件）"
+    )
+
+    @validator('rate', 'volume')
+    def validate_percentage(cls, v):
+        if v is not None and not re.match(r'^[+-]?\d+%$', v):
+            raise ValueError('必须为百分比格式，如 +10% 或 -5%')
+        return v
+
+    @validator('pitch')
+    def validate_pitch(cls, v):
+        if v is not None and not re.match(r'^[+-]?\d+Hz$', v):
+            raise ValueError('必须为Hz格式，如 +50Hz 或 -20Hz')
+        return v
+
+    @validator('boundary')
+    def validate_boundary(cls, v):
+        if v not in ['WordBoundary', 'SentenceBoundary']:
+            raise ValueError('边界类型必须是 WordBoundary 或 SentenceBoundary')
+        return v
+
+    @validator('format')
+    def validate_format(cls, v):
+        if v not in ['mp3', 'wav', 'ogg']:
+            raise ValueError('格式必须是 mp3, wav 或 ogg')
+        return v
+
+
+class LongTextToSpeechRequest(BaseModel):
+    """长文本分块合成请求模型"""
+    text: str = Field(..., min_length=1, max_length=100000, description="要转换的长文本内容")
+    voice: Optional[str] = Field("en-US-EmmaMultilingualNeural", description="语音名称")
+    rate: Optional[str] = Field("+0%", description="语速调整")
+    volume: Optional[str] = Field("+0%", description="音量调整")
+    pitch: Optional[str] = Field("+0Hz", description="音调调整")
+    boundary: Optional[str] = Field("SentenceBoundary", description="边界类型")
+    format: Optional[str] = Field("mp3", description="输出格式")
+    chunk_size: Optional[int] = Field(None, ge=100, le=5000, description="每个文本块的最大字符数")
+    subtitles: Optional[bool] = Field(False, description="是否同时生成SRT字幕")
+    output_filename: Optional[str] = Field(None, description="输出文件名")
+    unique_filename: Optional[bool] = Field(
+        False, description="是否在文件名后附加随机后缀（默认按合成参数命名，参数相同时复用已生成的文件）"
+    )
+
+    @validator('rate', 'volume')
+    def validate_percentage(cls, v):
+        if v is not None and not re.match(r'^[+-]?\d+%$', v):
+            raise ValueError('必须为百分比格式，如 +10% 或 -5%')
+        return v
+
+    @validator('pitch')
+    def validate_pitch(cls, v):
+        if v is not None and not re.match(r'^[+-]?\d+Hz$', v):
+            raise ValueError('必须为Hz格式，如 +50Hz 或 -20Hz')
+        return v
+
+    @validator('boundary')
+    def validate_boundary(cls, v):
+        if v not in ['WordBoundary', 'SentenceBoundary']:
+            raise ValueError('边界类型必须是 WordBoundary 或 SentenceBoundary')
+        return v
+
+    @validator('format')
+    def validate_format(cls, v):
+        if v not in ['mp3', 'wav', 'ogg']:
+            raise ValueError('格式必须是 mp3, wav 或 ogg')
+        return v
+
+
+class SubmitJobRequest(BaseModel):
+    """后台任务提交请求模型"""
+    tool: Literal['batch_text_to_speech', 'long_text_to_speech'] = Field(..., description="后台执行的工具名称")
+    arguments: dict = Field(..., description="工具参数，与直接调用该工具时相同")
+
+
+class JobStatusRequest(BaseModel):
+    """后台任务状态查询请求模型"""
+    job_id: str = Field(..., min_length=1, description="任务ID")
+    include_segments: Optional[bool] = Field(False, description="是否返回每个语音段的状态")
+
+
+class ListJobsRequest(BaseModel):
+    """后台任务列表查询请求模型"""
+    status: Optional[Literal['pending', 'running', 'succeeded', 'failed']] = Field(None, description="状态过滤")
+
+
 class ErrorResponse(BaseModel):
     """错误响应模型"""
     code: int
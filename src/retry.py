@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+import aiohttp
+
+
+class SynthesisTimeout(Exception):
+    """上游合成超时"""
+
+
+def _retryable_errors() -> tuple:
+    """可以重试的上游错误类型：网络异常、超时与 websocket 断开"""
+    errors = (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, SynthesisTimeout)
+    try:
+        from edge_tts.exceptions import WebSocketError
+        errors += (WebSocketError,)
+    except ImportError:
+        pass
+    return errors
+
+
+RETRYABLE_ERRORS = _retryable_errors()
+
+
+class RetryPolicy:
+    """上游请求的重试与超时策略
+
+    - connect_timeout: 建立 websocket 连接的超时
+    - first_chunk_timeout: 连接后等待第一个消息的超时
+    - total_timeout: 单次合成从开始到数据接收完毕的总超时
+    重试间隔为带完全抖动的指数退避: uniform(0, backoff_factor * 2^(attempt-1))。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 10,
+        connect_timeout: float = 10,
+        first_chunk_timeout: float = 15,
+        total_timeout: float = 60
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.first_chunk_timeout = first_chunk_timeout
+        self.total_timeout = total_timeout
+
+    @classmethod
+    def from_config(cls, config) -> "RetryPolicy":
+        """根据服务器配置创建重试策略"""
+        return cls(
+            max_attempts=config.get("advanced.retry.max_attempts", 3),
+            backoff_factor=config.get("advanced.retry.backoff_factor", 0.5),
+            max_backoff=config.get("advanced.retry.max_backoff", 10),
+            connect_timeout=config.get("limits.connection_timeout", 10),
+            first_chunk_timeout=config.get("limits.first_chunk_timeout", 15),
+            total_timeout=config.get("limits.generation_timeout", 60)
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间"""
+        ceiling = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
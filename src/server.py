@@ -1,17 +1,36 @@
 import asyncio
+import functools
 import json
 import logging
-from typing import Dict, Any, List, Optional
-from mcp.server.fastmcp import FastMCP
+import os
+import socket
+import time
+import weakref
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from urllib.parse import quote
+from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.stdio import stdio_server
+from mcp.types import AudioContent, CallToolResult, TextContent
+import uvicorn
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 from .tools import EdgeTTSTools
+from .config import ServerConfig
+from .tracing import span
+from .workers import run_prefork
+from .limits import AdmissionController, AdmissionRejected, QUEUE_FULL_ERROR, RATE_LIMITED_ERROR
 from .models import (
     TextToSpeechRequest,
     ListVoicesRequest,
     SaveAudioRequest,
     GenerateSubtitlesRequest,
-    BatchTextToSpeechRequest
+    BatchTextToSpeechRequest,
+    SpeechWithSubtitlesRequest,
+    LongTextToSpeechRequest,
+    SubmitJobRequest,
+    JobStatusRequest,
+    ListJobsRequest
 )
 
 
@@ -19,20 +38,91 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# 支持的传输方式：stdio 仅服务单个客户端，HTTP 传输可由一个常驻进程同时服务多个客户端
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+
+# 允许通过 HTTP 下载的生成文件类型
+DOWNLOAD_MEDIA_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".srt": "application/x-subrip"
+}
+
+# 准入控制拒绝时对应的 HTTP 状态码
+_REJECTED_STATUS = {QUEUE_FULL_ERROR: 503, RATE_LIMITED_ERROR: 429}
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """流式响应结束（包括客户端提前断开）后释放准入槽位
+
+    响应未被发送时（如发送前出错）在对象回收时释放；finalize 保证槽位只释放一次。
+    """
+    
+    def __init__(self, content, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = weakref.finalize(self, release)
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
 class EdgeTTSServer:
     """Edge-TTS MCP Server"""
     
-    def __init__(self):
-        self.server = FastMCP("edge-tts-server")
-        self.tools = EdgeTTSTools()
+    def __init__(self, config: Optional[ServerConfig] = None):
+        self.config = config or ServerConfig.load()
+        self.transport = self.config.get("server.transport", "stdio")
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"不支持的传输方式: {self.transport}")
+        self.server = FastMCP(
+            "edge-tts-server",
+            host=self.config.get("server.host", "localhost"),
+            port=self.config.get("server.port", 8000)
+        )
+        self.tools = EdgeTTSTools(self.config)
+        # 准入控制：全局并发限制、按客户端限流与有界等待队列
+        self.admission = AdmissionController.from_config(self.config)
+        
+        # 注册工具处理函数，统一记录调用次数、耗时与并发数
+        handlers = {
+            "text_to_speech": self.handle_text_to_speech,
+            "batch_text_to_speech": self.handle_batch_text_to_speech,
+            "list_voices": self.handle_list_voices,
+            "save_audio": self.handle_save_audio,
+            "get_voice_info": self.handle_get_voice_info,
+            "generate_subtitles": self.handle_generate_subtitles,
+            "text_to_speech_with_subtitles": self.handle_text_to_speech_with_subtitles,
+            "long_text_to_speech": self.handle_long_text_to_speech,
+            "submit_job": self.handle_submit_job,
+            "get_job_status": self.handle_get_job_status,
+            "list_jobs": self.handle_list_jobs,
+            "get_cache_stats": self.handle_get_cache_stats,
+            "get_server_stats": self.handle_get_server_stats
+        }
+        for name, handler in handlers.items():
+            self.server.tool(name)(self._instrumented(name, handler))
         
-        # 注册工具处理函数
-        self.server.tool("text_to_speech")(self.handle_text_to_speech)
-        self.server.tool("batch_text_to_speech")(self.handle_batch_text_to_speech)
-        self.server.tool("list_voices")(self.handle_list_voices)
-        self.server.tool("save_audio")(self.handle_save_audio)
-        self.server.tool("get_voice_info")(self.handle_get_voice_info)
-        self.server.tool("generate_subtitles")(self.handle_generate_subtitles)
+        self.tools.metrics.gauge(
+            "edge_tts_admission_in_flight", "已准入正在执行的请求数",
+            lambda: self.admission.in_flight
+        )
+        self.tools.metrics.gauge(
+            "edge_tts_admission_queued", "等待准入的请求数",
+            lambda: self.admission.queued
+        )
+        
+        # HTTP 传输下提供生成文件下载与流式合成端点，音频无需经由工具结果传输
+        self.download_chunk_size = self.config.get("advanced.audio.download_chunk_size", 65536)
+        self.server.custom_route("/audio/stream", methods=["GET"])(self.handle_audio_stream)
+        self.server.custom_route("/audio/{filename}", methods=["GET"])(self.handle_audio_download)
+        if self.config.get("monitoring.health_check_enabled", False):
+            self.server.custom_route(
+                self.config.get("monitoring.health_check_endpoint", "/health"), methods=["GET"]
+            )(self.handle_health)
         
     async def handle_initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """初始化处理"""
@@ -48,21 +138,26 @@ class EdgeTTSServer:
             }
         }
     
-    async def handle_text_to_speech(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_text_to_speech(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
         """处理文本转语音请求"""
         try:
-            # 验证参数
-            request = TextToSpeechRequest(**arguments)
-            
-            # 调用工具
-            result = await self.tools.text_to_speech(request)
-            
-            # 检查是否有错误
-            if "error" in result:
-                return self._create_error_response(result["error"])
-            
-            return result
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = TextToSpeechRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.text_to_speech(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
         except Exception as e:
             logger.error(f"文本转语音处理失败: {str(e)}")
             return self._create_error_response({
@@ -70,21 +165,26 @@ class EdgeTTSServer:
                 "message": f"参数验证失败: {str(e)}"
             })
     
-    async def handle_list_voices(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_list_voices(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
         """处理语音列表查询请求"""
         try:
-            # 验证参数
-            request = ListVoicesRequest(**arguments)
-            
-            # 调用工具
-            result = await self.tools.list_voices(request)
-            
-            # 检查是否有错误
-            if "error" in result:
-                return self._create_error_response(result["error"])
-            
-            return result
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = ListVoicesRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.list_voices(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
         except Exception as e:
             logger.error(f"语音列表查询失败: {str(e)}")
             return self._create_error_response({
@@ -92,21 +192,26 @@ class EdgeTTSServer:
                 "message": f"参数验证失败: {str(e)}"
             })
     
-    async def handle_save_audio(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_save_audio(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
         """处理保存音频请求"""
         try:
-            # 验证参数
-            request = SaveAudioRequest(**arguments)
-            
-            # 调用工具
-            result = await self.tools.save_audio(request)
-            
-            # 检查是否有错误
-            if "error" in result:
-                return self._create_error_response(result["error"])
-            
-            return result
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = SaveAudioRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.save_audio(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
         except Exception as e:
             logger.error(f"保存音频失败: {str(e)}")
             return self._create_error_response({
@@ -114,25 +219,29 @@ class EdgeTTSServer:
                 "message": f"参数验证失败: {str(e)}"
             })
     
-    async def handle_get_voice_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_get_voice_info(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
         """处理语音信息查询请求"""
         try:
-            voice_name = arguments.get("voice_name")
-            if not voice_name:
-                return self._create_error_response({
-                    "code": 1003,
-                    "message": "voice_name 参数必填"
-                })
-            
-            # 调用工具
-            result = await self.tools.get_voice_info(voice_name)
-            
-            # 检查是否有错误
-            if "error" in result:
-                return self._create_error_response(result["error"])
-            
-            return result
+            async with self.admission.admit(self._client_key(ctx)):
+                voice_name = arguments.get("voice_name")
+                if not voice_name:
+                    return self._create_error_response({
+                        "code": 1003,
+                        "message": "voice_name 参数必填"
+                    })
+                
+                # 调用工具
+                result = await self.tools.get_voice_info(voice_name)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
         except Exception as e:
             logger.error(f"语音信息查询失败: {str(e)}")
             return self._create_error_response({
@@ -140,50 +249,381 @@ class EdgeTTSServer:
                 "message": f"参数验证失败: {str(e)}"
             })
     
-    async def handle_generate_subtitles(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_generate_subtitles(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
         """处理生成字幕请求"""
         try:
-            # 验证参数
-            request = GenerateSubtitlesRequest(**arguments)
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = GenerateSubtitlesRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.generate_subtitles(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
-            # 调用工具
-            result = await self.tools.generate_subtitles(request)
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
+        except Exception as e:
+            logger.error(f"生成字幕失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1003,
+                "message": f"参数验证失败: {str(e)}"
+            })
+    
+    async def handle_batch_text_to_speech(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
+        """处理批量文本转语音请求"""
+        try:
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = BatchTextToSpeechRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.batch_text_to_speech(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
-            # 检查是否有错误
-            if "error" in result:
-                return self._create_error_response(result["error"])
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
+        except Exception as e:
+            logger.error(f"批量文本转语音处理失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1003,
+                "message": f"参数验证失败: {str(e)}"
+            })
+    
+    async def handle_text_to_speech_with_subtitles(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
+        """处理音频与字幕同步生成请求"""
+        try:
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = SpeechWithSubtitlesRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.text_to_speech_with_subtitles(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
-            return result
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
+        except Exception as e:
+            logger.error(f"音频与字幕生成失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1003,
+                "message": f"参数验证失败: {str(e)}"
+            })
+    
+    async def handle_long_text_to_speech(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
+        """处理长文本分块合成请求"""
+        try:
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = LongTextToSpeechRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.long_text_to_speech(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
         except Exception as e:
-            logger.error(f"生成字幕失败: {str(e)}")
+            logger.error(f"长文本合成失败: {str(e)}")
             return self._create_error_response({
                 "code": 1003,
                 "message": f"参数验证失败: {str(e)}"
             })
     
-    async def handle_batch_text_to_speech(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """处理批量文本转语音请求"""
+    async def handle_submit_job(self, arguments: Dict[str, Any], ctx: Optional[Context] = None) -> Dict[str, Any]:
+        """处理后台任务提交请求"""
         try:
-            # 验证参数
-            request = BatchTextToSpeechRequest(**arguments)
+            async with self.admission.admit(self._client_key(ctx)):
+                # 验证参数
+                with span("validation"):
+                    request = SubmitJobRequest(**arguments)
+                
+                # 调用工具
+                result = await self.tools.submit_job(request)
+                
+                # 检查是否有错误
+                if "error" in result:
+                    return self._create_error_response(result["error"])
+                
+                return result
             
-            # 调用工具
-            result = await self.tools.batch_text_to_speech(request)
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            return self._create_error_response(e.to_error())
+        except Exception as e:
+            logger.error(f"后台任务提交失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1003,
+                "message": f"参数验证失败: {str(e)}"
+            })
+    
+    async def handle_get_job_status(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """处理后台任务状态查询请求（轮询请求不计入准入控制）"""
+        try:
+            with span("validation"):
+                request = JobStatusRequest(**arguments)
+            result = await self.tools.get_job_status(request)
             
-            # 检查是否有错误
-            if "error" in result:
+            if "error" in result and "job_id" not in result:
                 return self._create_error_response(result["error"])
             
             return result
             
         except Exception as e:
-            logger.error(f"批量文本转语音处理失败: {str(e)}")
+            logger.error(f"任务状态查询失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1003,
+                "message": f"参数验证失败: {str(e)}"
+            })
+    
+    async def handle_list_jobs(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """处理后台任务列表查询请求"""
+        try:
+            with span("validation"):
+                request = ListJobsRequest(**arguments)
+            return await self.tools.list_jobs(request)
+            
+        except Exception as e:
+            logger.error(f"任务列表查询失败: {str(e)}")
             return self._create_error_response({
                 "code": 1003,
                 "message": f"参数验证失败: {str(e)}"
             })
     
+    async def handle_get_cache_stats(self) -> Dict[str, Any]:
+        """处理缓存统计查询请求"""
+        try:
+            return await self.tools.get_cache_stats()
+            
+        except Exception as e:
+            logger.error(f"缓存统计查询失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1004,
+                "message": f"缓存统计查询失败: {str(e)}"
+            })
+    
+    async def handle_get_server_stats(self) -> Dict[str, Any]:
+        """处理服务器状态查询请求"""
+        try:
+            stats = await self.tools.get_server_stats()
+            stats["admission"] = self.admission.stats()
+            return stats
+            
+        except Exception as e:
+            logger.error(f"服务器状态查询失败: {str(e)}")
+            return self._create_error_response({
+                "code": 1004,
+                "message": f"服务器状态查询失败: {str(e)}"
+            })
+    
+    def _instrumented(self, tool: str, handler: Callable[..., Awaitable[Dict[str, Any]]]):
+        """包装工具处理函数以记录指标与慢请求追踪，保留原函数签名供 FastMCP 生成参数 schema"""
+        metrics = self.tools.metrics
+        tracer = self.tools.tracer
+        
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            metrics.tool_in_flight.inc(tool=tool)
+            started = time.perf_counter()
+            status = "error"
+            try:
+                with tracer.trace(tool):
+                    result = await handler(*args, **kwargs)
+                status = self._result_status(result)
+                return self._to_tool_result(self._add_download_urls(result))
+            finally:
+                metrics.tool_in_flight.dec(tool=tool)
+                metrics.tool_duration.observe(time.perf_counter() - started, tool=tool)
+                metrics.tool_requests.inc(tool=tool, status=status)
+        
+        return wrapper
+    
+    @staticmethod
+    def _to_tool_result(result: Any) -> Any:
+        """内联音频结果转换为 MCP 音频内容（元数据同时作为结构化结果），其余结果由 FastMCP 序列化"""
+        if not isinstance(result, dict) or result.get("_type") != "inline_audio":
+            return result
+        
+        metadata = {key: value for key, value in result.items() if key != "audio_data"}
+        return CallToolResult(
+            content=[
+                TextContent(type="text", text=json.dumps(metadata, ensure_ascii=False, indent=2)),
+                AudioContent(type="audio", data=result["audio_data"], mimeType=result["mime_type"])
+            ],
+            # 与 FastMCP 对 Dict 返回值的结构化输出格式保持一致
+            structuredContent={"result": metadata}
+        )
+    
+    @staticmethod
+    def _result_status(result: Dict[str, Any]) -> str:
+        """工具结果状态：ok、rejected（准入控制拒绝）或 error"""
+        error = result.get("error") if isinstance(result, dict) else None
+        if not error or "job_id" in result:
+            return "ok"
+        if error.get("code") in (QUEUE_FULL_ERROR, RATE_LIMITED_ERROR):
+            return "rejected"
+        return "error"
+    
+    @property
+    def base_url(self) -> str:
+        """下载链接使用的服务地址，可通过 server.public_url 指定反向代理后的地址"""
+        public_url = self.config.get("server.public_url")
+        if public_url:
+            return public_url.rstrip("/")
+        return f"http://{self.server.settings.host}:{self.server.settings.port}"
+    
+    def _download_url(self, file_path: str) -> Optional[str]:
+        """生成文件的下载链接，文件不在输出目录中时返回 None"""
+        path = os.path.abspath(file_path)
+        if not self.tools.output.contains(path):
+            return None
+        if os.path.splitext(path)[1].lower() not in DOWNLOAD_MEDIA_TYPES:
+            return None
+        return f"{self.base_url}/audio/{quote(os.path.basename(path))}"
+    
+    def _add_download_urls(self, result: Any) -> Any:
+        """HTTP 传输下为结果（包括后台任务结果）中的音频与字幕文件附加下载链接"""
+        if self.transport == "stdio" or not isinstance(result, dict):
+            return result
+        
+        for target in (result, result.get("result")):
+            if not isinstance(target, dict):
+                continue
+            for key, url_key in (("file_path", "download_url"), ("subtitle_file_path", "subtitle_download_url")):
+                if target.get(key):
+                    url = self._download_url(target[key])
+                    if url:
+                        target[url_key] = url
+        return result
+    
+    def _http_error(self, status_code: int, error_info: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        """HTTP 端点的错误响应，响应体与工具错误格式一致"""
+        return JSONResponse(self._create_error_response(error_info), status_code=status_code, headers=headers)
+    
+    async def handle_audio_download(self, request: Request) -> Response:
+        """下载生成的音频或字幕文件，仅允许输出目录中的文件名"""
+        filename = request.path_params["filename"]
+        media_type = DOWNLOAD_MEDIA_TYPES.get(os.path.splitext(filename)[1].lower())
+        if (
+            media_type is None
+            or filename != os.path.basename(filename)
+            or filename.startswith(".")
+            or "\\" in filename
+        ):
+            return self._http_error(400, {"code": 1003, "message": f"不允许下载的文件: {filename}"})
+        
+        path = await self.tools._run_blocking(self.tools.output.find, filename)
+        if path is None:
+            return self._http_error(404, {"code": 1005, "message": f"文件不存在: {filename}"})
+        
+        # FileResponse 分块读取文件并支持 Range 请求
+        return FileResponse(path, media_type=media_type, filename=filename, content_disposition_type="inline")
+    
+    async def handle_audio_stream(self, request: Request) -> Response:
+        """边合成边下载 mp3 音频，查询参数与 text_to_speech 工具一致"""
+        try:
+            with span("validation"):
+                tts_request = TextToSpeechRequest(**dict(request.query_params))
+        except Exception as e:
+            return self._http_error(400, {"code": 1003, "message": f"参数验证失败: {str(e)}"})
+        if tts_request.format != "mp3":
+            return self._http_error(400, {"code": 1003, "message": "流式下载仅支持 mp3 格式"})
+        
+        client = request.client
+        try:
+            await self.admission.acquire(f"http-{client.host}" if client else "default")
+        except AdmissionRejected as e:
+            logger.warning(f"请求被拒绝: {e.message}")
+            headers = None
+            if "retry_after" in e.data:
+                headers = {"Retry-After": str(max(1, round(e.data["retry_after"])))}
+            return self._http_error(_REJECTED_STATUS.get(e.code, 503), e.to_error(), headers)
+        
+        try:
+            voice_info = await self.tools.client.get_voice_info(tts_request.voice)
+        except Exception as e:
+            self.admission.release()
+            return self._http_error(502, {"code": 1004, "message": f"获取语音列表失败: {str(e)}"})
+        if not voice_info:
+            self.admission.release()
+            return self._http_error(404, {"code": 1002, "message": f"语音不存在: {tts_request.voice}"})
+        
+        # 先取得首个音频块再发送响应头，上游在出音频前失败时可返回错误状态码
+        stream = self.tools.stream_speech(tts_request, self.download_chunk_size)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        except Exception as e:
+            self.admission.release()
+            logger.error(f"流式合成失败: {str(e)}")
+            return self._http_error(502, {"code": 1005, "message": f"音频生成失败: {str(e)}"})
+        
+        async def body():
+            try:
+                if first:
+                    yield first
+                async for data in stream:
+                    yield data
+            finally:
+                await stream.aclose()
+        
+        return _AdmittedStreamingResponse(body(), release=self.admission.release, media_type="audio/mpeg")
+    
+    async def handle_health(self, request: Request) -> Response:
+        """健康检查"""
+        return JSONResponse({
+            "status": "ok",
+            "transport": self.transport,
+            "admission": self.admission.stats()
+        })
+    
+    def _client_key(self, ctx: Optional[Context]) -> str:
+        """限流使用的客户端标识，无法识别时归入默认客户端
+
+        HTTP 传输按对端地址识别（与 /audio/stream 共用令牌桶）：无状态模式下每个请求都是新的会话，
+        按会话识别会使限流失效。stdio 传输只有一个会话。
+        """
+        if ctx is None:
+            return "default"
+        try:
+            if ctx.client_id:
+                return ctx.client_id
+            request = ctx.request_context.request
+            client = getattr(request, "client", None)
+            if client is not None:
+                return f"http-{client.host}"
+            return f"session-{id(ctx.session)}"
+        except Exception:
+            return "default"
+    
     def _create_error_response(self, error_info: Dict[str, Any]) -> Dict[str, Any]:
         """创建错误响应"""
         return {
@@ -194,13 +634,46 @@ class EdgeTTSServer:
             }
         }
     
+    def _start_metrics(self, port_offset: int = 0):
+        """启动指标服务，多进程模式下各工作进程使用 metrics_port + 进程序号"""
+        if self.config.get("monitoring.metrics_enabled", False):
+            self.tools.metrics.serve(
+                host=self.config.get("monitoring.metrics_host", "127.0.0.1"),
+                port=self.config.get("monitoring.metrics_port", 9090) + port_offset
+            )
+    
+    def _serve_worker(self, sock: socket.socket, index: int):
+        """工作进程入口：在共享的监听套接字上提供 streamable HTTP 服务"""
+        self._start_metrics(index)
+        app = self.server.streamable_http_app()
+        config = uvicorn.Config(app, log_level=self.server.settings.log_level.lower())
+        asyncio.run(uvicorn.Server(config).serve(sockets=[sock]))
+    
     def run(self):
         """运行服务器"""
         logger.info("启动 Edge-TTS MCP Server...")
         
+        workers = self.config.get("server.worker_processes", 1)
+        if workers > 1:
+            # 会话状态保存在单个进程内，多进程模式只能使用无状态的 streamable HTTP
+            if self.transport != "streamable-http":
+                raise ValueError("多进程模式仅支持 streamable-http 传输")
+            self.server.settings.stateless_http = True
+            logger.info(
+                f"多进程模式: {workers} 个工作进程，监听 {self.server.settings.host}:{self.server.settings.port}"
+            )
+            run_prefork(self._serve_worker, self.server.settings.host, self.server.settings.port, workers)
+            return
+        
+        self._start_metrics()
+        
+        if self.transport != "stdio":
+            logger.info(
+                f"传输方式: {self.transport}，监听 {self.server.settings.host}:{self.server.settings.port}"
+            )
+        
         try:
-            # FastMCP 使用简化的运行方式
-            self.server.run()
+            self.server.run(transport=self.transport)
         except Exception as e:
             logger.error(f"服务器运行错误: {e}")
             raise
@@ -211,7 +684,7 @@ def main():
     server = EdgeTTSServer()
     
     try:
-        asyncio.run(server.run())
+        server.run()
     except KeyboardInterrupt:
         logger.info("服务器已停止")
     except Exception as e:
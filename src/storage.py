@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_OUTPUT_DIR = "./output"
+
+# 写入中的临时文件前缀，下载与统计时忽略
+TEMP_PREFIX = ".tmp-"
+
+# 合成工具按参数生成的文件名前缀，调用方指定的文件名不能使用，避免覆盖按参数复用的合成结果
+GENERATED_PREFIXES = ("tts_", "tts_sub_", "batch_tts_", "long_tts_")
+
+# 生成文件的扩展名，清理与配额只处理分片目录中这些类型的生成文件
+OUTPUT_EXTENSIONS = (".mp3", ".wav", ".ogg", ".srt")
+
+# 超出配额时淘汰到上限的该比例以下，避免之后的每次写入都触发淘汰
+LOW_WATER_RATIO = 0.9
+
+_SHARD_NAME = re.compile(r"^[0-9a-f]{2}$")
+
+
+def output_name(prefix: str, params: Any, extension: str, unique: bool = False) -> str:
+    """根据全部合成参数生成输出文件名
+
+    参数相同的请求得到相同的文件名，可直接复用已生成的文件；参数不同的并发请求不会写入同一文件。
+    unique 为 True 时附加随机后缀，每次生成新文件。
+    """
+    payload = json.dumps(params, ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    suffix = f"_{uuid.uuid4().hex[:8]}" if unique else ""
+    return f"{prefix}_{digest}{suffix}.{extension}"
+
+
+class UnsafePathError(ValueError):
+    """输出路径无效或不在允许的目录中"""
+
+
+def _is_within(path: str, directory: str) -> bool:
+    return os.path.commonpath([path, directory]) == directory
+
+
+class OutputStore:
+    """生成文件的受管输出目录
+
+    - 只给出文件名的输出按文件名哈希分片存放（如 root/ab/cd/name.mp3），避免单个目录文件过多
+    - 输出根目录及调用方指定的路径必须位于 security.safe_file_paths 之一
+    - 先写入同目录下的临时文件，完成后重命名，读取方不会看到写了一半的文件
+    - 生成文件总大小超过配额时按修改时间淘汰最旧的文件，直到降到配额的 LOW_WATER_RATIO 以下
+    - 后台定期删除超过保留期的文件
+
+    清理与配额只涉及分片目录中合成工具按参数命名的文件，调用方指定名称的文件（如 save_audio 保存的音频）、
+    根目录下的其他文件、其他子目录及写入中的临时文件不受影响。
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_OUTPUT_DIR,
+        safe_paths: Optional[List[str]] = None,
+        shard_depth: int = 2,
+        retention: float = 86400,
+        max_bytes: int = 0,
+        sweep_interval: float = 300,
+        executor=None
+    ):
+        self.safe_paths = [os.path.realpath(path) for path in (safe_paths or [])]
+        self.root = os.path.realpath(root)
+        if not self.is_safe(self.root):
+            raise UnsafePathError(f"输出目录不在 security.safe_file_paths 允许的目录中: {root}")
+        self.shard_depth = max(0, min(shard_depth, 4))
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.executor = executor
+
+        # 生成文件索引（路径 -> (修改时间, 大小)），首次写入时扫描建立，写入时更新，清理时按实际扫描结果校正
+        self._index: Optional[Dict[str, tuple]] = None
+        self.total_bytes = 0
+        self.files = 0
+        self.expired = 0
+        self.evicted = 0
+        self.sweeps = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config, executor=None) -> "OutputStore":
+        """根据服务器配置创建输出目录"""
+        return cls(
+            root=config.get("output.dir", DEFAULT_OUTPUT_DIR),
+            safe_paths=config.get("security.safe_file_paths"),
+            shard_depth=config.get("output.shard_depth", 2),
+            retention=config.get("output.retention", 86400),
+            max_bytes=int(config.get("output.max_size_mb", 0) * 1024 * 1024),
+            sweep_interval=config.get("output.sweep_interval", 300),
+            executor=executor
+        )
+
+    def is_safe(self, path: str) -> bool:
+        """路径是否位于允许的目录中，未配置 safe_file_paths 时不限制"""
+        if not self.safe_paths:
+            return True
+        real_path = os.path.realpath(path)
+        return any(_is_within(real_path, directory) for directory in self.safe_paths)
+
+    def _shard_dir(self, filename: str) -> str:
+        digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+        parts = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.root, *parts)
+
+    def locate(self, filename: str) -> str:
+        """文件名在输出目录中对应的分片路径（不检查是否存在）"""
+        return os.path.join(self._shard_dir(filename), filename)
+
+    def resolve(self, filename: str, generated: bool = False) -> str:
+        """确定输出文件路径（阻塞操作，会创建所需目录）
+
+        只给出文件名时放入分片目录；包含目录的路径按当前目录解析，必须位于允许的目录中。
+        generated 为 False 时 filename 由调用方指定，不能以 GENERATED_PREFIXES 开头。
+        """
+        if not generated and os.path.basename(filename).lower().startswith(GENERATED_PREFIXES):
+            raise UnsafePathError(
+                f"文件名不能以 {', '.join(GENERATED_PREFIXES)} 开头（保留给合成结果）: {filename}"
+            )
+        if os.path.basename(filename) == filename:
+            if filename in ("", ".", "..") or filename.startswith(TEMP_PREFIX):
+                raise UnsafePathError(f"无效的文件名: {filename}")
+            path = self.locate(filename)
+        else:
+            path = os.path.abspath(filename)
+            if not self.is_safe(path):
+                raise UnsafePathError(f"文件路径不在 security.safe_file_paths 允许的目录中: {filename}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def find(self, filename: str) -> Optional[str]:
+        """查找输出目录中的文件，用于下载；文件不存在时返回 None"""
+        if os.path.basename(filename) != filename or filename.startswith((".", TEMP_PREFIX)):
+            return None
+        path = self.locate(filename)
+        return path if os.path.isfile(path) else None
+
+    def contains(self, path: str) -> bool:
+        """文件是否为输出目录中按文件名分片存放的文件"""
+        path = os.path.abspath(path)
+        return self.locate(os.path.basename(path)) == path
+
+    def is_managed(self, path: str) -> bool:
+        """文件是否为清理与配额管理的生成文件
+
+        只包括分片目录中合成工具按参数命名的输出文件（以 GENERATED_PREFIXES 开头，调用方指定的文件名不能使用），
+        save_audio 等按调用方指定名称保存的文件及临时文件不会被删除。
+        """
+        name = os.path.basename(path)
+        if not name.startswith(GENERATED_PREFIXES) or name.endswith((".part", ".src.mp3")):
+            return False
+        return name.lower().endswith(OUTPUT_EXTENSIONS) and self.contains(path)
+
+    def reuse(self, path: str) -> Optional[int]:
+        """已存在的输出文件刷新修改时间（避免随即被清理）后返回文件大小，不存在时返回 None"""
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._index is not None and path in self._index:
+                self._index[path] = (time.time(), size)
+        return size
+
+    @staticmethod
+    def temp_path(path: str) -> str:
+        """与目标文件同目录的临时文件路径，保留扩展名以便按扩展名识别格式"""
+        directory, name = os.path.split(path)
+        return os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex[:12]}-{name}")
+
+    def commit(self, temp_path: str, path: str):
+        """将写好的临时文件重命名为目标文件（阻塞操作），超出配额时淘汰旧文件"""
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        if not self.is_managed(path):
+            return
+
+        with self._lock:
+            index = self._load_index()
+            previous = index.pop(path, None)
+            index[path] = (time.time(), size)
+            self.total_bytes += size - (previous[1] if previous else 0)
+            evicted = 0
+            if self.max_bytes > 0 and self.total_bytes > self.max_bytes:
+                evicted = self._evict(keep=path)
+            self.files = len(index)
+            self.evicted += evicted
+
+        if evicted:
+            logger.info(f"输出目录超出配额: 淘汰 {evicted} 个文件")
+
+    def write(self, path: str, data: bytes):
+        """原子写入文件（阻塞操作）"""
+        temp_path = self.temp_path(path)
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            self.commit(temp_path, path)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+
+    @asynccontextmanager
+    async def atomic(self, path: str) -> AsyncIterator[str]:
+        """提供临时文件路径，代码块正常结束后重命名为 path，失败时删除临时文件"""
+        temp_path = self.temp_path(path)
+        try:
+            yield temp_path
+            await self._run(self.commit, temp_path, path)
+        except BaseException:
+            await self._run(_remove_quietly, temp_path)
+            raise
+
+    async def _run(self, func, *args):
+        if self.executor is not None:
+            return await self.executor.run(func, *args)
+        return func(*args)
+
+    def _scan(self) -> List[tuple]:
+        """扫描分片目录中的生成文件，不进入其他子目录"""
+        entries = []
+        for directory, subdirs, names in os.walk(self.root):
+            depth = 0 if directory == self.root else os.path.relpath(directory, self.root).count(os.sep) + 1
+            if depth < self.shard_depth:
+                subdirs[:] = [name for name in subdirs if _SHARD_NAME.match(name)]
+                continue
+            subdirs[:] = []
+            for name in names:
+                path = os.path.join(directory, name)
+                if not self.is_managed(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _load_index(self) -> Dict[str, tuple]:
+        """返回生成文件索引，尚未建立时扫描一次（调用方需持有 _lock）"""
+        if self._index is None:
+            self._index = {path: (mtime, size) for mtime, size, path in self._scan()}
+            self.total_bytes = sum(size for _, size in self._index.values())
+        return self._index
+
+    def _evict(self, keep: Optional[str] = None) -> int:
+        """按修改时间从旧到新淘汰文件，直到总大小降到低水位（调用方需持有 _lock）
+
+        keep 为刚写入的文件，不会被淘汰。
+        """
+        target = int(self.max_bytes * LOW_WATER_RATIO)
+        evicted = 0
+        for path, (_, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if self.total_bytes <= target:
+                break
+            if path == keep:
+                continue
+            if _remove_quietly(path):
+                evicted += 1
+            del self._index[path]
+            self.total_bytes -= size
+        return evicted
+
+    def sweep(self) -> Dict[str, int]:
+        """重新扫描生成文件，删除超过保留期的文件，超出配额时淘汰最旧的文件（阻塞操作）"""
+        with self._lock:
+            now = time.time()
+            index = {}
+            expired = 0
+            for mtime, size, path in self._scan():
+                if self.retention > 0 and now - mtime > self.retention:
+                    if _remove_quietly(path):
+                        expired += 1
+                    continue
+                index[path] = (mtime, size)
+
+            self._index = index
+            self.total_bytes = sum(size for _, size in index.values())
+            evicted = 0
+            if self.max_bytes > 0 and self.total_bytes > self.max_bytes:
+                evicted = self._evict()
+
+            self.files = len(index)
+            self.expired += expired
+            self.evicted += evicted
+            self.sweeps += 1
+
+        if expired or evicted:
+            logger.info(f"输出目录清理: 删除过期文件 {expired} 个，按配额淘汰 {evicted} 个")
+        return {"expired": expired, "evicted": evicted}
+
+    def start(self):
+        """启动后台清理（需在事件循环中调用，重复调用无副作用）"""
+        if self.sweep_interval <= 0 or (self.retention <= 0 and self.max_bytes <= 0):
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_sweeper())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_sweeper(self):
+        while True:
+            try:
+                await self._run(self.sweep)
+            except Exception as e:
+                logger.warning(f"输出目录清理失败: {str(e)}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "files": self.files,
+            "retention": self.retention,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "sweeps": self.sweeps
+        }
+
+
+def _remove_quietly(path: str) -> bool:
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
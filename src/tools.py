@@ -1,7 +1,8 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 import asyncio
 import base64
 import os
+import shutil
 from .models import (
     TextToSpeechRequest, 
     ListVoicesRequest, 
@@ -11,17 +12,186 @@ from .models import (
     VoiceInfo,
     ErrorResponse,
     BatchTextToSpeechRequest,
-    VoiceSegment
+    VoiceSegment,
+    SpeechWithSubtitlesRequest,
+    LongTextToSpeechRequest,
+    SubmitJobRequest,
+    JobStatusRequest,
+    ListJobsRequest
 )
-from .utils import EdgeTTSClient
+from .utils import EdgeTTSClient, DEFAULT_SNAPSHOT_PATH, remove_file
+from .config import ServerConfig
+from .cache import AudioCache
+from .storage import OutputStore, UnsafePathError, output_name
+from .coalesce import RequestCoalescer
+from .audio import HEADER_SIZE, has_audio_header, merge_audio, needs_transcode, transcode_file
+from .executor import BlockingExecutor, LoopLagMonitor
+from .retry import RetryPolicy
+from .longform import split_text, measure_durations, shift_cues
+from .jobs import Job, JobManager
+from .limits import AdmissionRejected
+from .metrics import Metrics
+from .tracing import Tracer, span
 
 
+# 决定合成结果的参数，输出文件名按这些参数的哈希生成
+SYNTHESIS_FIELDS = {"text", "voice", "rate", "volume", "pitch", "boundary"}
+
 class EdgeTTSTools:
     """Edge-TTS MCP 工具类"""
     
-    def __init__(self):
-        self.client = EdgeTTSClient()
+    def __init__(self, config: Optional[ServerConfig] = None):
+        self.config = config or ServerConfig.load()
+        # 阻塞的文件读写与音频处理统一交给专用线程池
+        self.executor = BlockingExecutor(self.config.get("server.max_workers", 10))
+        self.loop_monitor = LoopLagMonitor()
+        self.metrics = Metrics()
+        # 慢请求追踪：各阶段耗时超过阈值时输出结构化日志
+        self.tracer = Tracer.from_config(self.config)
+        self.client = EdgeTTSClient(
+            cache_ttl=self.config.get("cache.voices_cache_ttl", 3600),
+            snapshot_path=self.config.get("cache.voices_snapshot_file", DEFAULT_SNAPSHOT_PATH),
+            executor=self.executor,
+            write_buffer_size=self.config.get("advanced.audio.buffer_size", 65536),
+            retry_policy=RetryPolicy.from_config(self.config),
+            metrics=self.metrics,
+            refresh_retry_interval=self.config.get("cache.voices_refresh_retry_interval", 60),
+            max_upstream_sessions=self.config.get("limits.max_concurrent_requests", 20)
+        )
+        self.audio_cache = AudioCache.from_config(self.config)
+        # 生成文件统一写入受管输出目录：分片存放、原子写入、配额与过期清理
+        self.output = OutputStore.from_config(self.config, executor=self.executor)
+        # 合并参数相同的进行中合成，分别用于输出到文件与返回音频数据的调用
+        self.file_requests = RequestCoalescer(copy=self._copy_file)
+        self.audio_requests = RequestCoalescer()
         self.supported_formats = ['mp3', 'wav', 'ogg']
+        # 单个批量或长文本合成同时合成的语音段数；所有请求的上游会话总数另由客户端限制
+        self.batch_concurrency = max(1, self.config.get("limits.batch_concurrency", 4))
+        self.longform_chunk_size = self.config.get("limits.longform_chunk_size", 2000)
+        # response_mode=inline 时直接返回音频的大小上限
+        self.inline_audio_max_bytes = self.config.get("limits.inline_audio_max_kb", 256) * 1024
+        # save_audio 分块解码写入的块大小与音频大小上限
+        self.audio_chunk_size = self.config.get("advanced.audio.chunk_size", 4096)
+        self.max_audio_bytes = int(self.config.get("limits.max_audio_size_mb", 10) * 1024 * 1024)
+        # 大批量合成可提交为后台任务，由任务工作协程执行
+        self.jobs = JobManager.from_config(self.config, executor=self.executor)
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """注册采集时读取的音频缓存、线程池与事件循环指标"""
+        self.metrics.gauge(
+            "edge_tts_audio_cache_hit_ratio", "音频缓存命中率",
+            lambda: self.audio_cache.stats()["hit_ratio"]
+        )
+        self.metrics.gauge(
+            "edge_tts_audio_cache_bytes", "音频缓存占用字节数",
+            lambda: self.audio_cache.stats()["total_bytes"]
+        )
+        self.metrics.gauge(
+            "edge_tts_executor_active", "线程池中正在执行的阻塞操作数",
+            lambda: self.executor.active
+        )
+        self.metrics.gauge(
+            "edge_tts_event_loop_lag_seconds", "最近一次测得的事件循环延迟",
+            lambda: self.loop_monitor.last_lag
+        )
+        self.metrics.gauge(
+            "edge_tts_jobs_running", "正在执行的后台任务数",
+            lambda: self.jobs.store.stats()["running"]
+        )
+        self.metrics.gauge(
+            "edge_tts_coalesced_requests", "复用进行中相同合成结果的请求累计数",
+            lambda: self.file_requests.coalesced + self.audio_requests.coalesced
+        )
+        self.metrics.gauge(
+            "edge_tts_output_bytes", "输出目录中生成文件占用字节数",
+            lambda: self.output.total_bytes
+        )
+
+    async def _synthesize(
+        self,
+        text: str,
+        voice: str,
+        rate: str,
+        volume: str,
+        pitch: str,
+        boundary: str,
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> tuple:
+        """合成音频，优先使用音频缓存，返回 (音频数据, 是否命中缓存)"""
+        cache_key = AudioCache.make_key(text, voice, rate, volume, pitch, boundary)
+        audio_data = await self._run_blocking(self.audio_cache.get, cache_key)
+        if audio_data is not None:
+            return audio_data, True
+        
+        async def synthesize() -> bytes:
+            audio_data = await self.client.text_to_speech(
+                text=text,
+                voice=voice,
+                rate=rate,
+                volume=volume,
+                pitch=pitch,
+                boundary=boundary,
+                retry_stats=retry_stats
+            )
+            await self._run_blocking(self.audio_cache.put, cache_key, audio_data)
+            return audio_data
+        
+        # 相同参数的合成正在进行时等待其结果，不重复请求上游
+        audio_data, _ = await self.audio_requests.run(cache_key, synthesize)
+        return audio_data, False
+
+    async def _synthesize_to_file(
+        self,
+        file_path: str,
+        text: str,
+        voice: str,
+        rate: str,
+        volume: str,
+        pitch: str,
+        boundary: str,
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> tuple:
+        """流式合成音频到文件，优先复制缓存文件，返回 (是否命中缓存, 是否复用了进行中的相同合成)"""
+        cache_key = AudioCache.make_key(text, voice, rate, volume, pitch, boundary)
+        cached_path = await self._run_blocking(self.audio_cache.get_path, cache_key)
+        if cached_path is not None:
+            try:
+                with span("file_write"):
+                    await self._run_blocking(shutil.copyfile, cached_path, file_path)
+                return True, False
+            except FileNotFoundError:
+                # 缓存文件在复制前被淘汰，回退到重新合成
+                pass
+        
+        async def synthesize():
+            await self.client.text_to_speech_file(
+                file_path,
+                text=text,
+                voice=voice,
+                rate=rate,
+                volume=volume,
+                pitch=pitch,
+                boundary=boundary,
+                retry_stats=retry_stats
+            )
+            await self._run_blocking(self.audio_cache.put_file, cache_key, file_path)
+        
+        # 相同参数的合成正在进行时（如同一通知同时发给多个客户端）等待其完成并复制文件
+        _, coalesced = await self.file_requests.run(cache_key, synthesize, target_path=file_path)
+        return False, coalesced
+
+    async def _copy_file(self, source_path: str, target_path: str):
+        with span("file_write"):
+            await self._run_blocking(shutil.copyfile, source_path, target_path)
+
+    async def _transcode(self, source_path: str, output_path: str, output_format: str):
+        """在线程池中将 mp3 转码为目标格式，完成后删除源文件"""
+        try:
+            with span("encode"):
+                await self._run_blocking(transcode_file, source_path, output_path, output_format)
+        finally:
+            await self._run_blocking(remove_file, source_path)
 
     async def text_to_speech(self, request: TextToSpeechRequest) -> Dict[str, Any]:
         """文本转语音工具"""
@@ -31,42 +201,152 @@ class EdgeTTSTools:
             if not voice_info:
                 return self._create_error_response(1002, f"语音不存在: {request.voice}")
             
-            # 生成唯一文件名
-            import hashlib
-            import time
-            timestamp = int(time.time())
-            text_hash = hashlib.md5(request.text.encode()).hexdigest()[:8]
-            filename = f"tts_{timestamp}_{text_hash}.{request.format}"
-            
-            # 生成音频并直接保存到文件
-            audio_data = await self.client.text_to_speech(
-                text=request.text,
-                voice=request.voice,
-                rate=request.rate,
-                volume=request.volume,
-                pitch=request.pitch,
-                boundary=request.boundary
+            # 按全部合成参数命名，参数相同的请求对应同一文件
+            filename = output_name(
+                "tts", request.dict(include=SYNTHESIS_FIELDS), request.format, request.unique_filename
             )
             
-            # 保存到文件
-            with open(filename, 'wb') as f:
-                f.write(audio_data)
+            # 内联返回只支持无需转码的 mp3，其他格式仍写入文件
+            if request.response_mode == "inline" and not needs_transcode(request.format):
+                return await self._text_to_speech_inline(request, filename)
+            
+            file_path = await self._run_blocking(self.output.resolve, filename, generated=True)
+            if not request.unique_filename:
+                # 已生成过相同参数的文件时直接复用，不再合成
+                file_size = await self._run_blocking(self.output.reuse, file_path)
+                if file_size is not None:
+                    return {
+                        "success": True,
+                        "file_path": file_path,
+                        "file_size": file_size,
+                        "cached": False,
+                        "coalesced": False,
+                        "reused": True,
+                        "retries": 0,
+                        "message": f"复用已生成的音频文件: {file_path} ({file_size} 字节)",
+                        "_type": "file_reference"
+                    }
+            
+            retry_stats = {"retries": 0}
+            async with self.output.atomic(file_path) as temp_path:
+                # 上游只输出 mp3，其他格式先合成到临时 mp3 再转码
+                synth_path = f"{temp_path}.src.mp3" if needs_transcode(request.format) else temp_path
+                
+                # 音频块边生成边写入文件（命中缓存时跳过合成）
+                cached, coalesced = await self._synthesize_to_file(
+                    synth_path,
+                    text=request.text,
+                    voice=request.voice,
+                    rate=request.rate,
+                    volume=request.volume,
+                    pitch=request.pitch,
+                    boundary=request.boundary,
+                    retry_stats=retry_stats
+                )
+                
+                if synth_path != temp_path:
+                    await self._transcode(synth_path, temp_path, request.format)
             
             # 计算文件大小
-            file_size = len(audio_data)
+            file_size = await self._run_blocking(os.path.getsize, file_path)
             
             # 返回简洁的文件信息，避免在控制台输出大量数据
             return {
                 "success": True,
-                "file_path": filename,
+                "file_path": file_path,
                 "file_size": file_size,
-                "message": f"音频文件已生成: {filename} ({file_size} 字节)",
+                "cached": cached,
+                "coalesced": coalesced,
+                "reused": False,
+                "retries": retry_stats["retries"],
+                "message": f"音频文件已生成: {file_path} ({file_size} 字节)",
                 "_type": "file_reference"  # 标记为文件引用类型
             }
             
+        except UnsafePathError as e:
+            return self._create_error_response(1003, str(e))
         except Exception as e:
             return self._create_error_response(1005, f"音频生成失败: {str(e)}")
 
+    async def _text_to_speech_inline(self, request: TextToSpeechRequest, filename: str) -> Dict[str, Any]:
+        """在内存中合成，音频不超过内联阈值时直接返回音频内容（不读写磁盘），否则写入 filename"""
+        retry_stats = {"retries": 0}
+        audio_data, cached = await self._synthesize(
+            text=request.text,
+            voice=request.voice,
+            rate=request.rate,
+            volume=request.volume,
+            pitch=request.pitch,
+            boundary=request.boundary,
+            retry_stats=retry_stats
+        )
+        
+        if len(audio_data) <= self.inline_audio_max_bytes:
+            return {
+                "success": True,
+                "audio_data": self.client.audio_to_base64(audio_data),
+                "mime_type": "audio/mpeg",
+                "audio_size": len(audio_data),
+                "cached": cached,
+                "retries": retry_stats["retries"],
+                "message": f"音频已内联返回 ({len(audio_data)} 字节)",
+                "_type": "inline_audio"
+            }
+        
+        file_path = await self._run_blocking(self.output.resolve, filename, generated=True)
+        with span("file_write"):
+            await self._run_blocking(self.output.write, file_path, audio_data)
+        return {
+            "success": True,
+            "file_path": file_path,
+            "file_size": len(audio_data),
+            "cached": cached,
+            "retries": retry_stats["retries"],
+            "message": f"音频超过内联上限，已写入文件: {file_path} ({len(audio_data)} 字节)",
+            "_type": "file_reference"
+        }
+
+    async def stream_speech(self, request: TextToSpeechRequest, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        """流式合成 mp3 音频供 HTTP 下载，调用方需先校验语音
+
+        命中缓存时分块读取缓存文件；否则上游音频块到达即产出，完整结束后写入缓存。
+        """
+        cache_key = AudioCache.make_key(
+            request.text, request.voice, request.rate, request.volume, request.pitch, request.boundary
+        )
+        cached_path = await self._run_blocking(self.audio_cache.get_path, cache_key)
+        if cached_path is not None:
+            try:
+                f = await self._run_blocking(open, cached_path, 'rb')
+            except FileNotFoundError:
+                # 缓存文件在读取前被淘汰，回退到重新合成
+                f = None
+            if f is not None:
+                try:
+                    while True:
+                        data = await self._run_blocking(f.read, chunk_size)
+                        if not data:
+                            return
+                        yield data
+                finally:
+                    await self._run_blocking(f.close)
+
+        chunks: Optional[List[bytes]] = [] if self.audio_cache.enabled else None
+        async for data in self.client.stream_audio(
+            text=request.text,
+            voice=request.voice,
+            rate=request.rate,
+            volume=request.volume,
+            pitch=request.pitch,
+            boundary=request.boundary
+        ):
+            if chunks is not None:
+                chunks.append(data)
+            yield data
+
+        if chunks:
+            await self._run_blocking(self.audio_cache.put, cache_key, b"".join(chunks))
+
     async def list_voices(self, request: ListVoicesRequest) -> Dict[str, Any]:
         """语音列表查询工具"""
         try:
@@ -97,27 +377,32 @@ class EdgeTTSTools:
             if request.format not in self.supported_formats:
                 return self._create_error_response(1003, f"不支持的格式: {request.format}")
             
-            # 转换base64为音频数据
-            audio_data = self.client.base64_to_audio(request.audio_data)
+            # 按base64长度估算解码后的大小，明显超限时不解码直接拒绝
+            if len(request.audio_data) * 3 // 4 - 2 > self.max_audio_bytes:
+                return self._create_error_response(1003, self._audio_too_large_message())
             
             # 确保文件名有正确的扩展名
             filename = request.filename
             if not filename.lower().endswith(f'.{request.format}'):
                 filename = f"{filename}.{request.format}"
             
-            # 保存文件
-            with open(filename, 'wb') as f:
-                f.write(audio_data)
-            
-            # 获取文件大小
-            file_size = os.path.getsize(filename)
+            # 分块解码写入临时文件，校验通过后才替换目标文件
+            file_path = await self._run_blocking(self.output.resolve, filename)
+            with span("file_write"):
+                async with self.output.atomic(file_path) as temp_path:
+                    file_size = await self._run_blocking(
+                        self._write_base64_audio, temp_path, request.audio_data, request.format
+                    )
             
             return {
                 "success": True,
-                "file_path": os.path.abspath(filename),
+                "file_path": file_path,
                 "file_size": file_size
             }
             
+        except ValueError as e:
+            # 路径不安全、base64数据无效、超过大小上限或不是有效的音频数据
+            return self._create_error_response(1003, str(e))
         except Exception as e:
             return self._create_error_response(1005, f"保存音频失败: {str(e)}")
 
@@ -147,10 +432,12 @@ class EdgeTTSTools:
                 return self._create_error_response(1003, "目前仅支持SRT格式")
             
             # 生成字幕
+            retry_stats = {"retries": 0}
             subtitles = await self.client.generate_subtitles(
                 text=request.text,
                 voice=request.voice,
-                boundary=request.boundary_type
+                boundary=request.boundary_type,
+                retry_stats=retry_stats
             )
             
             # 计算分段数量
@@ -159,119 +446,511 @@ class EdgeTTSTools:
             return {
                 "subtitles": subtitles,
                 "format": request.subtitle_format,
-                "segment_count": segment_count
+                "segment_count": segment_count,
+                "retries": retry_stats["retries"]
             }
             
         except Exception as e:
             return self._create_error_response(1005, f"生成字幕失败: {str(e)}")
 
-    async def batch_text_to_speech(self, request: BatchTextToSpeechRequest) -> Dict[str, Any]:
-        """批量文本转语音工具"""
+    async def text_to_speech_with_subtitles(self, request: SpeechWithSubtitlesRequest) -> Dict[str, Any]:
+        """音频与字幕同步生成工具"""
         try:
-            import tempfile
-            import os
-            from pydub import AudioSegment
-            import hashlib
-            import time
+            # 验证语音是否存在
+            voice_info = await self.client.get_voice_info(request.voice)
+            if not voice_info:
+                return self._create_error_response(1002, f"语音不存在: {request.voice}")
+            
+            # 验证字幕格式
+            if request.subtitle_format.lower() != 'srt':
+                return self._create_error_response(1003, "目前仅支持SRT格式")
+            
+            # 按全部合成参数命名，音频与字幕文件同名
+            filename = output_name(
+                "tts_sub", request.dict(include=SYNTHESIS_FIELDS), request.format, request.unique_filename
+            )
+            subtitle_filename = f"{os.path.splitext(filename)[0]}.srt"
+            
+            file_path = await self._run_blocking(self.output.resolve, filename, generated=True)
+            subtitle_path = await self._run_blocking(self.output.resolve, subtitle_filename, generated=True)
+            if not request.unique_filename:
+                # 音频与字幕均已生成过时直接复用
+                reused = await self._run_blocking(self._reuse_with_subtitles, file_path, subtitle_path)
+                if reused is not None:
+                    file_size, subtitles = reused
+                    return {
+                        "success": True,
+                        "file_path": file_path,
+                        "file_size": file_size,
+                        "subtitle_file_path": subtitle_path,
+                        "subtitles": subtitles,
+                        "format": request.subtitle_format,
+                        "segment_count": subtitles.count(" --> "),
+                        "reused": True,
+                        "retries": 0,
+                        "message": f"复用已生成的音频及字幕文件: {file_path}, {subtitle_path} ({file_size} 字节)",
+                        "_type": "file_reference"
+                    }
+            
+            retry_stats = {"retries": 0}
+            async with self.output.atomic(file_path) as temp_path:
+                # 上游只输出 mp3，其他格式先合成到临时 mp3 再转码
+                synth_path = f"{temp_path}.src.mp3" if needs_transcode(request.format) else temp_path
+                
+                # 单次合成，同时写入音频并收集字幕
+                result = await self.client.text_to_speech_with_subtitles(
+                    synth_path,
+                    text=request.text,
+                    voice=request.voice,
+                    rate=request.rate,
+                    volume=request.volume,
+                    pitch=request.pitch,
+                    boundary=request.boundary,
+                    retry_stats=retry_stats
+                )
+                
+                with span("file_write"):
+                    await self._run_blocking(self.output.write, subtitle_path, result["subtitles"].encode('utf-8'))
+                
+                # 音频同样写入缓存，供后续 text_to_speech 复用
+                cache_key = AudioCache.make_key(
+                    request.text, request.voice, request.rate,
+                    request.volume, request.pitch, request.boundary
+                )
+                await self._run_blocking(self.audio_cache.put_file, cache_key, synth_path)
+                
+                if synth_path != temp_path:
+                    await self._transcode(synth_path, temp_path, request.format)
             
-            # 生成唯一文件名
-            timestamp = int(time.time())
-            segments_hash = hashlib.md5(str([seg.text for seg in request.segments]).encode()).hexdigest()[:8]
-            filename = request.output_filename or f"batch_tts_{timestamp}_{segments_hash}.{request.format}"
+            file_size = await self._run_blocking(os.path.getsize, file_path)
+            return {
+                "success": True,
+                "file_path": file_path,
+                "file_size": file_size,
+                "subtitle_file_path": subtitle_path,
+                "subtitles": result["subtitles"],
+                "format": request.subtitle_format,
+                "segment_count": result["segment_count"],
+                "reused": False,
+                "retries": retry_stats["retries"],
+                "message": f"音频及字幕文件已生成: {file_path}, {subtitle_path} ({file_size} 字节)",
+                "_type": "file_reference"
+            }
             
-            # 处理每个语音段
-            processed_segments = []
-            errors = []
+        except UnsafePathError as e:
+            return self._create_error_response(1003, str(e))
+        except Exception as e:
+            return self._create_error_response(1005, f"生成音频和字幕失败: {str(e)}")
+
+    async def batch_text_to_speech(self, request: BatchTextToSpeechRequest, job: Optional[Job] = None) -> Dict[str, Any]:
+        """批量文本转语音工具，作为后台任务执行时通过 job 报告每个语音段的进度"""
+        try:
+            # 未指定文件名时按全部语音段参数命名
+            filename = request.output_filename or output_name(
+                "batch_tts", [segment.dict() for segment in request.segments],
+                request.format, request.unique_filename
+            )
+            file_path = await self._run_blocking(self.output.resolve, filename, generated=not request.output_filename)
             
+            # 参数完全相同的语音段（如重复的提示语）只合成一次，结果复用到每个位置
+            groups: Dict[tuple, List[int]] = {}
             for i, segment in enumerate(request.segments):
-                try:
-                    # 验证语音是否存在
-                    voice_info = await self.client.get_voice_info(segment.voice)
-                    if not voice_info:
-                        errors.append({
-                            "index": i,
-                            "error": f"语音不存在: {segment.voice}"
-                        })
-                        continue
-                    
-                    # 生成单个语音段的音频
-                    audio_data = await self.client.text_to_speech(
-                        text=segment.text,
-                        voice=segment.voice,
-                        rate=segment.rate,
-                        volume=segment.volume,
-                        pitch=segment.pitch,
-                        boundary=segment.boundary
-                    )
-                    
-                    processed_segments.append({
-                        "index": i,
-                        "audio_data": audio_data,
-                        "text": segment.text,
-                        "voice": segment.voice
-                    })
-                    
-                except Exception as e:
-                    errors.append({
-                        "index": i,
-                        "error": f"处理语音段失败: {str(e)}"
-                    })
+                key = (segment.text, segment.voice, segment.rate, segment.volume, segment.pitch, segment.boundary)
+                groups.setdefault(key, []).append(i)
+            
+            # 并发处理不重复的语音段，信号量限制同时进行的合成数量
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
+            retry_stats = {"retries": 0}
+            unique_results = await asyncio.gather(*[
+                self._process_segment(indices, request.segments[indices[0]], semaphore, retry_stats, job)
+                for indices in groups.values()
+            ])
+            
+            # 按原始顺序展开结果，重复的语音段共用同一份音频数据
+            results: List[Dict[str, Any]] = [None] * len(request.segments)
+            for indices, result in zip(groups.values(), unique_results):
+                results[indices[0]] = result
+                for i in indices[1:]:
+                    results[i] = dict(result, index=i, deduplicated=True)
+            
+            processed_segments = [result for result in results if "error" not in result]
+            errors = [result for result in results if "error" in result]
             
             # 如果没有成功处理的语音段，返回错误
             if not processed_segments:
                 return self._create_error_response(1005, "所有语音段处理失败", {"errors": errors})
             
-            # 合并音频文件
-            if len(processed_segments) == 1:
-                # 只有一个语音段，直接保存
-                audio_data = processed_segments[0]["audio_data"]
-                with open(filename, 'wb') as f:
-                    f.write(audio_data)
-            else:
-                # 多个语音段，需要合并
-                combined_audio = None
-                
-                for segment in processed_segments:
-                    # 创建临时文件
-                    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                        temp_file.write(segment["audio_data"])
-                        temp_filename = temp_file.name
-                    
-                    try:
-                        # 加载音频段
-                        audio_segment = AudioSegment.from_file(temp_filename, format="mp3")
-                        
-                        if combined_audio is None:
-                            combined_audio = audio_segment
-                        else:
-                            combined_audio += audio_segment
-                        
-                    finally:
-                        # 清理临时文件
-                        os.unlink(temp_filename)
-                
-                # 保存合并后的音频
-                if combined_audio:
-                    combined_audio.export(filename, format=request.format)
+            # 合并音频文件：mp3 输出直接拼接音频帧，需要格式转换时才解码重编码
+            with span("merge"):
+                async with self.output.atomic(file_path) as temp_path:
+                    merge_method = await self._run_blocking(
+                        merge_audio,
+                        [segment["audio_data"] for segment in processed_segments],
+                        request.format,
+                        temp_path
+                    )
                 
             # 计算文件大小
-            file_size = os.path.getsize(filename)
+            file_size = await self._run_blocking(os.path.getsize, file_path)
             
             return {
                 "success": True,
-                "file_path": os.path.abspath(filename),
+                "file_path": file_path,
                 "file_size": file_size,
                 "segment_count": len(request.segments),
                 "processed_count": len(processed_segments),
                 "failed_count": len(errors),
+                "cached_count": sum(
+                    1 for seg in processed_segments if seg["cached"] and not seg.get("deduplicated")
+                ),
+                "deduplicated_count": len(request.segments) - len(groups),
+                "merge_method": merge_method,
+                "retries": retry_stats["retries"],
                 "errors": errors,
-                "message": f"批量音频文件已生成: {filename} ({file_size} 字节)",
+                "message": f"批量音频文件已生成: {file_path} ({file_size} 字节)",
                 "_type": "file_reference"
             }
             
+        except UnsafePathError as e:
+            return self._create_error_response(1003, str(e))
         except Exception as e:
             return self._create_error_response(1005, f"批量音频生成失败: {str(e)}")
 
+    async def long_text_to_speech(self, request: LongTextToSpeechRequest, job: Optional[Job] = None) -> Dict[str, Any]:
+        """长文本分块合成工具，作为后台任务执行时通过 job 报告每个文本块的进度"""
+        try:
+            # 验证语音是否存在
+            voice_info = await self.client.get_voice_info(request.voice)
+            if not voice_info:
+                return self._create_error_response(1002, f"语音不存在: {request.voice}")
+            
+            # 在句子边界处切分文本
+            chunks = split_text(request.text, request.chunk_size or self.longform_chunk_size)
+            if not chunks:
+                return self._create_error_response(1003, "文本内容为空")
+            if job is not None:
+                job.set_total(len(chunks))
+            
+            # 未指定文件名时按合成参数及分块大小命名
+            filename = request.output_filename or output_name(
+                "long_tts",
+                dict(request.dict(include=SYNTHESIS_FIELDS), chunk_size=request.chunk_size or self.longform_chunk_size),
+                request.format,
+                request.unique_filename
+            )
+            file_path = await self._run_blocking(self.output.resolve, filename, generated=not request.output_filename)
+            
+            # 各文本块并发合成，信号量限制同时进行的合成数量；任一块失败即取消其余块
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
+            retry_stats = {"retries": 0}
+            tasks = [
+                asyncio.ensure_future(self._process_chunk(i, chunk, request, semaphore, retry_stats, job))
+                for i, chunk in enumerate(chunks)
+            ]
+            try:
+                results = await asyncio.gather(*tasks)
+            except Exception:
+                for task in tasks:
+                    task.cancel()
+                raise
+            
+            # gather 按提交顺序返回结果，音频按原文顺序拼接
+            audio_segments = [result["audio_data"] for result in results]
+            with span("merge"):
+                async with self.output.atomic(file_path) as temp_path:
+                    merge_method = await self._run_blocking(merge_audio, audio_segments, request.format, temp_path)
+            durations = await self._run_blocking(measure_durations, audio_segments)
+            
+            file_size = await self._run_blocking(os.path.getsize, file_path)
+            response = {
+                "success": True,
+                "file_path": file_path,
+                "file_size": file_size,
+                "chunk_count": len(chunks),
+                "cached_count": sum(1 for result in results if result["cached"]),
+                "merge_method": merge_method,
+                "retries": retry_stats["retries"],
+                "message": f"长文本音频文件已生成: {file_path} ({file_size} 字节)",
+                "_type": "file_reference"
+            }
+            if all(duration is not None for duration in durations):
+                response["duration"] = round(sum(durations), 3)
+            
+            if request.subtitles:
+                # 每块的字幕按前面所有块的音频时长平移
+                cues = shift_cues([result["cues"] for result in results], durations)
+                subtitle_path = await self._run_blocking(
+                    self.output.resolve, f"{os.path.splitext(filename)[0]}.srt", generated=not request.output_filename
+                )
+                with span("file_write"):
+                    await self._run_blocking(
+                        self.output.write, subtitle_path, self.client.format_srt(cues).encode('utf-8')
+                    )
+                response["subtitle_file_path"] = subtitle_path
+                response["segment_count"] = len(cues)
+            
+            return response
+            
+        except UnsafePathError as e:
+            return self._create_error_response(1003, str(e))
+        except Exception as e:
+            return self._create_error_response(1005, f"长文本音频生成失败: {str(e)}")
+
+    async def submit_job(self, request: SubmitJobRequest) -> Dict[str, Any]:
+        """后台任务提交工具：校验参数后立即返回任务ID"""
+        runners = {
+            "batch_text_to_speech": (BatchTextToSpeechRequest, self.batch_text_to_speech),
+            "long_text_to_speech": (LongTextToSpeechRequest, self.long_text_to_speech)
+        }
+        model, runner = runners[request.tool]
+        
+        try:
+            with span("validation"):
+                tool_request = model(**request.arguments)
+        except ValueError as e:
+            return self._create_error_response(1003, f"参数验证失败: {str(e)}")
+        
+        # 批量合成的语音段数提交时即可确定，长文本在切分后设置
+        total = len(tool_request.segments) if request.tool == "batch_text_to_speech" else 0
+        try:
+            job = await self.jobs.submit(
+                request.tool,
+                lambda job: self._run_job(request.tool, runner, tool_request, job),
+                total=total
+            )
+        except AdmissionRejected as e:
+            return {"error": e.to_error()}
+        
+        return {
+            "job_id": job.id,
+            "tool": job.tool,
+            "status": job.status,
+            "message": f"任务已提交: {job.id}",
+            "_type": "job_reference"
+        }
+
+    async def _run_job(self, tool: str, runner, tool_request, job: Job) -> Dict[str, Any]:
+        """在后台工作协程中执行任务，任务单独追踪耗时"""
+        with self.tracer.trace(f"job:{tool}"):
+            return await runner(tool_request, job=job)
+
+    async def get_job_status(self, request: JobStatusRequest) -> Dict[str, Any]:
+        """后台任务状态查询工具"""
+        # 多进程模式下任务可能由其他工作进程执行
+        job = await self.jobs.get(request.job_id)
+        if job is None:
+            return self._create_error_response(1008, f"任务不存在或已过期: {request.job_id}")
+        return job.to_dict(include_segments=request.include_segments)
+
+    async def list_jobs(self, request: ListJobsRequest) -> Dict[str, Any]:
+        """后台任务列表查询工具"""
+        jobs = await self.jobs.list(request.status)
+        return {
+            "jobs": [
+                {
+                    "job_id": job.id,
+                    "tool": job.tool,
+                    "status": job.status,
+                    "created_at": job.created_at,
+                    "progress": job.progress()
+                }
+                for job in jobs
+            ],
+            "total_count": len(jobs)
+        }
+
+    async def get_cache_stats(self) -> Dict[str, Any]:
+        """音频缓存统计工具"""
+        return {"audio_cache": self.audio_cache.stats()}
+
+    async def get_server_stats(self) -> Dict[str, Any]:
+        """服务器运行状态统计工具"""
+        self.loop_monitor.start()
+        return {
+            "audio_cache": self.audio_cache.stats(),
+            "coalescing": {
+                "inflight": self.file_requests.inflight + self.audio_requests.inflight,
+                "coalesced": self.file_requests.coalesced + self.audio_requests.coalesced
+            },
+            "event_loop": self.loop_monitor.stats(),
+            "executor": self.executor.stats(),
+            "jobs": self.jobs.stats(),
+            "output": self.output.stats(),
+            "slow_requests": self.tracer.stats(),
+            "upstream_retries": self.client.retry_count,
+            "upstream_sessions": {
+                "active": self.client.upstream_active,
+                "limit": self.client.max_upstream_sessions
+            }
+        }
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """在专用线程池中执行阻塞操作"""
+        self.loop_monitor.start()
+        self.output.start()
+        return await self.executor.run(func, *args, **kwargs)
+
+    def _write_base64_audio(self, path: str, base64_data: str, audio_format: str) -> int:
+        """分块解码base64音频并写入文件（阻塞操作），返回写入的字节数
+
+        超过 limits.max_audio_size_mb 时立即停止；写入前校验文件头与声明的格式一致。
+        """
+        size = 0
+        header = b""
+        with open(path, 'wb') as f:
+            for block in self.client.iter_base64_audio(base64_data, self.audio_chunk_size):
+                size += len(block)
+                if size > self.max_audio_bytes:
+                    raise ValueError(self._audio_too_large_message())
+                if len(header) < HEADER_SIZE:
+                    # 凑够文件头所需的字节后再校验并写入
+                    header += block
+                    if len(header) < HEADER_SIZE:
+                        continue
+                    self._check_audio_header(header, audio_format)
+                    block = header
+                f.write(block)
+            if len(header) < HEADER_SIZE:
+                self._check_audio_header(header, audio_format)
+                f.write(header)
+        return size
+
+    @staticmethod
+    def _check_audio_header(header: bytes, audio_format: str):
+        if not has_audio_header(header, audio_format):
+            raise ValueError(f"音频数据不是有效的 {audio_format} 格式")
+
+    def _audio_too_large_message(self) -> str:
+        return f"音频数据超过大小上限 {self.max_audio_bytes // (1024 * 1024)}MB"
+
+    def _reuse_with_subtitles(self, file_path: str, subtitle_path: str) -> Optional[tuple]:
+        """音频与字幕文件均存在时返回 (音频大小, 字幕内容)"""
+        try:
+            with open(subtitle_path, 'r', encoding='utf-8') as f:
+                subtitles = f.read()
+        except FileNotFoundError:
+            return None
+        file_size = self.output.reuse(file_path)
+        if file_size is None:
+            return None
+        self.output.reuse(subtitle_path)
+        return file_size, subtitles
+
+    async def _process_segment(
+        self,
+        indices: List[int],
+        segment: VoiceSegment,
+        semaphore: asyncio.Semaphore,
+        retry_stats: Optional[Dict[str, int]] = None,
+        job: Optional[Job] = None
+    ) -> Dict[str, Any]:
+        """处理出现在 indices 各位置的同一语音段，失败时返回包含 error 的字典"""
+        result = await self._synthesize_segment(indices[0], segment, semaphore, retry_stats)
+        if job is not None:
+            for index in indices:
+                job.mark_segment(index, ok="error" not in result)
+        return result
+
+    async def _synthesize_segment(
+        self,
+        index: int,
+        segment: VoiceSegment,
+        semaphore: asyncio.Semaphore,
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                # 验证语音是否存在
+                voice_info = await self.client.get_voice_info(segment.voice)
+                if not voice_info:
+                    return {
+                        "index": index,
+                        "error": f"语音不存在: {segment.voice}"
+                    }
+                
+                # 生成单个语音段的音频
+                audio_data, cached = await self._synthesize(
+                    text=segment.text,
+                    voice=segment.voice,
+                    rate=segment.rate,
+                    volume=segment.volume,
+                    pitch=segment.pitch,
+                    boundary=segment.boundary,
+                    retry_stats=retry_stats
+                )
+                
+                return {
+                    "index": index,
+                    "audio_data": audio_data,
+                    "text": segment.text,
+                    "voice": segment.voice,
+                    "cached": cached
+                }
+                
+            except Exception as e:
+                return {
+                    "index": index,
+                    "error": f"处理语音段失败: {str(e)}"
+                }
+
+    async def _process_chunk(
+        self,
+        index: int,
+        text: str,
+        request: LongTextToSpeechRequest,
+        semaphore: asyncio.Semaphore,
+        retry_stats: Optional[Dict[str, int]] = None,
+        job: Optional[Job] = None
+    ) -> Dict[str, Any]:
+        """合成长文本中的一个文本块，失败时抛出带块序号的异常"""
+        async with semaphore:
+            try:
+                result = await self._synthesize_chunk(text, request, retry_stats)
+            except Exception as e:
+                if job is not None:
+                    job.mark_segment(index, ok=False)
+                raise Exception(f"第 {index + 1} 个文本块合成失败: {str(e)}")
+            
+            if job is not None:
+                job.mark_segment(index)
+            return result
+
+    async def _synthesize_chunk(
+        self,
+        text: str,
+        request: LongTextToSpeechRequest,
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """合成一个文本块，需要字幕时同时收集边界事件"""
+        if not request.subtitles:
+            audio_data, cached = await self._synthesize(
+                text=text,
+                voice=request.voice,
+                rate=request.rate,
+                volume=request.volume,
+                pitch=request.pitch,
+                boundary=request.boundary,
+                retry_stats=retry_stats
+            )
+            return {"audio_data": audio_data, "cues": [], "cached": cached}
+        
+        # 需要字幕时必须实际合成以获得边界事件，音频同样写入缓存
+        audio_data, cues = await self.client.text_to_speech_with_cues(
+            text=text,
+            voice=request.voice,
+            rate=request.rate,
+            volume=request.volume,
+            pitch=request.pitch,
+            boundary=request.boundary,
+            retry_stats=retry_stats
+        )
+        cache_key = AudioCache.make_key(
+            text, request.voice, request.rate,
+            request.volume, request.pitch, request.boundary
+        )
+        await self._run_blocking(self.audio_cache.put, cache_key, audio_data)
+        return {"audio_data": audio_data, "cues": cues, "cached": False}
+
     def _create_error_response(self, code: int, message: str, data: Optional[dict] = None) -> Dict[str, Any]:
         """创建错误响应"""
         return {
@@ -297,7 +976,14 @@ class EdgeTTSTools:
                         "volume": {"type": "string", "description": "音量调整", "default": "+0%"},
                         "pitch": {"type": "string", "description": "音调调整", "default": "+0Hz"},
                         "boundary": {"type": "string", "description": "边界类型", "default": "SentenceBoundary"},
-                        "format": {"type": "string", "description": "输出格式", "default": "mp3"}
+                        "format": {"type": "string", "description": "输出格式", "default": "mp3"},
+                        "response_mode": {
+                            "type": "string",
+                            "description": "返回方式：inline 在音频不超过阈值时直接返回音频内容",
+                            "enum": ["file", "inline"],
+                            "default": "file"
+                        },
+                        "unique_filename": {"type": "boolean", "description": "是否在文件名后附加随机后缀（默认按合成参数命名并复用已生成的文件）", "default": False}
                     },
                     "required": ["text"]
                 }
@@ -327,7 +1013,8 @@ class EdgeTTSTools:
                             "maxItems": 20
                         },
                         "format": {"type": "string", "description": "输出格式", "default": "mp3"},
-                        "output_filename": {"type": "string", "description": "输出文件名（可选）"}
+                        "output_filename": {"type": "string", "description": "输出文件名（可选）"},
+                        "unique_filename": {"type": "boolean", "description": "是否在文件名后附加随机后缀（默认按合成参数命名并复用已生成的文件）", "default": False}
                     },
                     "required": ["segments"]
                 }
@@ -381,5 +1068,103 @@ class EdgeTTSTools:
                     },
                     "required": ["text"]
                 }
+            },
+            {
+                "name": "text_to_speech_with_subtitles",
+                "description": "单次合成同时生成音频文件和时间轴一致的字幕",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "text": {"type": "string", "description": "要转换的文本内容"},
+                        "voice": {"type": "string", "description": "语音名称", "default": "en-US-EmmaMultilingualNeural"},
+                        "rate": {"type": "string", "description": "语速调整", "default": "+0%"},
+                        "volume": {"type": "string", "description": "音量调整", "default": "+0%"},
+                        "pitch": {"type": "string", "description": "音调调整", "default": "+0Hz"},
+                        "boundary": {"type": "string", "description": "边界类型", "default": "SentenceBoundary"},
+                        "format": {"type": "string", "description": "输出格式", "default": "mp3"},
+                        "subtitle_format": {"type": "string", "description": "字幕格式", "default": "srt"},
+                        "unique_filename": {"type": "boolean", "description": "是否在文件名后附加随机后缀（默认按合成参数命名并复用已生成的文件）", "default": False}
+                    },
+                    "required": ["text"]
+                }
+            },
+            {
+                "name": "long_text_to_speech",
+                "description": "长文本转语音，在句子边界处自动分块并发合成后按顺序拼接",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "text": {"type": "string", "description": "要转换的长文本内容（最多100000字符）"},
+                        "voice": {"type": "string", "description": "语音名称", "default": "en-US-EmmaMultilingualNeural"},
+                        "rate": {"type": "string", "description": "语速调整", "default": "+0%"},
+                        "volume": {"type": "string", "description": "音量调整", "default": "+0%"},
+                        "pitch": {"type": "string", "description": "音调调整", "default": "+0Hz"},
+                        "boundary": {"type": "string", "description": "边界类型", "default": "SentenceBoundary"},
+                        "format": {"type": "string", "description": "输出格式", "default": "mp3"},
+                        "chunk_size": {"type": "integer", "description": "每个文本块的最大字符数（100-5000）"},
+                        "subtitles": {"type": "boolean", "description": "是否同时生成SRT字幕", "default": False},
+                        "output_filename": {"type": "string", "description": "输出文件名（可选）"},
+                        "unique_filename": {"type": "boolean", "description": "是否在文件名后附加随机后缀（默认按合成参数命名并复用已生成的文件）", "default": False}
+                    },
+                    "required": ["text"]
+                }
+            },
+            {
+                "name": "submit_job",
+                "description": "将批量合成或长文本合成提交为后台任务，立即返回任务ID",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "tool": {
+                            "type": "string",
+                            "description": "后台执行的工具名称",
+                            "enum": ["batch_text_to_speech", "long_text_to_speech"]
+                        },
+                        "arguments": {"type": "object", "description": "工具参数，与直接调用该工具时相同"}
+                    },
+                    "required": ["tool", "arguments"]
+                }
+            },
+            {
+                "name": "get_job_status",
+                "description": "查询后台任务的状态、进度及完成后的文件信息",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "job_id": {"type": "string", "description": "任务ID"},
+                        "include_segments": {"type": "boolean", "description": "是否返回每个语音段的状态", "default": False}
+                    },
+                    "required": ["job_id"]
+                }
+            },
+            {
+                "name": "list_jobs",
+                "description": "查询保留期内的后台任务列表",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "status": {
+                            "type": "string",
+                            "description": "状态过滤",
+                            "enum": ["pending", "running", "succeeded", "failed"]
+                        }
+                    }
+                }
+            },
+            {
+                "name": "get_cache_stats",
+                "description": "获取音频缓存的命中、未命中与淘汰统计",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {}
+                }
+            },
+            {
+                "name": "get_server_stats",
+                "description": "获取服务器运行状态，包括事件循环延迟、线程池与缓存统计",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {}
+                }
             }
         ]
\ No newline at end of file
@@ -0,0 +1,134 @@
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("edge_tts_trace", default=None)
+
+
+class Trace:
+    """一次工具调用的分阶段耗时
+
+    同名阶段（如批量合成中各语音段的首包等待）累加耗时并记录次数与最大值；
+    并发执行的阶段耗时之和可能超过总耗时。
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        # 阶段名 -> [总耗时, 次数, 最大耗时]
+        self.phases: Dict[str, List[float]] = {}
+
+    def record(self, phase: str, duration: float):
+        stats = self.phases.get(phase)
+        if stats is None:
+            self.phases[phase] = [duration, 1, duration]
+        else:
+            stats[0] += duration
+            stats[1] += 1
+            stats[2] = max(stats[2], duration)
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "total_ms": round(self.elapsed * 1000, 3),
+            "phases": {
+                phase: {
+                    "total_ms": round(total * 1000, 3),
+                    "count": int(count),
+                    "max_ms": round(longest * 1000, 3)
+                }
+                for phase, (total, count, longest) in self.phases.items()
+            }
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def record(phase: str, duration: float):
+    """向当前调用的追踪记录一个阶段耗时，没有进行中的追踪时忽略"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(phase, duration)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    """记录代码块耗时为一个阶段"""
+    if _current_trace.get() is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+class Tracer:
+    """慢请求追踪
+
+    每次工具调用建立一个 Trace，总耗时超过阈值时以结构化日志输出各阶段耗时，
+    并保留最近的慢请求记录供 get_server_stats 查看。
+    """
+
+    def __init__(self, threshold: float = 5.0, enabled: bool = True, keep: int = 20):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.slow_count = 0
+        self.recent = deque(maxlen=keep)
+
+    @classmethod
+    def from_config(cls, config) -> "Tracer":
+        """根据服务器配置创建追踪器"""
+        return cls(
+            threshold=config.get("monitoring.slow_request_threshold", 5.0),
+            enabled=config.get("monitoring.performance_monitoring", True)
+        )
+
+    @contextmanager
+    def trace(self, tool: str) -> Iterator[Optional[Trace]]:
+        """追踪一次工具调用，嵌套调用时覆盖外层追踪"""
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(tool)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finished = time.perf_counter()
+            if trace.elapsed >= self.threshold:
+                self._report(trace)
+
+    def _report(self, trace: Trace):
+        self.slow_count += 1
+        data = trace.to_dict()
+        self.recent.append(data)
+        logger.warning(f"慢请求: {json.dumps(data, ensure_ascii=False)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "slow_requests": self.slow_count,
+            "recent": list(self.recent)
+        }
@@ -1,19 +1,113 @@
 import base64
+import binascii
 import asyncio
+import logging
+import inspect
+import os
+import tempfile
+import time
 import aiohttp
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Iterator, Tuple
 import json
 from .models import VoiceInfo
+from .catalog import VoiceCatalog
+from .executor import BlockingExecutor, AsyncFileWriter
+from .retry import RetryPolicy, SynthesisTimeout, RETRYABLE_ERRORS
+from .locking import FileLock
+from .metrics import Metrics
+from .tracing import current_trace, record, span
+
+
+logger = logging.getLogger(__name__)
+
+
+# 语音列表快照默认与音频缓存放在同一临时目录下
+DEFAULT_SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), "edge-tts-mcp", "voices.json")
+
+
+def remove_file(path: str):
+    """删除文件，文件不存在时忽略"""
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+class _TimedConnector(aiohttp.TCPConnector):
+    """记录建立连接（TCP 与 TLS 握手）耗时的连接器，仅在请求被追踪时使用
+
+    edge-tts 为每段文本（超过 4096 字节的文本会被切分）及时钟偏差重连各创建一个会话，
+    会话结束时会关闭传入的连接器。因此会话关闭连接器时不做处理，
+    由 _stream_chunks 在整个消息流结束后调用 release 关闭。
+    各 aiohttp 版本的 close 参数与返回值不同，原样转发参数，返回值可等待时才等待。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_time = 0.0
+        self._held = True
+
+    def close(self, *args, **kwargs) -> Awaitable[None]:
+        if self._held:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(None)
+            return done
+        return super().close(*args, **kwargs)
+
+    async def release(self):
+        """消息流结束后关闭连接器"""
+        self._held = False
+        closing = self.close()
+        if inspect.isawaitable(closing):
+            await closing
+
+    async def connect(self, *args, **kwargs):
+        started = time.perf_counter()
+        connection = await super().connect(*args, **kwargs)
+        self.connect_time += time.perf_counter() - started
+        return connection
 
 
 class EdgeTTSClient:
     """Edge-TTS 客户端工具类"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_ttl: float = 3600,
+        snapshot_path: Optional[str] = None,
+        executor: Optional[BlockingExecutor] = None,
+        write_buffer_size: int = 65536,
+        retry_policy: Optional[RetryPolicy] = None,
+        metrics: Optional[Metrics] = None,
+        refresh_retry_interval: float = 60,
+        max_upstream_sessions: int = 20
+    ):
         self.session: Optional[aiohttp.ClientSession] = None
+        # 文件写入等阻塞操作在线程池中执行
+        self.executor = executor or BlockingExecutor()
+        self.write_buffer_size = write_buffer_size
+        # 上游合成的超时与重试策略
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_count = 0
+        # 进程内同时打开的上游合成会话数上限，批量与长文本合成的语音段同样受此限制
+        self.max_upstream_sessions = max(1, max_upstream_sessions)
+        self._upstream_slots = asyncio.Semaphore(self.max_upstream_sessions)
+        self.upstream_active = 0
+        self.metrics = metrics or Metrics()
         self.voices_cache = None
-        self.cache_ttl = 3600  # 1小时
+        self.catalog: Optional[VoiceCatalog] = None
+        self.cache_ttl = cache_ttl  # 默认1小时
         self.last_cache_time = 0
+        # 进行中的语音列表刷新任务，所有等待者共享
+        self._refresh_task: Optional[asyncio.Task] = None
+        # 后台刷新失败后，冷却期内不再发起刷新，避免上游不可用时每次调用都请求上游
+        self.refresh_retry_interval = refresh_retry_interval
+        self._refresh_retry_at = 0.0
+        
+        # 语音列表快照，启动时作为预热缓存加载
+        self.snapshot_path = snapshot_path
+        if self.snapshot_path:
+            # 多个工作进程共享同一快照，刷新时持有文件锁
+            self._snapshot_lock = FileLock(f"{self.snapshot_path}.lock")
+            self._load_snapshot()
 
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -24,27 +118,281 @@ class EdgeTTSClient:
             await self.session.close()
 
     async def get_voices(self) -> List[Dict[str, Any]]:
-        """获取语音列表"""
+        """获取语音列表
+
+        缓存过期时立即返回旧数据并在后台刷新；没有缓存时等待刷新完成。
+        同一时刻只会有一个刷新请求发往上游。
+        """
         try:
-            # 检查缓存
-            import time
-            current_time = time.time()
+            if self.voices_cache is not None:
+                now = time.time()
+                if now - self.last_cache_time >= self.cache_ttl:
+                    self.metrics.voice_cache_requests.inc(result="stale")
+                    if now >= self._refresh_retry_at:
+                        self._start_refresh()
+                else:
+                    self.metrics.voice_cache_requests.inc(result="hit")
+                return self.voices_cache
             
-            if (self.voices_cache and 
-                current_time - self.last_cache_time < self.cache_ttl):
+            self.metrics.voice_cache_requests.inc(result="miss")
+            # shield 防止某个等待者被取消时连带取消共享的刷新任务
+            return await asyncio.shield(self._start_refresh())
+        except Exception as e:
+            raise Exception(f"获取语音列表失败: {str(e)}")
+
+    def _start_refresh(self) -> asyncio.Task:
+        """启动语音列表刷新，已有刷新在进行时复用该任务"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_voices())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        return self._refresh_task
+
+    async def _refresh_voices(self) -> List[Dict[str, Any]]:
+        """从上游获取语音列表并重建索引
+
+        配置了快照时持有快照文件锁刷新；等待锁期间其他工作进程已写入未过期的快照时直接加载，
+        多个进程的缓存同时过期也只有一个请求发往上游。
+        """
+        if not self.snapshot_path:
+            return await self._fetch_voices()
+        
+        try:
+            await self._snapshot_lock.acquire_async()
+        except OSError as e:
+            logger.warning(f"获取语音列表快照锁失败: {str(e)}")
+            return await self._fetch_voices()
+        try:
+            if await self.executor.run(self._load_snapshot, True):
                 return self.voices_cache
             
-            # 缓存过期或不存在，重新获取
-            from edge_tts import list_voices
-            voices = await list_voices()
+            voices = await self._fetch_voices()
+            await self.executor.run(self._save_snapshot)
+            return voices
+        finally:
+            self._snapshot_lock.release()
+
+    async def _fetch_voices(self) -> List[Dict[str, Any]]:
+        from edge_tts import list_voices
+        voices = await list_voices()
+        
+        # 更新缓存并重建索引
+        self.catalog = VoiceCatalog(voices)
+        self.voices_cache = voices
+        self.last_cache_time = time.time()
+        return voices
+
+    def _load_snapshot(self, fresh_only: bool = False) -> bool:
+        """加载语音列表快照，快照时间作为缓存时间，过期后由 get_voices 在后台刷新
+
+        fresh_only 为 True 时只加载比当前缓存新且未过期的快照，返回是否已加载。
+        """
+        if not os.path.exists(self.snapshot_path):
+            return False
+        
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
             
-            # 更新缓存
-            self.voices_cache = voices
-            self.last_cache_time = current_time
+            fetched_at = snapshot.get("fetched_at", 0)
+            if fresh_only and (
+                fetched_at <= self.last_cache_time or time.time() - fetched_at >= self.cache_ttl
+            ):
+                return False
             
-            return voices
+            voices = snapshot["voices"]
+            self.catalog = VoiceCatalog(voices)
+            self.voices_cache = voices
+            self.last_cache_time = fetched_at
+            return True
         except Exception as e:
-            raise Exception(f"获取语音列表失败: {str(e)}")
+            logger.warning(f"加载语音列表快照失败: {str(e)}")
+            return False
+
+    def _save_snapshot(self):
+        """保存语音列表快照，先写临时文件再重命名保证原子性"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {"fetched_at": self.last_cache_time, "voices": self.voices_cache},
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(temp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"保存语音列表快照失败: {str(e)}")
+
+    def _on_refresh_done(self, task: asyncio.Task):
+        """记录后台刷新失败，旧缓存继续可用，冷却期后再重试"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self._refresh_retry_at = time.time() + self.refresh_retry_interval
+            logger.warning(f"刷新语音列表失败，{self.refresh_retry_interval:g} 秒后重试: {str(error)}")
+
+    async def get_catalog(self) -> VoiceCatalog:
+        """获取带索引的语音目录"""
+        await self.get_voices()
+        return self.catalog
+
+    def _communicate(
+        self,
+        text: str,
+        voice: str,
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        boundary: str = "SentenceBoundary"
+    ):
+        """创建上游合成会话"""
+        from edge_tts import Communicate
+        
+        return Communicate(
+            text=text,
+            voice=voice,
+            rate=rate,
+            volume=volume,
+            pitch=pitch,
+            boundary=boundary,
+            connect_timeout=int(self.retry_policy.connect_timeout),
+            receive_timeout=int(self.retry_policy.total_timeout)
+        )
+
+    async def _stream_chunks(self, communicate) -> AsyncIterator[Dict[str, Any]]:
+        """读取上游消息流，分别限制首个消息的等待时间与整体耗时
+
+        同时记录首个音频块延迟、合成总耗时、音频字节数与按类型统计的失败次数；
+        请求被追踪时分别记录建立连接、等待首个音频块与接收剩余数据的阶段耗时
+        （只统计等待上游的时间，不含调用方处理数据块的时间）。
+        读取期间占用一个上游会话槽位，槽位已满时等待；被追踪时在获得槽位后才创建计时连接器，
+        等待槽位期间被取消不会遗留未关闭的连接器。
+        """
+        with span("upstream_wait"):
+            await self._upstream_slots.acquire()
+        self.upstream_active += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.retry_policy.total_timeout
+        first_chunk = True
+        first_audio = True
+        waited = 0.0
+        if current_trace() is not None and getattr(communicate, "connector", False) is None:
+            communicate.connector = _TimedConnector()
+        stream = communicate.stream()
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                timeout = min(self.retry_policy.first_chunk_timeout, remaining) if first_chunk else remaining
+                if timeout <= 0:
+                    raise SynthesisTimeout(f"合成超过 {self.retry_policy.total_timeout} 秒未完成")
+                
+                wait_started = loop.time()
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    self.metrics.synthesis_duration.observe(loop.time() - started)
+                    return
+                except asyncio.TimeoutError:
+                    if first_chunk:
+                        raise SynthesisTimeout(f"等待首个数据块超过 {timeout:.1f} 秒")
+                    raise SynthesisTimeout(f"合成超过 {self.retry_policy.total_timeout} 秒未完成")
+                finally:
+                    waited += loop.time() - wait_started
+                
+                first_chunk = False
+                if chunk["type"] == "audio":
+                    if first_audio:
+                        self.metrics.first_chunk_latency.observe(loop.time() - started)
+                        connect_time = getattr(getattr(communicate, "connector", None), "connect_time", 0.0)
+                        record("upstream_connect", connect_time)
+                        record("first_chunk", waited - connect_time)
+                        waited = 0.0
+                        first_audio = False
+                    self.metrics.audio_bytes.inc(len(chunk["data"]))
+                yield chunk
+        except Exception as e:
+            self.metrics.upstream_errors.inc(type=type(e).__name__)
+            raise
+        finally:
+            if not first_audio:
+                record("stream_drain", waited)
+            try:
+                await stream.aclose()
+            finally:
+                self.upstream_active -= 1
+                self._upstream_slots.release()
+                connector = getattr(communicate, "connector", None)
+                if isinstance(connector, _TimedConnector):
+                    await connector.release()
+
+    async def _attempt_audio(
+        self,
+        text: str,
+        voice: str,
+        rate: str,
+        volume: str,
+        pitch: str,
+        boundary: str
+    ) -> AsyncIterator[bytes]:
+        """单次上游请求，逐块产出音频数据"""
+        communicate = self._communicate(text, voice, rate, volume, pitch, boundary)
+        async for chunk in self._stream_chunks(communicate):
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    async def _backoff(self, attempt: int, error: Exception, retry_stats: Optional[Dict[str, int]]) -> bool:
+        """判断失败的请求是否还能重试，可以重试时等待退避时间后返回 True"""
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.retry_policy.max_attempts:
+            return False
+        
+        delay = self.retry_policy.backoff(attempt)
+        logger.warning(f"上游合成第 {attempt} 次失败，{delay:.2f} 秒后重试: {type(error).__name__}: {str(error)}")
+        self.retry_count += 1
+        if retry_stats is not None:
+            retry_stats["retries"] = retry_stats.get("retries", 0) + 1
+        
+        await asyncio.sleep(delay)
+        return True
+
+    async def _with_retry(self, operation, retry_stats: Optional[Dict[str, int]] = None):
+        """按重试策略执行一次完整的上游操作，operation 每次调用都应从头开始"""
+        attempt = 1
+        while True:
+            try:
+                return await operation()
+            except Exception as e:
+                if not await self._backoff(attempt, e, retry_stats):
+                    raise
+                attempt += 1
+
+    async def stream_audio(
+        self,
+        text: str,
+        voice: str = "en-US-EmmaMultilingualNeural",
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> AsyncIterator[bytes]:
+        """流式文本转语音，音频块到达即产出
+
+        尚未产出任何音频时失败会按策略重试，已产出数据后失败则直接抛出。
+        """
+        attempt = 1
+        while True:
+            started = False
+            try:
+                async for data in self._attempt_audio(text, voice, rate, volume, pitch, boundary):
+                    started = True
+                    yield data
+                return
+            except Exception as e:
+                if started or not await self._backoff(attempt, e, retry_stats):
+                    raise
+                attempt += 1
 
     async def text_to_speech(
         self, 
@@ -53,78 +401,199 @@ class EdgeTTSClient:
         rate: str = "+0%",
         volume: str = "+0%",
         pitch: str = "+0Hz",
-        boundary: str = "SentenceBoundary"
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
     ) -> bytes:
         """文本转语音"""
-        try:
-            from edge_tts import Communicate
-            
-            communicate = Communicate(
-                text=text,
-                voice=voice,
-                rate=rate,
-                volume=volume,
-                pitch=pitch,
-                boundary=boundary
-            )
-            
+        async def attempt() -> bytes:
             # 收集所有音频数据
             audio_chunks = []
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_chunks.append(chunk["data"])
+            async for data in self._attempt_audio(text, voice, rate, volume, pitch, boundary):
+                audio_chunks.append(data)
             
             # 合并所有音频数据
-            audio_data = b''.join(audio_chunks)
-            return audio_data
+            return b''.join(audio_chunks)
+        
+        try:
+            return await self._with_retry(attempt, retry_stats)
+        except Exception as e:
+            raise Exception(f"文本转语音失败: {str(e)}")
+
+    async def text_to_speech_file(
+        self,
+        file_path: str,
+        text: str,
+        voice: str = "en-US-EmmaMultilingualNeural",
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> int:
+        """文本转语音并将音频块直接写入文件，返回写入的字节数"""
+        # 先写入临时文件，完成后再重命名，失败时不留下不完整的文件
+        temp_path = f"{file_path}.part"
+        
+        async def attempt() -> int:
+            # 每次重试都重新打开（截断）临时文件
+            async with AsyncFileWriter(self.executor, temp_path, self.write_buffer_size) as writer:
+                async for data in self._attempt_audio(text, voice, rate, volume, pitch, boundary):
+                    await writer.write(data)
+            return writer.bytes_written
+        
+        try:
+            file_size = await self._with_retry(attempt, retry_stats)
+            await self.executor.run(os.replace, temp_path, file_path)
+            return file_size
             
         except Exception as e:
+            await self.executor.run(remove_file, temp_path)
             raise Exception(f"文本转语音失败: {str(e)}")
 
     async def generate_subtitles(
         self,
         text: str,
         voice: str = "en-US-EmmaMultilingualNeural",
-        boundary: str = "SentenceBoundary"
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
     ) -> str:
         """生成字幕"""
-        try:
-            from edge_tts import Communicate
-            
-            communicate = Communicate(
-                text=text,
-                voice=voice,
-                boundary=boundary
-            )
+        async def attempt() -> str:
+            communicate = self._communicate(text=text, voice=voice, boundary=boundary)
             
             subtitles = []
             segment_index = 1
             
-            async for chunk in communicate.stream():
+            async for chunk in self._stream_chunks(communicate):
                 if "Boundary" in chunk["type"]:
-                    metadata = chunk.get("metadata", {})
-                    text_offset = metadata.get("Offset", 0)
-                    text_duration = metadata.get("Duration", 0)
-                    
-                    if text_offset is not None and text_duration is not None:
-                        start_time = self._format_timestamp(text_offset / 10000000)  # 转换为秒
-                        end_time = self._format_timestamp((text_offset + text_duration) / 10000000)
-                        
-                        # 提取对应的文本片段
-                        text_start = metadata.get("text", {}).get("Offset", 0)
-                        text_length = metadata.get("text", {}).get("Length", 0)
-                        text_segment = text[text_start:text_start + text_length]
-                        
-                        subtitles.append(f"{segment_index}\n")
-                        subtitles.append(f"{start_time} --> {end_time}\n")
-                        subtitles.append(f"{text_segment}\n\n")
+                    cue = self._format_subtitle_cue(segment_index, chunk, text)
+                    if cue:
+                        subtitles.append(cue)
                         segment_index += 1
             
             return ''.join(subtitles)
-            
+        
+        try:
+            return await self._with_retry(attempt, retry_stats)
         except Exception as e:
             raise Exception(f"生成字幕失败: {str(e)}")
 
+    async def text_to_speech_with_subtitles(
+        self,
+        file_path: str,
+        text: str,
+        voice: str = "en-US-EmmaMultilingualNeural",
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """单次合成同时写入音频文件并生成字幕
+
+        音频块与边界事件来自同一个流，字幕时间轴与音频严格一致。
+        """
+        temp_path = f"{file_path}.part"
+        
+        async def attempt() -> Dict[str, Any]:
+            communicate = self._communicate(text, voice, rate, volume, pitch, boundary)
+            subtitles = []
+            segment_index = 1
+            
+            async with AsyncFileWriter(self.executor, temp_path, self.write_buffer_size) as writer:
+                async for chunk in self._stream_chunks(communicate):
+                    if chunk["type"] == "audio":
+                        await writer.write(chunk["data"])
+                    elif "Boundary" in chunk["type"]:
+                        cue = self._format_subtitle_cue(segment_index, chunk, text)
+                        if cue:
+                            subtitles.append(cue)
+                            segment_index += 1
+            
+            return {
+                "file_size": writer.bytes_written,
+                "subtitles": ''.join(subtitles),
+                "segment_count": segment_index - 1
+            }
+        
+        try:
+            result = await self._with_retry(attempt, retry_stats)
+            await self.executor.run(os.replace, temp_path, file_path)
+            return result
+            
+        except Exception as e:
+            await self.executor.run(remove_file, temp_path)
+            raise Exception(f"生成音频和字幕失败: {str(e)}")
+
+    async def text_to_speech_with_cues(
+        self,
+        text: str,
+        voice: str = "en-US-EmmaMultilingualNeural",
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        boundary: str = "SentenceBoundary",
+        retry_stats: Optional[Dict[str, int]] = None
+    ) -> Tuple[bytes, List[Tuple[int, int, str]]]:
+        """单次合成返回音频数据与字幕事件列表，供长文本分块合成后平移时间轴"""
+        async def attempt() -> Tuple[bytes, List[Tuple[int, int, str]]]:
+            communicate = self._communicate(text, voice, rate, volume, pitch, boundary)
+            audio_chunks = []
+            cues = []
+            
+            async for chunk in self._stream_chunks(communicate):
+                if chunk["type"] == "audio":
+                    audio_chunks.append(chunk["data"])
+                elif "Boundary" in chunk["type"]:
+                    cue = self._boundary_cue(chunk, text)
+                    if cue:
+                        cues.append(cue)
+            
+            return b''.join(audio_chunks), cues
+        
+        try:
+            return await self._with_retry(attempt, retry_stats)
+        except Exception as e:
+            raise Exception(f"生成音频和字幕失败: {str(e)}")
+
+    def _format_subtitle_cue(self, index: int, chunk: Dict[str, Any], text: str) -> Optional[str]:
+        """将边界事件格式化为一条SRT字幕"""
+        cue = self._boundary_cue(chunk, text)
+        if cue is None:
+            return None
+        return self._format_cue(index, cue)
+
+    def _boundary_cue(self, chunk: Dict[str, Any], text: str) -> Optional[Tuple[int, int, str]]:
+        """从边界事件中提取 (偏移, 时长, 文本)，时间单位为 100 纳秒"""
+        if "offset" in chunk:
+            # edge-tts 7.x 直接在事件中给出偏移、时长和文本
+            text_offset = chunk.get("offset")
+            text_duration = chunk.get("duration")
+            text_segment = chunk.get("text", "")
+        else:
+            metadata = chunk.get("metadata", {})
+            text_offset = metadata.get("Offset", 0)
+            text_duration = metadata.get("Duration", 0)
+            
+            # 提取对应的文本片段
+            text_start = metadata.get("text", {}).get("Offset", 0)
+            text_length = metadata.get("text", {}).get("Length", 0)
+            text_segment = text[text_start:text_start + text_length]
+        
+        if text_offset is None or text_duration is None:
+            return None
+        return text_offset, text_duration, text_segment
+
+    def _format_cue(self, index: int, cue: Tuple[int, int, str]) -> str:
+        text_offset, text_duration, text_segment = cue
+        start_time = self._format_timestamp(text_offset / 10000000)  # 转换为秒
+        end_time = self._format_timestamp((text_offset + text_duration) / 10000000)
+        return f"{index}\n{start_time} --> {end_time}\n{text_segment}\n\n"
+
+    def format_srt(self, cues: List[Tuple[int, int, str]]) -> str:
+        """将 (偏移, 时长, 文本) 列表格式化为SRT字幕"""
+        return ''.join(self._format_cue(index, cue) for index, cue in enumerate(cues, 1))
+
     def _format_timestamp(self, seconds: float) -> str:
         """格式化时间戳为SRT格式"""
         hours = int(seconds // 3600)
@@ -140,6 +609,23 @@ class EdgeTTSClient:
         """base64转换为音频数据"""
         return base64.b64decode(base64_data)
 
+    @staticmethod
+    def iter_base64_audio(base64_data: str, chunk_size: int = 4096) -> Iterator[bytes]:
+        """分块解码base64音频数据，每次解码约 chunk_size 字节，不在内存中生成完整的音频数据
+
+        忽略数据中的空白字符（如按行折断的base64），出现其他非法字符时抛出 binascii.Error。
+        """
+        step = max(1, chunk_size // 3) * 4
+        pending = ""
+        for start in range(0, len(base64_data), step):
+            piece = pending + "".join(base64_data[start:start + step].split())
+            usable = len(piece) - len(piece) % 4
+            pending = piece[usable:]
+            if usable:
+                yield base64.b64decode(piece[:usable], validate=True)
+        if pending:
+            raise binascii.Error("base64数据长度不完整")
+
     async def filter_voices(
         self, 
         locale: Optional[str] = None, 
@@ -147,57 +633,19 @@ class EdgeTTSClient:
         name_pattern: Optional[str] = None
     ) -> List[VoiceInfo]:
         """过滤语音列表"""
-        voices = await self.get_voices()
-        
-        filtered_voices = []
-        for voice in voices:
-            # 按语言区域过滤
-            if locale and voice.get('Locale', '').lower() != locale.lower():
-                continue
-                
-            # 按性别过滤
-            if gender and voice.get('Gender', '').lower() != gender.lower():
-                continue
-                
-            # 按名称模式过滤
-            if name_pattern and name_pattern.lower() not in voice.get('Name', '').lower():
-                continue
-            
-            filtered_voices.append(VoiceInfo(
-                name=voice.get('Name', ''),
-                short_name=voice.get('ShortName', ''),
-                gender=voice.get('Gender', ''),
-                locale=voice.get('Locale', ''),
-                supported_styles=voice.get('StyleList', []),
-                voice_type=voice.get('VoiceType', '')
-            ))
-        
-        return filtered_voices
+        catalog = await self.get_catalog()
+        return catalog.filter(locale=locale, gender=gender, name_pattern=name_pattern)
     
     async def get_voice_list_summary(self) -> Dict[str, Any]:
         """获取语音列表摘要信息，避免返回大量数据"""
         try:
-            voices = await self.get_voices()
-            
-            # 按语言区域分组统计
-            locale_stats = {}
-            gender_stats = {"Male": 0, "Female": 0}
-            
-            for voice in voices:
-                locale = voice.get('Locale', 'unknown')
-                gender = voice.get('Gender', 'unknown')
-                
-                if locale not in locale_stats:
-                    locale_stats[locale] = 0
-                locale_stats[locale] += 1
-                
-                if gender in gender_stats:
-                    gender_stats[gender] += 1
+            catalog = await self.get_catalog()
+            voices = catalog.voices
             
             return {
                 "total_count": len(voices),
-                "locale_statistics": locale_stats,
-                "gender_statistics": gender_stats,
+                "locale_statistics": dict(catalog.locale_stats),
+                "gender_statistics": dict(catalog.gender_stats),
                 "sample_voices": [
                     {
                         "name": voice.get('Name'),
@@ -215,17 +663,6 @@ class EdgeTTSClient:
 
     async def get_voice_info(self, voice_name: str) -> Optional[VoiceInfo]:
         """获取特定语音的详细信息"""
-        voices = await self.get_voices()
-        
-        for voice in voices:
-            if voice.get('Name') == voice_name or voice.get('ShortName') == voice_name:
-                return VoiceInfo(
-                    name=voice.get('Name', ''),
-                    short_name=voice.get('ShortName', ''),
-                    gender=voice.get('Gender', ''),
-                    locale=voice.get('Locale', ''),
-                    supported_styles=voice.get('StyleList', []),
-                    voice_type=voice.get('VoiceType', '')
-                )
-        
-        return None
\ No newline at end of file
+        with span("voice_lookup"):
+            catalog = await self.get_catalog()
+            return catalog.lookup(voice_name)
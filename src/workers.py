@@ -0,0 +1,90 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict
+
+
+logger = logging.getLogger(__name__)
+
+
+# 工作进程异常退出后重新拉起前的等待时间，避免启动即崩溃时反复 fork
+RESPAWN_DELAY = 1.0
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """绑定所有工作进程共用的监听套接字"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_prefork(serve: Callable[[socket.socket, int], None], host: str, port: int, workers: int):
+    """预先绑定监听套接字后 fork 出多个工作进程，由内核在进程间分发连接
+
+    serve(sock, index) 在工作进程中运行直到退出；主进程只负责监控，
+    工作进程异常退出时重新拉起，收到 SIGINT/SIGTERM 时通知所有工作进程退出并等待。
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("多进程模式需要支持 fork 的平台")
+
+    sock = bind_socket(host, port)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                serve(sock, index)
+            except KeyboardInterrupt:
+                pass
+            except BaseException as e:
+                logger.error(f"工作进程 {index} 运行失败: {str(e)}")
+                code = 1
+            finally:
+                logging.shutdown()
+            os._exit(code)
+        children[pid] = index
+        logger.info(f"工作进程 {index} 已启动 (pid={pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for index in range(workers):
+            spawn(index)
+
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = children.pop(pid, None)
+            if index is None or stopping:
+                continue
+            logger.warning(f"工作进程 {index} 意外退出 (pid={pid}, status={status})，正在重新启动")
+            time.sleep(RESPAWN_DELAY)
+            if not stopping:
+                spawn(index)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        sock.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+音频缓存功能测试脚本
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.cache import AudioCache
+
+
+def make_cache(**kwargs) -> AudioCache:
+    return AudioCache(cache_dir=tempfile.mkdtemp(), **kwargs)
+
+
+def test_key_depends_on_all_parameters():
+    """测试缓存键包含全部合成参数"""
+    base = ("你好", "zh-CN-XiaoxiaoNeural", "+0%", "+0%", "+0Hz", "SentenceBoundary")
+    key = AudioCache.make_key(*base)
+
+    assert key == AudioCache.make_key(*base)
+    for i, value in enumerate(["再见", "zh-CN-YunyangNeural", "+10%", "-5%", "+5Hz", "WordBoundary"]):
+        changed = list(base)
+        changed[i] = value
+        assert AudioCache.make_key(*changed) != key
+
+
+def test_hit_and_miss():
+    """测试命中与未命中计数"""
+    cache = make_cache()
+    assert cache.get("k") is None
+    cache.put("k", b"audio")
+    assert cache.get("k") == b"audio"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_size_eviction():
+    """测试超出容量时淘汰最近最少使用的条目"""
+    cache = make_cache(max_size=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration():
+    """测试过期条目不再命中"""
+    cache = make_cache(ttl=0.05)
+    cache.put("k", b"audio")
+    time.sleep(0.1)
+
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_index_survives_restart():
+    """测试重建索引后缓存仍然可用"""
+    cache = make_cache()
+    cache.put("k", b"audio")
+
+    reopened = AudioCache(cache_dir=cache.cache_dir)
+    assert reopened.get("k") == b"audio"
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_key_depends_on_all_parameters,
+        test_hit_and_miss,
+        test_size_eviction,
+        test_ttl_expiration,
+        test_index_survives_restart,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有音频缓存测试通过!")
+
+
+if __name__ == "__main__":
+    main()
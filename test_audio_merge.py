@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+MP3 音频帧拼接测试脚本
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.audio import scan_mp3_frames, concat_mp3_frames
+
+
+# MPEG-2 Layer III, 24kHz, 48kbps, 单声道（Edge TTS 默认输出），帧长 144 字节
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+# MPEG-1 Layer III, 44.1kHz, 128kbps, 立体声，帧长 417 字节
+OTHER_FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+
+
+def test_scan_skips_tags():
+    """测试扫描时跳过 ID3 标签与 Xing 信息帧"""
+    id3v2 = b'ID3\x03\x00\x00\x00\x00\x00\x05' + b'x' * 5
+    xing = FRAME[:4] + b'\x00' * 9 + b'Xing' + FRAME[17:]
+    id3v1 = b'TAG' + b'\x00' * 125
+
+    params, spans = scan_mp3_frames(id3v2 + xing + FRAME * 2 + id3v1)
+    assert params == (2, 24000, True)
+    assert spans == [(len(id3v2) + len(xing), len(FRAME) * 2)]
+
+
+def test_scan_rejects_invalid_data():
+    """测试无法识别的数据返回 None"""
+    assert scan_mp3_frames(b'junk' + FRAME) is None
+    assert scan_mp3_frames(FRAME + OTHER_FRAME) is None
+
+
+def test_concat_frames():
+    """测试参数一致的语音段直接拼接"""
+    output_path = os.path.join(tempfile.mkdtemp(), "merged.mp3")
+
+    assert concat_mp3_frames([FRAME * 2, FRAME * 3], output_path)
+    with open(output_path, 'rb') as f:
+        assert f.read() == FRAME * 5
+
+
+def test_concat_rejects_mismatched_segments():
+    """测试参数不一致时不拼接"""
+    output_path = os.path.join(tempfile.mkdtemp(), "merged.mp3")
+
+    assert not concat_mp3_frames([FRAME, OTHER_FRAME], output_path)
+    assert not os.path.exists(output_path)
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_scan_skips_tags,
+        test_scan_rejects_invalid_data,
+        test_concat_frames,
+        test_concat_rejects_mismatched_segments,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有音频拼接测试通过!")
+
+
+if __name__ == "__main__":
+    main()
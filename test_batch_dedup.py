@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+批量合成重复语音段去重测试脚本
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import edge_tts
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.jobs import Job
+from src.models import BatchTextToSpeechRequest, TextToSpeechRequest
+from src.tools import EdgeTTSTools
+
+VOICES = [
+    {"Name": "Microsoft Server Speech Text to Speech Voice (zh-CN, XiaoxiaoNeural)",
+     "ShortName": "zh-CN-XiaoxiaoNeural", "Gender": "Female", "Locale": "zh-CN", "VoiceType": "Neural"},
+    {"Name": "Microsoft Server Speech Text to Speech Voice (en-US, JennyNeural)",
+     "ShortName": "en-US-JennyNeural", "Gender": "Female", "Locale": "en-US", "VoiceType": "Neural"},
+]
+
+
+def frame_for(text: str, voice: str) -> bytes:
+    """每组参数对应可区分内容的 MP3 帧（24kHz 48kbps 单声道，帧长 144 字节）"""
+    marker = sum((text + voice).encode('utf-8')) % 256
+    return b'\xff\xf3\x64\xc4' + bytes([marker]) * 140
+
+
+class CountingCommunicate:
+    """记录上游请求参数的模拟合成会话"""
+
+    calls = []
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        CountingCommunicate.calls.append((self.text, self.voice))
+        await asyncio.sleep(0.01)
+        yield {"type": "audio", "data": frame_for(self.text, self.voice)}
+
+
+async def fake_list_voices(*args, **kwargs):
+    return [dict(voice) for voice in VOICES]
+
+
+def make_tools(audio_cache: bool = False) -> EdgeTTSTools:
+    work_dir = tempfile.mkdtemp()
+    return EdgeTTSTools(ServerConfig({
+        "cache": {
+            "audio_cache_enabled": audio_cache,
+            "audio_cache_dir": os.path.join(work_dir, "audio-cache"),
+            "voices_snapshot_file": os.path.join(work_dir, "voices.json")
+        },
+        "output": {"dir": os.path.join(work_dir, "output")},
+        "security": {"safe_file_paths": [work_dir]}
+    }))
+
+
+def run_with_fakes(operation):
+    CountingCommunicate.calls = []
+    originals = edge_tts.Communicate, edge_tts.list_voices
+    edge_tts.Communicate, edge_tts.list_voices = CountingCommunicate, fake_list_voices
+    try:
+        return asyncio.run(operation)
+    finally:
+        edge_tts.Communicate, edge_tts.list_voices = originals
+
+
+def run_batch(tools: EdgeTTSTools, segments, job=None, **kwargs):
+    request = BatchTextToSpeechRequest(segments=segments, **kwargs)
+    return run_with_fakes(tools.batch_text_to_speech(request, job))
+
+
+def test_repeated_segments_synthesized_once():
+    """测试重复的语音段只请求上游一次，拼接结果保持原始顺序"""
+    tools = make_tools()
+    segments = [
+        {"text": "请注意", "voice": "zh-CN-XiaoxiaoNeural"},
+        {"text": "Hello", "voice": "en-US-JennyNeural"},
+        {"text": "请注意", "voice": "zh-CN-XiaoxiaoNeural"},
+        {"text": "请注意", "voice": "en-US-JennyNeural"},
+        {"text": "请注意", "voice": "zh-CN-XiaoxiaoNeural"},
+    ]
+    job = Job("batch_text_to_speech", total=len(segments))
+    result = run_batch(tools, segments, job)
+
+    assert sorted(CountingCommunicate.calls) == sorted({(s["text"], s["voice"]) for s in segments})
+    assert len(CountingCommunicate.calls) == 3
+    assert result["segment_count"] == 5
+    assert result["processed_count"] == 5
+    assert result["deduplicated_count"] == 2
+    assert result["cached_count"] == 0
+
+    with open(result["file_path"], 'rb') as f:
+        assert f.read() == b"".join(frame_for(s["text"], s["voice"]) for s in segments)
+    assert job.progress() == {"total": 5, "completed": 5, "failed": 0, "percent": 100.0}
+
+
+def test_repeated_failures_and_cached_count():
+    """测试重复的失败语音段按位置报告错误，缓存命中数不计入去重的副本"""
+    tools = make_tools(audio_cache=True)
+    run_batch(tools, [{"text": "欢迎", "voice": "zh-CN-XiaoxiaoNeural"}])
+
+    segments = [
+        {"text": "欢迎", "voice": "zh-CN-XiaoxiaoNeural"},
+        {"text": "bad", "voice": "xx-XX-MissingNeural"},
+        {"text": "欢迎", "voice": "zh-CN-XiaoxiaoNeural"},
+        {"text": "bad", "voice": "xx-XX-MissingNeural"},
+    ]
+    job = Job("batch_text_to_speech", total=len(segments))
+    result = run_batch(tools, segments, job)
+
+    assert CountingCommunicate.calls == []
+    assert result["cached_count"] == 1
+    assert result["deduplicated_count"] == 2
+    assert result["failed_count"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 3]
+    assert result["errors"][1]["deduplicated"] is True
+    assert job.progress()["completed"] == 2 and job.progress()["failed"] == 2
+
+
+def test_batch_rejects_generated_filename():
+    """测试批量合成的 output_filename 使用合成结果的文件名时拒绝，不覆盖可复用的文件"""
+    tools = make_tools()
+    speech = TextToSpeechRequest(text="你好", voice="zh-CN-XiaoxiaoNeural")
+    first = run_with_fakes(tools.text_to_speech(speech))
+    with open(first["file_path"], 'rb') as f:
+        original = f.read()
+
+    segments = [{"text": "Hello", "voice": "en-US-JennyNeural"}]
+    for filename in (os.path.basename(first["file_path"]), "batch_tts_custom.mp3"):
+        result = run_batch(tools, segments, output_filename=filename)
+        assert result["error"]["code"] == 1003, result
+
+    second = run_with_fakes(tools.text_to_speech(speech))
+    assert second["reused"] and second["file_path"] == first["file_path"]
+    with open(second["file_path"], 'rb') as f:
+        assert f.read() == original
+
+    assert run_batch(tools, segments, output_filename="my_batch.mp3")["success"]
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_repeated_segments_synthesized_once,
+        test_repeated_failures_and_cached_count,
+        test_batch_rejects_generated_filename,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有批量去重测试通过!")
+
+
+if __name__ == "__main__":
+    main()
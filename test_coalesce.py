@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+请求合并测试脚本
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.coalesce import RequestCoalescer
+
+
+async def copy_file(source_path: str, target_path: str):
+    shutil.copyfile(source_path, target_path)
+
+
+def test_concurrent_requests_share_one_operation():
+    """测试并发的相同请求只执行一次，文件复制到各自路径"""
+    work_dir = tempfile.mkdtemp()
+    coalescer = RequestCoalescer(copy=copy_file)
+    calls = []
+
+    def request(name: str):
+        path = os.path.join(work_dir, name)
+
+        async def operation():
+            calls.append(name)
+            await asyncio.sleep(0.05)
+            with open(path, 'wb') as f:
+                f.write(b"audio")
+            return "done"
+
+        return coalescer.run("key", operation, target_path=path)
+
+    async def run():
+        return await asyncio.gather(request("a.mp3"), request("b.mp3"), request("c.mp3"))
+
+    results = asyncio.run(run())
+    assert calls == ["a.mp3"]
+    assert results == [("done", False), ("done", True), ("done", True)]
+    for name in ("a.mp3", "b.mp3", "c.mp3"):
+        with open(os.path.join(work_dir, name), 'rb') as f:
+            assert f.read() == b"audio"
+    assert coalescer.coalesced == 2
+    assert coalescer.inflight == 0
+
+
+def test_errors_propagate_to_waiters():
+    """测试执行失败时等待者收到相同错误，之后的请求重新执行"""
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        results = await asyncio.gather(
+            coalescer.run("key", failing), coalescer.run("key", failing), return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+
+        async def ok():
+            return b"audio"
+
+        assert await coalescer.run("key", ok) == (b"audio", False)
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_hands_over():
+    """测试执行者被取消时等待者自行执行"""
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"audio"
+
+    async def run():
+        leader = asyncio.ensure_future(coalescer.run("key", operation))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(coalescer.run("key", operation))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == (b"audio", False)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_concurrent_requests_share_one_operation,
+        test_errors_propagate_to_waiters,
+        test_cancelled_leader_hands_over,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有请求合并测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HTTP 下载与流式合成端点测试脚本
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+
+import edge_tts
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.server import EdgeTTSServer
+
+# MPEG-2 Layer III 24kHz 48kbps 单声道帧（与 Edge TTS 输出参数一致），帧长 144 字节
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+
+VOICES = [
+    {"Name": "Microsoft Server Speech Text to Speech Voice (en-US, JennyNeural)",
+     "ShortName": "en-US-JennyNeural", "Gender": "Female", "Locale": "en-US", "VoiceType": "Neural"},
+]
+
+
+class FrameCommunicate:
+    """每个字符输出一个音频帧的模拟合成会话，文本为 fail 时在输出音频前失败"""
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        if self.text == "fail":
+            raise ConnectionError("connection reset")
+        for _ in self.text:
+            await asyncio.sleep(0)
+            yield {"type": "audio", "data": FRAME}
+
+
+async def fake_list_voices(*args, **kwargs):
+    return [dict(voice) for voice in VOICES]
+
+
+def make_server() -> EdgeTTSServer:
+    work_dir = tempfile.mkdtemp()
+    return EdgeTTSServer(ServerConfig({
+        "server": {"transport": "streamable-http"},
+        "advanced": {"retry": {"max_attempts": 1}, "audio": {"download_chunk_size": 1024}},
+        "cache": {"voices_snapshot_file": os.path.join(work_dir, "voices.json")},
+        "output": {"dir": os.path.join(work_dir, "output")},
+        "security": {"safe_file_paths": [work_dir]}
+    }))
+
+
+def with_fakes(test):
+    """测试期间以模拟会话替换上游"""
+    def run():
+        originals = edge_tts.Communicate, edge_tts.list_voices
+        edge_tts.Communicate, edge_tts.list_voices = FrameCommunicate, fake_list_voices
+        try:
+            test()
+        finally:
+            edge_tts.Communicate, edge_tts.list_voices = originals
+    run.__doc__ = test.__doc__
+    return run
+
+
+def test_download_file():
+    """测试下载输出目录中的文件，支持 Range 请求"""
+    server = make_server()
+    path = server.tools.output.resolve("tts_download.mp3", generated=True)
+    server.tools.output.write(path, FRAME * 4)
+    client = TestClient(server.server.streamable_http_app(), base_url="http://localhost:8000")
+
+    response = client.get("/audio/tts_download.mp3")
+    assert response.status_code == 200
+    assert response.content == FRAME * 4
+    assert response.headers["content-type"] == "audio/mpeg"
+
+    response = client.get("/audio/tts_download.mp3", headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206 and response.content == FRAME[:4]
+
+
+def test_download_rejects_unsafe_names():
+    """测试拒绝路径穿越、点文件及不允许的文件类型，文件不存在时返回 404"""
+    server = make_server()
+    output_root = server.tools.output.root
+    with open(os.path.join(os.path.dirname(output_root), "secret.mp3"), 'wb') as f:
+        f.write(b"secret")
+    hidden = server.tools.output.resolve(".hidden.mp3")
+    server.tools.output.write(hidden, b"hidden")
+    client = TestClient(server.server.streamable_http_app(), base_url="http://localhost:8000")
+
+    for url in ("/audio/.hidden.mp3", "/audio/..%5Csecret.mp3", "/audio/voices.json"):
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert response.json()["error"]["code"] == 1003
+
+    for url in ("/audio/..%2Fsecret.mp3", "/audio/%2E%2E/secret.mp3", "/audio/../secret.mp3"):
+        response = client.get(url)
+        assert response.status_code in (400, 404), url
+        assert b"secret" not in response.content
+
+    response = client.get("/audio/tts_missing.mp3")
+    assert response.status_code == 404
+    assert response.json()["error"]["code"] == 1005
+
+
+@with_fakes
+def test_stream_releases_admission():
+    """测试流式合成返回完整音频，响应结束后释放准入槽位"""
+    server = make_server()
+    client = TestClient(server.server.streamable_http_app(), base_url="http://localhost:8000")
+
+    response = client.get("/audio/stream", params={"text": "hello", "voice": "en-US-JennyNeural"})
+    assert response.status_code == 200
+    assert response.content == FRAME * 5
+    assert server.admission.in_flight == 0
+
+    with client.stream("GET", "/audio/stream", params={"text": "x" * 50, "voice": "en-US-JennyNeural"}) as response:
+        assert response.status_code == 200
+        next(response.iter_bytes())
+    assert server.admission.in_flight == 0
+
+
+@with_fakes
+def test_stream_errors_before_first_chunk():
+    """测试上游在输出音频前失败时返回 502，语音不存在时返回 404，均释放准入槽位"""
+    server = make_server()
+    client = TestClient(server.server.streamable_http_app(), base_url="http://localhost:8000")
+
+    response = client.get("/audio/stream", params={"text": "fail", "voice": "en-US-JennyNeural"})
+    assert response.status_code == 502
+    assert response.json()["error"]["code"] == 1005
+    assert server.admission.in_flight == 0
+
+    response = client.get("/audio/stream", params={"text": "hello", "voice": "xx-XX-MissingNeural"})
+    assert response.status_code == 404
+    assert server.admission.in_flight == 0
+
+    response = client.get("/audio/stream", params={"text": "hello", "voice": "en-US-JennyNeural", "format": "wav"})
+    assert response.status_code == 400
+    assert server.admission.in_flight == 0
+
+
+@with_fakes
+def test_unsent_stream_releases_admission():
+    """测试流式响应未被发送即被丢弃时也释放准入槽位"""
+    server = make_server()
+    scope = {
+        "type": "http", "method": "GET", "path": "/audio/stream", "headers": [],
+        "query_string": b"text=hello&voice=en-US-JennyNeural", "client": ("127.0.0.1", 1234)
+    }
+
+    async def run():
+        response = await server.handle_audio_stream(Request(scope))
+        assert response.status_code == 200
+        assert server.admission.in_flight == 1
+        del response
+        gc.collect()
+
+    asyncio.run(run())
+    assert server.admission.in_flight == 0
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_download_file,
+        test_download_rejects_unsafe_names,
+        test_stream_releases_admission,
+        test_stream_errors_before_first_chunk,
+        test_unsent_stream_releases_admission,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有 HTTP 端点测试通过!")
+
+
+if __name__ == "__main__":
+    main()
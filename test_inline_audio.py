@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+内联音频返回测试脚本
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+
+import edge_tts
+from mcp.shared.memory import create_connected_server_and_client_session
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.server import EdgeTTSServer
+
+# MPEG-2 Layer III 24kHz 48kbps 单声道帧（与 Edge TTS 输出参数一致），帧长 144 字节
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+
+VOICES = [
+    {"Name": "Microsoft Server Speech Text to Speech Voice (zh-CN, XiaoxiaoNeural)",
+     "ShortName": "zh-CN-XiaoxiaoNeural", "Gender": "Female", "Locale": "zh-CN", "VoiceType": "Neural"},
+]
+
+
+class FrameCommunicate:
+    """每个字符输出一个音频帧的模拟合成会话"""
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        for _ in self.text:
+            yield {"type": "audio", "data": FRAME}
+
+
+async def fake_list_voices(*args, **kwargs):
+    return [dict(voice) for voice in VOICES]
+
+
+def call_text_to_speech(text: str, inline_audio_max_kb: float = 1):
+    """通过 FastMCP 内存客户端会话调用 text_to_speech（response_mode=inline）"""
+    work_dir = tempfile.mkdtemp()
+    server = EdgeTTSServer(ServerConfig({
+        "limits": {"inline_audio_max_kb": inline_audio_max_kb},
+        "cache": {"voices_snapshot_file": os.path.join(work_dir, "voices.json")},
+        "output": {"dir": os.path.join(work_dir, "output")},
+        "security": {"safe_file_paths": [work_dir]}
+    }))
+
+    async def run():
+        async with create_connected_server_and_client_session(server.server) as session:
+            return await session.call_tool(
+                "text_to_speech",
+                {"arguments": {"text": text, "voice": "zh-CN-XiaoxiaoNeural", "response_mode": "inline"}}
+            )
+
+    originals = edge_tts.Communicate, edge_tts.list_voices
+    edge_tts.Communicate, edge_tts.list_voices = FrameCommunicate, fake_list_voices
+    try:
+        return asyncio.run(run())
+    finally:
+        edge_tts.Communicate, edge_tts.list_voices = originals
+
+
+def test_inline_audio_content():
+    """测试音频不超过内联上限时以音频内容返回，元数据同时作为文本与结构化结果"""
+    result = call_text_to_speech("你好")
+
+    assert not result.isError
+    text, audio = result.content
+    assert text.type == "text" and audio.type == "audio"
+    assert audio.mimeType == "audio/mpeg"
+    assert base64.b64decode(audio.data) == FRAME * 2
+
+    metadata = json.loads(text.text)
+    assert metadata["_type"] == "inline_audio" and metadata["audio_size"] == len(FRAME) * 2
+    assert "audio_data" not in metadata
+    assert result.structuredContent == {"result": metadata}
+
+
+def test_inline_falls_back_to_file():
+    """测试音频超过 limits.inline_audio_max_kb 时写入文件并返回文件路径"""
+    result = call_text_to_speech("这段文本合成的音频超过内联上限")
+
+    assert not result.isError
+    assert [content.type for content in result.content] == ["text"]
+    metadata = result.structuredContent["result"]
+    assert metadata["_type"] == "file_reference"
+    assert metadata["file_size"] == len(FRAME) * 15
+    with open(metadata["file_path"], 'rb') as f:
+        assert f.read() == FRAME * 15
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_inline_audio_content,
+        test_inline_falls_back_to_file,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有内联音频测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+后台任务存储测试脚本
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.executor import BlockingExecutor
+from src.jobs import Job, JobManager, JobStore, PENDING, RUNNING, SUCCEEDED
+from src.limits import AdmissionRejected, QUEUE_FULL_ERROR
+
+
+def test_segment_progress():
+    """测试语音段进度统计"""
+    job = Job("batch_text_to_speech", total=4)
+    job.mark_segment(0)
+    job.mark_segment(2, ok=False)
+    job.mark_segment(10)  # 越界的序号被忽略
+
+    assert job.progress() == {"total": 4, "completed": 1, "failed": 1, "percent": 50.0}
+    assert job.to_dict(include_segments=True)["segments"] == ["done", "pending", "failed", "pending"]
+
+
+def test_persist_and_reload():
+    """测试已结束任务持久化后重新加载"""
+    persist_dir = tempfile.mkdtemp()
+    store = JobStore(retention=60, persist_dir=persist_dir)
+
+    job = Job("long_text_to_speech", total=2)
+    job.mark_segment(0)
+    job.mark_segment(1)
+    store.add(job)
+    store.save(job)
+    assert os.listdir(persist_dir) == []  # 未结束的任务不持久化
+
+    job.status = SUCCEEDED
+    job.finished_at = time.time()
+    job.result = {"file_path": "/tmp/out.mp3"}
+    store.save(job)
+
+    reloaded = JobStore(retention=60, persist_dir=persist_dir).get(job.id)
+    assert reloaded.status == SUCCEEDED
+    assert reloaded.result == {"file_path": "/tmp/out.mp3"}
+    assert reloaded.progress()["completed"] == 2
+
+
+def test_expired_jobs_removed():
+    """测试超过保留期的任务连同持久化文件一起删除"""
+    persist_dir = tempfile.mkdtemp()
+    store = JobStore(retention=10, persist_dir=persist_dir)
+
+    job = Job("batch_text_to_speech")
+    job.status = SUCCEEDED
+    job.finished_at = time.time() - 60
+    store.add(job)
+    store.save(job)
+
+    assert store.purge_expired() == 1
+    assert store.get(job.id) is None
+    assert os.listdir(persist_dir) == []
+
+
+def test_manager_file_io_off_event_loop():
+    """测试提交、查询与列出任务时任务存储的文件读写都在线程池中执行"""
+    persist_dir = tempfile.mkdtemp()
+    store = JobStore(retention=10, persist_dir=persist_dir, shared=True)
+    manager = JobManager(store, workers=1, max_pending=1, executor=BlockingExecutor(2))
+
+    on_loop = []
+    for name in ("get", "list", "load", "save", "purge_expired", "_remove"):
+        def wrapper(*args, _func=getattr(store, name), _name=name):
+            if threading.current_thread() is threading.main_thread():
+                on_loop.append(_name)
+            return _func(*args)
+        setattr(store, name, wrapper)
+
+    expired = Job("batch_text_to_speech")
+    expired.status = SUCCEEDED
+    expired.finished_at = time.time() - 60
+    store.add(expired)
+    JobStore.save(store, expired)
+
+    async def run_job(job):
+        await asyncio.sleep(0.05)
+        return {"success": True}
+
+    async def run():
+        job = await manager.submit("batch_text_to_speech", run_job)
+        assert os.path.exists(os.path.join(persist_dir, f"{job.id}.json"))
+        assert not os.path.exists(os.path.join(persist_dir, f"{expired.id}.json"))
+
+        # 一个任务执行中、一个排队，队列已满时拒绝
+        await asyncio.sleep(0.01)
+        await manager.submit("batch_text_to_speech", run_job)
+        try:
+            await manager.submit("batch_text_to_speech", run_job)
+        except AdmissionRejected as e:
+            assert e.code == QUEUE_FULL_ERROR
+        else:
+            raise AssertionError("队列已满时应拒绝")
+
+        assert (await manager.get(job.id)).id == job.id
+        assert await manager.get("missing") is None
+        assert [item.status for item in await manager.list()] == [RUNNING, PENDING]
+        await manager._queue.join()
+        assert (await manager.get(job.id)).status == SUCCEEDED
+        manager.shutdown()
+
+    asyncio.run(run())
+    assert on_loop == []
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_segment_progress,
+        test_persist_and_reload,
+        test_expired_jobs_removed,
+        test_manager_file_io_off_event_loop,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有后台任务存储测试通过!")
+
+
+if __name__ == "__main__":
+    main()
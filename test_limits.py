@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+准入控制与上游并发限制测试脚本
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import edge_tts
+from starlette.testclient import TestClient
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.limits import AdmissionController, AdmissionRejected, TokenBucket, QUEUE_FULL_ERROR, RATE_LIMITED_ERROR
+from src.server import EdgeTTSServer
+from src.utils import EdgeTTSClient
+
+
+def test_token_bucket():
+    """测试令牌桶用尽后拒绝，并按速率补充令牌"""
+    bucket = TokenBucket(rate=100, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert 0 < bucket.retry_after() <= 0.01
+
+    time.sleep(0.02)
+    assert bucket.try_acquire()
+    assert not bucket.is_idle()
+
+
+def test_rate_limited_per_client():
+    """测试超过每分钟请求数时拒绝（1007），不同客户端分别计数"""
+    controller = AdmissionController(max_concurrent=10, max_requests_per_minute=2)
+
+    async def run():
+        for _ in range(2):
+            async with controller.admit("a"):
+                pass
+        try:
+            await controller.acquire("a")
+        except AdmissionRejected as e:
+            assert e.code == RATE_LIMITED_ERROR
+            assert e.data["retry_after"] > 0
+        else:
+            raise AssertionError("超过频率限制时应拒绝")
+
+        async with controller.admit("b"):
+            pass
+
+    asyncio.run(run())
+    assert controller.stats()["rejected_rate_limited"] == 1
+    assert controller.stats()["admitted"] == 3
+
+
+def test_queue_full_rejected():
+    """测试并发已满且等待队列已满时立即拒绝（1006），排队的请求在槽位释放后执行"""
+    controller = AdmissionController(max_concurrent=1, max_requests_per_minute=0, max_queue_size=1)
+
+    async def run():
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert controller.queued == 1
+
+        try:
+            await controller.acquire()
+        except AdmissionRejected as e:
+            assert e.code == QUEUE_FULL_ERROR
+        else:
+            raise AssertionError("等待队列已满时应拒绝")
+
+        controller.release()
+        await waiter
+        assert controller.in_flight == 1
+        controller.release()
+
+    asyncio.run(run())
+    assert controller.stats()["rejected_queue_full"] == 1
+
+
+def test_queue_timeout_rejected():
+    """测试排队超时时拒绝（1006）"""
+    controller = AdmissionController(max_concurrent=1, max_requests_per_minute=0, queue_timeout=0.01)
+
+    async def run():
+        async with controller.admit():
+            try:
+                await controller.acquire()
+            except AdmissionRejected as e:
+                assert e.code == QUEUE_FULL_ERROR
+            else:
+                raise AssertionError("排队超时时应拒绝")
+
+    asyncio.run(run())
+    assert controller.stats()["rejected_timeout"] == 1
+    assert controller.queued == 0
+
+
+class SlowCommunicate:
+    """记录同时进行的上游会话数的模拟合成会话"""
+
+    active = 0
+    peak = 0
+
+    async def stream(self):
+        SlowCommunicate.active += 1
+        SlowCommunicate.peak = max(SlowCommunicate.peak, SlowCommunicate.active)
+        try:
+            await asyncio.sleep(0.01)
+            yield {"type": "audio", "data": b"audio"}
+        finally:
+            SlowCommunicate.active -= 1
+
+
+def test_upstream_sessions_limited():
+    """测试进程内同时打开的上游会话数不超过上限"""
+    client = EdgeTTSClient(max_upstream_sessions=2)
+
+    async def consume():
+        return [chunk async for chunk in client._stream_chunks(SlowCommunicate())]
+
+    async def run():
+        return await asyncio.gather(*[consume() for _ in range(6)])
+
+    results = asyncio.run(run())
+    assert all(chunks[0]["data"] == b"audio" for chunks in results)
+    assert SlowCommunicate.peak == 2
+    assert client.upstream_active == 0
+
+
+async def fake_list_voices(*args, **kwargs):
+    return [{"Name": "Microsoft Server Speech Text to Speech Voice (en-US, JennyNeural)",
+             "ShortName": "en-US-JennyNeural", "Gender": "Female", "Locale": "en-US", "VoiceType": "Neural"}]
+
+
+def call_tool(client: TestClient, request_id: int, name: str, arguments: dict) -> dict:
+    """通过 streamable HTTP 调用工具，返回结构化结果"""
+    response = client.post(
+        "/mcp",
+        json={"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+              "params": {"name": name, "arguments": {"arguments": arguments}}},
+        headers={"Accept": "application/json, text/event-stream"}
+    )
+    assert response.status_code == 200, response.text
+    data = next(line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: "))
+    return json.loads(data)["result"]["structuredContent"]["result"]
+
+
+def test_rate_limited_in_stateless_http():
+    """测试无状态 HTTP 模式（多进程模式使用）下按客户端地址限流，每个请求的新会话不会绕过限流"""
+    work_dir = tempfile.mkdtemp()
+    server = EdgeTTSServer(ServerConfig({
+        "server": {"transport": "streamable-http"},
+        "limits": {"max_requests_per_minute": 2},
+        "cache": {"voices_snapshot_file": os.path.join(work_dir, "voices.json")},
+        "output": {"dir": os.path.join(work_dir, "output")},
+        "security": {"safe_file_paths": [work_dir]}
+    }))
+    server.server.settings.stateless_http = True
+
+    original = edge_tts.list_voices
+    edge_tts.list_voices = fake_list_voices
+    try:
+        with TestClient(server.server.streamable_http_app(), base_url="http://localhost:8000") as client:
+            results = [call_tool(client, i, "list_voices", {}) for i in range(3)]
+    finally:
+        edge_tts.list_voices = original
+
+    assert all("error" not in result for result in results[:2])
+    assert results[2]["error"]["code"] == RATE_LIMITED_ERROR
+    assert server.admission.stats()["rejected_rate_limited"] == 1
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_token_bucket,
+        test_rate_limited_per_client,
+        test_queue_full_rejected,
+        test_queue_timeout_rejected,
+        test_upstream_sessions_limited,
+        test_rate_limited_in_stateless_http,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有准入控制测试通过!")
+
+
+if __name__ == "__main__":
+    main()
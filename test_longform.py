@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+长文本分块测试脚本
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.longform import split_sentences, split_text, shift_cues
+
+
+def test_split_sentences_cjk_and_latin():
+    """测试中英文句末标点断句"""
+    text = '你好。今天天气很好！他说：“走吧。”Really? Yes. 3.14 is pi'
+
+    assert split_sentences(text) == [
+        '你好。', '今天天气很好！', '他说：“走吧。”', 'Really?', ' Yes.', ' 3.14 is pi'
+    ]
+
+
+def test_split_text_respects_limit():
+    """测试文本块不超过字符上限且不丢失内容"""
+    text = ''.join(f'第{i}句话。' for i in range(200))
+    chunks = split_text(text, 100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert ''.join(chunks) == text
+    assert all(chunk.endswith('。') for chunk in chunks)
+
+
+def test_split_long_sentence_at_clauses():
+    """测试超长句子在分句标点处切分"""
+    chunks = split_text('a' * 80 + '，' + 'b' * 80 + '。', 100)
+
+    assert chunks == ['a' * 80 + '，', 'b' * 80 + '。']
+
+
+def test_shift_cues_by_chunk_duration():
+    """测试字幕按前面文本块的音频时长平移"""
+    cues = shift_cues(
+        [[(0, 100, 'a')], [(0, 100, 'b'), (200, 100, 'c')], [(0, 50, 'd')]],
+        [1.0, None, 2.0]
+    )
+
+    assert cues == [
+        (0, 100, 'a'),
+        (10000000, 100, 'b'),
+        (10000200, 100, 'c'),
+        (10000300, 50, 'd'),
+    ]
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_split_sentences_cjk_and_latin,
+        test_split_text_respects_limit,
+        test_split_long_sentence_at_clauses,
+        test_shift_cues_by_chunk_duration,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有长文本分块测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+指标输出测试脚本
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.metrics import Counter, Histogram, Metrics
+
+
+def test_counter_render():
+    """测试计数器按标签输出并转义标签值"""
+    counter = Counter("requests_total", "请求次数", ("tool", "status"))
+    counter.inc(tool="text_to_speech", status="ok")
+    counter.inc(2, tool="text_to_speech", status="ok")
+    counter.inc(tool='a"b', status="error")
+
+    lines = counter.render()
+    assert lines[:2] == ["# HELP requests_total 请求次数", "# TYPE requests_total counter"]
+    assert 'requests_total{tool="text_to_speech",status="ok"} 3' in lines
+    assert 'requests_total{tool="a\\"b",status="error"} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    """测试直方图分桶累计计数"""
+    histogram = Histogram("latency_seconds", "延迟", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum 5.55' in lines
+    assert 'latency_seconds_count 3' in lines
+
+
+def test_voice_cache_hit_ratio():
+    """测试语音列表缓存命中率"""
+    metrics = Metrics()
+    metrics.voice_cache_requests.inc(result="miss")
+    metrics.voice_cache_requests.inc(result="hit")
+    metrics.voice_cache_requests.inc(result="hit")
+    metrics.voice_cache_requests.inc(result="stale")
+
+    assert metrics.voice_cache_hit_ratio() == 0.75
+    assert "edge_tts_voice_cache_hit_ratio 0.75" in metrics.render()
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_counter_render,
+        test_histogram_buckets_are_cumulative,
+        test_voice_cache_hit_ratio,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有指标输出测试通过!")
+
+
+if __name__ == "__main__":
+    main()
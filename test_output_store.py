@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+输出目录测试脚本
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.storage import OutputStore, UnsafePathError, TEMP_PREFIX, output_name
+
+
+def list_files(root: str):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def test_sharded_paths():
+    """测试只给出文件名时按哈希分片存放并可按文件名查找"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, safe_paths=[root])
+
+    path = store.resolve("hello.mp3")
+    assert path == store.locate("hello.mp3")
+    assert os.path.dirname(os.path.dirname(os.path.dirname(path))) == os.path.realpath(root)
+    assert store.contains(path)
+
+    assert store.find("hello.mp3") is None
+    store.write(path, b"audio")
+    assert store.find("hello.mp3") == path
+    assert store.find("../hello.mp3") is None
+
+
+def test_unsafe_paths_rejected():
+    """测试不在 safe_file_paths 中的路径及使用合成结果前缀的文件名被拒绝"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=os.path.join(root, "output"), safe_paths=[root])
+
+    inside = store.resolve(os.path.join(root, "custom", "a.mp3"))
+    assert inside == os.path.join(os.path.realpath(root), "custom", "a.mp3")
+    assert not store.contains(inside)
+
+    reserved = ("tts_0123.mp3", "TTS_SUB_a.mp3", os.path.join(root, "batch_tts_a.mp3"), "long_tts_a.mp3")
+    for filename in ("/etc/a.mp3", os.path.join(root, "..", "a.mp3"), "..", TEMP_PREFIX + "a.mp3") + reserved:
+        try:
+            store.resolve(filename)
+        except UnsafePathError:
+            continue
+        raise AssertionError(f"未拒绝: {filename}")
+    assert store.resolve("tts_0123.mp3", generated=True) == store.locate("tts_0123.mp3")
+
+    try:
+        OutputStore(root=tempfile.mkdtemp(), safe_paths=[root])
+    except UnsafePathError:
+        pass
+    else:
+        raise AssertionError("输出目录不在允许的目录中时应拒绝")
+
+
+def test_atomic_write():
+    """测试写入失败时不留下临时文件或不完整的目标文件"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root)
+    path = store.resolve("speech.mp3")
+
+    async def run():
+        async with store.atomic(path) as temp_path:
+            assert os.path.basename(temp_path).startswith(TEMP_PREFIX)
+            with open(temp_path, 'wb') as f:
+                f.write(b"complete")
+        try:
+            async with store.atomic(path) as temp_path:
+                with open(temp_path, 'wb') as f:
+                    f.write(b"partial")
+                raise RuntimeError("synthesis failed")
+        except RuntimeError:
+            pass
+
+    asyncio.run(run())
+    with open(path, 'rb') as f:
+        assert f.read() == b"complete"
+    assert list_files(root) == [os.path.relpath(path, root)]
+
+
+def test_quota_evicts_oldest():
+    """测试超过总大小上限时淘汰最旧的文件"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, max_bytes=250, retention=0)
+
+    paths = []
+    for i in range(3):
+        path = store.resolve(f"tts_clip_{i}.mp3", generated=True)
+        store.write(path, b"x" * 100)
+        os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+        paths.append(path)
+
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
+    stats = store.stats()
+    assert stats["total_bytes"] == 200
+    assert stats["evicted"] == 1
+
+
+def test_quota_evicts_to_low_water_mark():
+    """测试达到配额后淘汰到低水位，之后的写入不再重复扫描目录"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, max_bytes=1000, retention=0)
+    scans = []
+    scan = store._scan
+    store._scan = lambda: scans.append(1) or scan()
+
+    for i in range(30):
+        store.write(store.resolve(f"tts_clip_{i}.mp3", generated=True), b"x" * 100)
+        assert store.total_bytes <= 1000
+
+    assert len(scans) == 1
+    assert store.stats()["evicted"] == 20
+    assert store.total_bytes == sum(os.path.getsize(os.path.join(root, path)) for path in list_files(root))
+    assert store.find("tts_clip_20.mp3") and store.find("tts_clip_19.mp3") is None
+
+
+def test_sweep_only_touches_generated_files():
+    """测试清理只删除分片目录中合成工具生成的文件，保留调用方指定名称的文件、其他文件与写入中的临时文件"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, retention=60)
+    generated = store.resolve("tts_old.mp3", generated=True)
+    store.write(generated, b"old")
+
+    shard_dir = os.path.dirname(generated)
+    others = [
+        os.path.join(root, "unrelated.txt"),
+        os.path.join(root, "tts_old.mp3"),
+        os.path.join(root, "notes", "tts_a.mp3"),
+        os.path.join(shard_dir, "tts_misplaced.mp3"),
+        os.path.join(shard_dir, TEMP_PREFIX + "abc-tts_old.mp3"),
+        os.path.join(shard_dir, "tts_old.mp3.part"),
+        store.resolve("saved.mp3"),
+    ]
+    for path in others:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b"keep")
+    for path in others + [generated]:
+        os.utime(path, (time.time() - 120, time.time() - 120))
+
+    assert store.sweep() == {"expired": 1, "evicted": 0}
+    assert not os.path.exists(generated)
+    assert all(os.path.exists(path) for path in others)
+
+
+def test_retention_sweep():
+    """测试清理时删除超过保留期的文件"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, retention=60)
+
+    old_path = store.resolve("tts_old.mp3", generated=True)
+    new_path = store.resolve("tts_new.mp3", generated=True)
+    store.write(old_path, b"old")
+    store.write(new_path, b"new")
+    os.utime(old_path, (time.time() - 120, time.time() - 120))
+
+    assert store.sweep() == {"expired": 1, "evicted": 0}
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+    assert store.stats()["files"] == 1
+
+
+def test_output_names():
+    """测试输出文件名由全部参数决定，仅在要求时附加随机后缀"""
+    params = {"text": "你好", "voice": "zh-CN-XiaoxiaoNeural", "rate": "+0%"}
+    name = output_name("tts", params, "mp3")
+    assert name == output_name("tts", dict(reversed(list(params.items()))), "mp3")
+    assert name != output_name("tts", dict(params, voice="zh-CN-YunxiNeural"), "mp3")
+    assert name.startswith("tts_") and name.endswith(".mp3")
+
+    first = output_name("tts", params, "mp3", unique=True)
+    second = output_name("tts", params, "mp3", unique=True)
+    assert first != second and first.startswith(name[:-len(".mp3")])
+
+
+def test_reuse_existing_file():
+    """测试复用已有文件时返回大小并刷新修改时间"""
+    root = tempfile.mkdtemp()
+    store = OutputStore(root=root, retention=60)
+    path = store.resolve("tts_reuse.mp3", generated=True)
+    assert store.reuse(path) is None
+
+    store.write(path, b"audio")
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert store.reuse(path) == 5
+    assert store.sweep()["expired"] == 0
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_sharded_paths,
+        test_unsafe_paths_rejected,
+        test_atomic_write,
+        test_quota_evicts_oldest,
+        test_quota_evicts_to_low_water_mark,
+        test_sweep_only_touches_generated_files,
+        test_retention_sweep,
+        test_output_names,
+        test_reuse_existing_file,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有输出目录测试通过!")
+
+
+if __name__ == "__main__":
+    main()
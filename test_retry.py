@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+上游重试与超时测试脚本
+"""
+
+import asyncio
+import os
+import sys
+
+import edge_tts
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.retry import RetryPolicy, SynthesisTimeout
+from src.utils import EdgeTTSClient
+
+
+class ScriptedCommunicate:
+    """按预设脚本依次模拟每次上游请求的行为"""
+
+    script = []
+    calls = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def stream(self):
+        behavior = ScriptedCommunicate.script[ScriptedCommunicate.calls]
+        ScriptedCommunicate.calls += 1
+        if behavior == "fail":
+            raise ConnectionError("connection reset")
+        if behavior == "fatal":
+            raise ValueError("invalid voice")
+        if behavior == "late":
+            await asyncio.sleep(1)
+        if behavior == "slow":
+            for _ in range(20):
+                await asyncio.sleep(0.03)
+                yield {"type": "audio", "data": b"a"}
+            return
+        yield {"type": "audio", "data": b"audio"}
+        if behavior == "partial":
+            raise ConnectionError("connection reset")
+
+
+def make_client(max_attempts: int = 3) -> EdgeTTSClient:
+    policy = RetryPolicy(
+        max_attempts=max_attempts, backoff_factor=0, first_chunk_timeout=0.05, total_timeout=0.2
+    )
+    return EdgeTTSClient(retry_policy=policy)
+
+
+def run_script(script, operation):
+    """使用预设脚本执行操作，返回 (结果或异常, 上游请求次数)"""
+    ScriptedCommunicate.script = script
+    ScriptedCommunicate.calls = 0
+    original = edge_tts.Communicate
+    edge_tts.Communicate = ScriptedCommunicate
+    try:
+        try:
+            result = asyncio.run(operation())
+        except Exception as e:
+            result = e
+    finally:
+        edge_tts.Communicate = original
+    return result, ScriptedCommunicate.calls
+
+
+def test_retryable_errors_retried_up_to_max_attempts():
+    """测试可重试的错误最多尝试 max_attempts 次并统计重试次数"""
+    client = make_client(max_attempts=3)
+    retry_stats = {"retries": 0}
+    result, calls = run_script(
+        ["fail", "fail", "fail", "ok"], lambda: client.text_to_speech("hi", "voice", retry_stats=retry_stats)
+    )
+    assert isinstance(result, Exception) and "connection reset" in str(result)
+    assert calls == 3
+    assert retry_stats["retries"] == 2
+    assert client.retry_count == 2
+
+    retry_stats = {"retries": 0}
+    result, calls = run_script(["fail", "ok"], lambda: client.text_to_speech("hi", "voice", retry_stats=retry_stats))
+    assert result == b"audio"
+    assert calls == 2 and retry_stats["retries"] == 1
+
+
+def test_non_retryable_error_raised_immediately():
+    """测试不可重试的错误立即抛出"""
+    client = make_client()
+    retry_stats = {"retries": 0}
+    result, calls = run_script(["fatal", "ok"], lambda: client.text_to_speech("hi", "voice", retry_stats=retry_stats))
+    assert isinstance(result, Exception) and "invalid voice" in str(result)
+    assert calls == 1
+    assert retry_stats["retries"] == 0
+
+
+def test_first_chunk_timeout():
+    """测试首个数据块超时抛出 SynthesisTimeout，并作为可重试错误重试"""
+    client = make_client()
+
+    async def read():
+        return [chunk async for chunk in client._stream_chunks(edge_tts.Communicate("hi", "voice"))]
+
+    result, calls = run_script(["late"], read)
+    assert isinstance(result, SynthesisTimeout) and "首个数据块" in str(result)
+
+    retry_stats = {"retries": 0}
+    result, calls = run_script(["late", "ok"], lambda: client.text_to_speech("hi", "voice", retry_stats=retry_stats))
+    assert result == b"audio"
+    assert calls == 2 and retry_stats["retries"] == 1
+
+
+def test_total_timeout():
+    """测试合成总耗时超过上限时抛出 SynthesisTimeout"""
+    client = make_client()
+
+    async def read():
+        return [chunk async for chunk in client._stream_chunks(edge_tts.Communicate("hi", "voice"))]
+
+    result, _ = run_script(["slow"], read)
+    assert isinstance(result, SynthesisTimeout) and "未完成" in str(result)
+
+
+def test_stream_not_retried_after_data():
+    """测试流式合成已产出音频后失败不再重试"""
+    client = make_client()
+    retry_stats = {"retries": 0}
+
+    async def read():
+        return [data async for data in client.stream_audio("hi", "voice", retry_stats=retry_stats)]
+
+    result, calls = run_script(["partial", "ok"], read)
+    assert isinstance(result, ConnectionError)
+    assert calls == 1
+    assert retry_stats["retries"] == 0
+
+    result, calls = run_script(["fail", "ok"], read)
+    assert result == [b"audio"]
+    assert calls == 2 and retry_stats["retries"] == 1
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_retryable_errors_retried_up_to_max_attempts,
+        test_non_retryable_error_raised_immediately,
+        test_first_chunk_timeout,
+        test_total_timeout,
+        test_stream_not_retried_after_data,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有重试与超时测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+音频保存测试脚本
+"""
+
+import asyncio
+import base64
+import binascii
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.models import SaveAudioRequest
+from src.tools import EdgeTTSTools
+from src.utils import EdgeTTSClient
+
+# MPEG-2 Layer III 24kHz 48kbps 单声道帧（与 Edge TTS 输出参数一致），帧长 144 字节
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+
+
+def make_tools(max_audio_size_mb: float = 10) -> EdgeTTSTools:
+    output_dir = tempfile.mkdtemp()
+    return EdgeTTSTools(ServerConfig({
+        "output": {"dir": output_dir},
+        "security": {"safe_file_paths": [output_dir]},
+        "limits": {"max_audio_size_mb": max_audio_size_mb},
+        "advanced": {"audio": {"chunk_size": 1024}}
+    }))
+
+
+def test_iter_base64_audio():
+    """测试分块解码结果与整体解码一致，并忽略换行"""
+    data = os.urandom(10000)
+    encoded = base64.encodebytes(data).decode('ascii')
+    blocks = list(EdgeTTSClient.iter_base64_audio(encoded, 1024))
+    assert b"".join(blocks) == data
+    assert max(len(block) for block in blocks) <= 1024
+
+    for invalid in ("QUJD*A==", "QUJDR"):
+        try:
+            list(EdgeTTSClient.iter_base64_audio(invalid, 1024))
+        except binascii.Error:
+            continue
+        raise AssertionError(f"未拒绝: {invalid}")
+
+
+def test_save_audio_streams_to_file():
+    """测试分块写入的文件内容完整且不留下临时文件"""
+    tools = make_tools()
+    audio = FRAME * 100
+    request = SaveAudioRequest(audio_data=base64.b64encode(audio).decode('ascii'), filename="saved")
+    result = asyncio.run(tools.save_audio(request))
+
+    assert result["success"] and result["file_size"] == len(audio)
+    with open(result["file_path"], 'rb') as f:
+        assert f.read() == audio
+    assert os.listdir(os.path.dirname(result["file_path"])) == ["saved.mp3"]
+
+
+def test_save_audio_rejects_invalid_data():
+    """测试超过大小上限或文件头与格式不符时拒绝保存"""
+    tools = make_tools(max_audio_size_mb=0.01)
+    too_large = base64.b64encode(FRAME * 100).decode('ascii')
+    wrong_header = base64.b64encode(b"not audio data").decode('ascii')
+    wav_as_mp3 = base64.b64encode(b"RIFF\x00\x00\x00\x00WAVEfmt ").decode('ascii')
+
+    for audio_data, audio_format in ((too_large, "mp3"), (wrong_header, "mp3"), (wav_as_mp3, "mp3"), ("@@@@", "wav")):
+        result = asyncio.run(tools.save_audio(
+            SaveAudioRequest(audio_data=audio_data, filename="rejected", format=audio_format)
+        ))
+        assert result["error"]["code"] == 1003, result
+        assert tools.output.find(f"rejected.{audio_format}") is None
+
+    result = asyncio.run(tools.save_audio(SaveAudioRequest(audio_data=wav_as_mp3, filename="ok", format="wav")))
+    assert result["success"]
+
+
+def test_save_audio_rejects_generated_names():
+    """测试文件名使用合成结果的前缀时拒绝保存，不覆盖可复用的合成文件"""
+    tools = make_tools()
+    audio_data = base64.b64encode(FRAME).decode('ascii')
+
+    for filename in ("tts_0123456789abcdef", "TTS_SUB_x.mp3", "batch_tts_x", "long_tts_x"):
+        result = asyncio.run(tools.save_audio(SaveAudioRequest(audio_data=audio_data, filename=filename)))
+        assert result["error"]["code"] == 1003, result
+
+    result = asyncio.run(tools.save_audio(SaveAudioRequest(audio_data=audio_data, filename="my_tts_clip")))
+    assert result["success"]
+
+
+def test_saved_audio_not_swept():
+    """测试保存的音频不受输出目录保留期清理影响"""
+    tools = make_tools()
+    request = SaveAudioRequest(audio_data=base64.b64encode(FRAME).decode('ascii'), filename="keep")
+    result = asyncio.run(tools.save_audio(request))
+    os.utime(result["file_path"], (time.time() - 2 * tools.output.retention, time.time() - 2 * tools.output.retention))
+
+    assert tools.output.sweep() == {"expired": 0, "evicted": 0}
+    assert os.path.exists(result["file_path"])
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_iter_base64_audio,
+        test_save_audio_streams_to_file,
+        test_save_audio_rejects_invalid_data,
+        test_save_audio_rejects_generated_names,
+        test_saved_audio_not_swept,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有音频保存测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+多进程共享缓存测试脚本
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.cache import AudioCache
+from src.jobs import Job, JobStore, SUCCEEDED, RUNNING, FAILED
+from src.locking import FileLock
+
+
+def test_cache_sees_other_process_writes():
+    """测试共享缓存目录时能命中其他进程写入的音频"""
+    cache_dir = tempfile.mkdtemp()
+    first = AudioCache(cache_dir=cache_dir, ttl=60, max_size=10)
+    second = AudioCache(cache_dir=cache_dir, ttl=60, max_size=10)
+
+    key = AudioCache.make_key("你好", "zh-CN-XiaoxiaoNeural", "+0%", "+0%", "+0Hz", "SentenceBoundary")
+    first.put(key, b"audio")
+
+    assert second.get(key) == b"audio"
+    assert second.stats()["hits"] == 1
+    assert [name for name in os.listdir(cache_dir) if name.endswith(".tmp")] == []
+
+
+def test_shared_cache_size_limit():
+    """测试共享缓存目录的容量上限按所有进程写入的文件合计计算"""
+    cache_dir = tempfile.mkdtemp()
+    first = AudioCache(cache_dir=cache_dir, ttl=60, max_size=2, shared=True)
+    second = AudioCache(cache_dir=cache_dir, ttl=60, max_size=2, shared=True)
+
+    keys = [AudioCache.make_key(f"text {i}", "zh-CN-XiaoxiaoNeural", "+0%", "+0%", "+0Hz", "SentenceBoundary")
+            for i in range(4)]
+    for i, key in enumerate(keys):
+        cache = first if i % 2 == 0 else second
+        cache.put(key, b"audio")
+        os.utime(os.path.join(cache_dir, f"{key}.mp3"), (time.time() - 10 + i, time.time() - 10 + i))
+
+    files = sorted(name for name in os.listdir(cache_dir) if name.endswith(".mp3"))
+    assert files == sorted(f"{key}.mp3" for key in keys[2:])
+    assert first.get(keys[0]) is None
+    assert first.get(keys[3]) == b"audio"
+    assert second.stats()["entries"] == 2
+
+
+def test_shared_cache_tolerates_removed_files():
+    """测试重建索引时文件已被其他进程删除不影响写入，写入失败只记录日志"""
+    cache_dir = tempfile.mkdtemp()
+    cache = AudioCache(cache_dir=cache_dir, ttl=60, max_size=2, shared=True)
+    key = AudioCache.make_key("你好", "zh-CN-XiaoxiaoNeural", "+0%", "+0%", "+0Hz", "SentenceBoundary")
+
+    listdir = os.listdir
+    os.listdir = lambda path: listdir(path) + ["0" * 64 + ".mp3"]
+    try:
+        cache.put(key, b"audio")
+    finally:
+        os.listdir = listdir
+    assert cache.get(key) == b"audio"
+
+    shutil.rmtree(cache_dir)
+    cache.put(key, b"audio")
+    source = os.path.join(tempfile.mkdtemp(), "source.mp3")
+    with open(source, 'wb') as f:
+        f.write(b"audio")
+    cache.put_file(key, source)
+
+
+def test_file_lock_excludes_other_process():
+    """测试文件锁在进程之间互斥"""
+    lock_path = os.path.join(tempfile.mkdtemp(), "voices.json.lock")
+    lock = FileLock(lock_path)
+    lock.acquire()
+
+    pid = os.fork()
+    if pid == 0:
+        # 子进程在父进程持锁时无法获取，父进程释放后可以获取
+        other = FileLock(lock_path)
+        code = 1 if other.acquire(blocking=False) else 0
+        os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    lock.release()
+    other = FileLock(lock_path)
+    assert other.acquire(blocking=False)
+    other.release()
+
+
+def test_shared_job_store():
+    """测试共享任务目录时能查询其他进程的任务"""
+    persist_dir = tempfile.mkdtemp()
+    owner = JobStore(retention=60, persist_dir=persist_dir, shared=True)
+    other = JobStore(retention=60, persist_dir=persist_dir, shared=True)
+
+    job = Job("batch_text_to_speech", total=2)
+    job.status = RUNNING
+    owner.add(job)
+    owner.save(job)
+    assert other.get(job.id) is None
+    assert other.load(job.id).status == RUNNING
+
+    job.status = SUCCEEDED
+    job.finished_at = time.time()
+    owner.save(job)
+    assert other.load(job.id).status == SUCCEEDED
+    assert other.get(job.id).status == SUCCEEDED
+
+
+def test_orphaned_job_reported_failed():
+    """测试所属进程已退出的未完成任务查询时显示为失败"""
+    persist_dir = tempfile.mkdtemp()
+    store = JobStore(retention=60, persist_dir=persist_dir, shared=True)
+    job = Job("long_text_to_speech")
+    job.status = RUNNING
+
+    pid = os.fork()
+    if pid == 0:
+        store.save(job)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert store.load(job.id).status == FAILED
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_cache_sees_other_process_writes,
+        test_shared_cache_size_limit,
+        test_shared_cache_tolerates_removed_files,
+        test_file_lock_excludes_other_process,
+        test_shared_job_store,
+        test_orphaned_job_reported_failed,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有多进程共享缓存测试通过!")
+
+
+if __name__ == "__main__":
+    main()
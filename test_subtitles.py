@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+音频与字幕单次合成测试脚本
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import edge_tts
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import ServerConfig
+from src.models import SpeechWithSubtitlesRequest
+from src.tools import EdgeTTSTools
+
+# MPEG-2 Layer III 24kHz 48kbps 单声道帧（与 Edge TTS 输出参数一致），帧长 144 字节
+FRAME = b'\xff\xf3\x64\xc4' + b'\x00' * 140
+
+VOICES = [
+    {"Name": "Microsoft Server Speech Text to Speech Voice (en-US, JennyNeural)",
+     "ShortName": "en-US-JennyNeural", "Gender": "Female", "Locale": "en-US", "VoiceType": "Neural"},
+]
+
+
+class SentenceCommunicate:
+    """按句输出音频块与句子边界事件（edge-tts 7.x 格式）的模拟合成会话"""
+
+    streams = 0
+
+    def __init__(self, text, voice, **kwargs):
+        self.sentences = [sentence.strip() + "." for sentence in text.split(".") if sentence.strip()]
+
+    async def stream(self):
+        SentenceCommunicate.streams += 1
+        for i, sentence in enumerate(self.sentences):
+            yield {"type": "audio", "data": FRAME}
+            # 偏移与时长单位为 100 纳秒，每句 1.5 秒
+            yield {"type": "SentenceBoundary", "offset": i * 15000000, "duration": 15000000, "text": sentence}
+
+
+async def fake_list_voices(*args, **kwargs):
+    return [dict(voice) for voice in VOICES]
+
+
+def make_tools() -> EdgeTTSTools:
+    work_dir = tempfile.mkdtemp()
+    return EdgeTTSTools(ServerConfig({
+        "cache": {
+            "audio_cache_enabled": False,
+            "voices_snapshot_file": os.path.join(work_dir, "voices.json")
+        },
+        "output": {"dir": os.path.join(work_dir, "output")},
+        "security": {"safe_file_paths": [work_dir]}
+    }))
+
+
+def run_with_fakes(operation):
+    SentenceCommunicate.streams = 0
+    originals = edge_tts.Communicate, edge_tts.list_voices
+    edge_tts.Communicate, edge_tts.list_voices = SentenceCommunicate, fake_list_voices
+    try:
+        return asyncio.run(operation)
+    finally:
+        edge_tts.Communicate, edge_tts.list_voices = originals
+
+
+def test_single_stream_writes_audio_and_subtitles():
+    """测试一次上游合成同时生成音频文件与时间轴一致的字幕"""
+    tools = make_tools()
+    request = SpeechWithSubtitlesRequest(text="Hello there. How are you.", voice="en-US-JennyNeural")
+    result = run_with_fakes(tools.text_to_speech_with_subtitles(request))
+
+    assert result["success"], result
+    assert SentenceCommunicate.streams == 1
+    assert result["segment_count"] == 2
+    with open(result["file_path"], 'rb') as f:
+        assert f.read() == FRAME * 2
+
+    expected = (
+        "1\n00:00:00,000 --> 00:00:01,500\nHello there.\n\n"
+        "2\n00:00:01,500 --> 00:00:03,000\nHow are you.\n\n"
+    )
+    assert result["subtitles"] == expected
+    with open(result["subtitle_file_path"], encoding='utf-8') as f:
+        assert f.read() == expected
+    stem = os.path.splitext(os.path.basename(result["file_path"]))[0]
+    assert os.path.basename(result["subtitle_file_path"]) == f"{stem}.srt"
+
+
+def test_failed_stream_leaves_no_files():
+    """测试合成失败时不留下不完整的音频或字幕文件"""
+    class FailingCommunicate(SentenceCommunicate):
+        async def stream(self):
+            yield {"type": "audio", "data": FRAME}
+            raise ValueError("invalid voice")
+
+    tools = make_tools()
+    request = SpeechWithSubtitlesRequest(text="Hello there.", voice="en-US-JennyNeural")
+    originals = edge_tts.Communicate, edge_tts.list_voices
+    edge_tts.Communicate, edge_tts.list_voices = FailingCommunicate, fake_list_voices
+    try:
+        result = asyncio.run(tools.text_to_speech_with_subtitles(request))
+    finally:
+        edge_tts.Communicate, edge_tts.list_voices = originals
+
+    assert result["error"]["code"] == 1005
+    assert [names for _, _, names in os.walk(tools.output.root) if names] == []
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_single_stream_writes_audio_and_subtitles,
+        test_failed_stream_leaves_no_files,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有音频与字幕测试通过!")
+
+
+if __name__ == "__main__":
+    main()
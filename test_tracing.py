@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+慢请求追踪测试脚本
+"""
+
+import asyncio
+import os
+import sys
+
+import aiohttp
+import edge_tts
+from aiohttp import web
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.tracing import Tracer, current_trace, record, span
+from src.utils import EdgeTTSClient
+
+
+class PieceCommunicate:
+    """与 edge-tts 相同，每段文本各创建一个使用传入连接器的会话（会话结束时关闭连接器）"""
+
+    url = None
+
+    def __init__(self, text, voice, connector=None, **kwargs):
+        self.pieces = text.split("|")
+        self.connector = connector
+
+    async def stream(self):
+        for piece in self.pieces:
+            async with aiohttp.ClientSession(connector=self.connector) as session:
+                async with session.get(self.url, params={"text": piece}) as response:
+                    yield {"type": "audio", "data": await response.read()}
+
+
+def test_phases_aggregate():
+    """测试同名阶段累加耗时并记录次数与最大值"""
+    tracer = Tracer(threshold=0)
+
+    with tracer.trace("batch_text_to_speech") as trace:
+        record("first_chunk", 0.2)
+        record("first_chunk", 0.5)
+        with span("merge"):
+            pass
+
+    phases = trace.to_dict()["phases"]
+    assert phases["first_chunk"] == {"total_ms": 700.0, "count": 2, "max_ms": 500.0}
+    assert phases["merge"]["count"] == 1
+    assert current_trace() is None
+
+
+def test_slow_requests_reported():
+    """测试仅超过阈值的请求被记录为慢请求"""
+    tracer = Tracer(threshold=0)
+    with tracer.trace("text_to_speech"):
+        pass
+    assert tracer.stats()["slow_requests"] == 1
+    assert tracer.stats()["recent"][0]["tool"] == "text_to_speech"
+
+    tracer = Tracer(threshold=60)
+    with tracer.trace("text_to_speech"):
+        pass
+    assert tracer.stats()["slow_requests"] == 0
+
+
+def test_record_without_trace_is_ignored():
+    """测试没有进行中的追踪时记录阶段不报错"""
+    record("voice_lookup", 0.1)
+    with span("file_write"):
+        pass
+
+    tracer = Tracer(enabled=False)
+    with tracer.trace("text_to_speech") as trace:
+        assert trace is None
+
+
+def test_multi_piece_stream_under_trace():
+    """测试被追踪的合成在上游分多个会话时不因连接器被关闭而失败"""
+    async def handler(request):
+        return web.Response(body=request.query["text"].encode())
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        PieceCommunicate.url = f"http://127.0.0.1:{port}/"
+
+        original = edge_tts.Communicate
+        edge_tts.Communicate = PieceCommunicate
+        try:
+            client = EdgeTTSClient()
+            retry_stats = {"retries": 0}
+            with Tracer(threshold=0).trace("text_to_speech") as trace:
+                chunks = [
+                    chunk async for chunk in client.stream_audio("one|two|three", "voice", retry_stats=retry_stats)
+                ]
+            return chunks, retry_stats, trace
+        finally:
+            edge_tts.Communicate = original
+            await runner.cleanup()
+
+    chunks, retry_stats, trace = asyncio.run(run())
+    assert b"".join(chunks) == b"onetwothree"
+    assert retry_stats["retries"] == 0
+    assert "upstream_connect" in trace.to_dict()["phases"]
+
+
+def test_no_connector_while_waiting_for_slot():
+    """测试被追踪的合成在等待上游会话槽位时被取消不会创建连接器"""
+    async def run():
+        client = EdgeTTSClient(max_upstream_sessions=1)
+        await client._upstream_slots.acquire()
+        with Tracer(threshold=0).trace("text_to_speech"):
+            communicate = client._communicate("hi", "en-US-JennyNeural")
+            task = asyncio.ensure_future(client._stream_chunks(communicate).__anext__())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        client._upstream_slots.release()
+        return communicate, client
+
+    communicate, client = asyncio.run(run())
+    assert communicate.connector is None
+    assert client.upstream_active == 0
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_phases_aggregate,
+        test_slow_requests_reported,
+        test_record_without_trace_is_ignored,
+        test_multi_piece_stream_under_trace,
+        test_no_connector_while_waiting_for_slot,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有慢请求追踪测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+语音目录索引测试脚本
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import edge_tts
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.catalog import VoiceCatalog
+from src.utils import EdgeTTSClient
+
+
+VOICES = [
+    {"Name": "Microsoft Server Speech Text to Speech Voice (zh-CN, XiaoxiaoNeural)",
+     "ShortName": "zh-CN-XiaoxiaoNeural", "Gender": "Female", "Locale": "zh-CN"},
+    {"Name": "Microsoft Server Speech Text to Speech Voice (zh-CN, YunyangNeural)",
+     "ShortName": "zh-CN-YunyangNeural", "Gender": "Male", "Locale": "zh-CN"},
+    {"Name": "Microsoft Server Speech Text to Speech Voice (en-US, JennyNeural)",
+     "ShortName": "en-US-JennyNeural", "Gender": "Female", "Locale": "en-US"},
+]
+
+
+def test_lookup_by_name_and_short_name():
+    """测试按名称与短名称查找语音"""
+    catalog = VoiceCatalog(VOICES)
+
+    assert catalog.lookup("zh-CN-XiaoxiaoNeural").locale == "zh-CN"
+    assert catalog.lookup(VOICES[2]["Name"]).short_name == "en-US-JennyNeural"
+    assert catalog.lookup("invalid-voice") is None
+
+
+def test_filter_intersects_indexes():
+    """测试过滤条件取交集并保持原始顺序"""
+    catalog = VoiceCatalog(VOICES)
+
+    assert [v.short_name for v in catalog.filter(locale="ZH-cn")] == [
+        "zh-CN-XiaoxiaoNeural", "zh-CN-YunyangNeural"
+    ]
+    assert [v.short_name for v in catalog.filter(locale="zh-CN", gender="Male")] == ["zh-CN-YunyangNeural"]
+    assert [v.short_name for v in catalog.filter(gender="Female", name_pattern="jenny")] == ["en-US-JennyNeural"]
+    assert catalog.filter(locale="ja-JP") == []
+    assert len(catalog.filter()) == len(VOICES)
+
+
+def test_summary_statistics():
+    """测试摘要统计"""
+    catalog = VoiceCatalog(VOICES)
+
+    assert catalog.locale_stats == {"zh-CN": 2, "en-US": 1}
+    assert catalog.gender_stats == {"Male": 1, "Female": 2}
+
+
+def test_failed_refresh_backs_off():
+    """测试后台刷新失败后冷却期内不再请求上游，旧缓存继续可用"""
+    calls = []
+
+    async def failing_list_voices():
+        calls.append(1)
+        raise ConnectionError("upstream down")
+
+    async def run():
+        client = EdgeTTSClient(cache_ttl=60, refresh_retry_interval=30)
+        client.voices_cache = VOICES
+        client.catalog = VoiceCatalog(VOICES)
+        client.last_cache_time = time.time() - 120
+
+        for _ in range(5):
+            assert await client.get_voices() == VOICES
+            await asyncio.sleep(0.01)
+        assert len(calls) == 1
+
+        # 冷却期结束后再次刷新
+        client._refresh_retry_at = 0
+        await client.get_voices()
+        await asyncio.sleep(0.01)
+        assert len(calls) == 2
+
+    original = edge_tts.list_voices
+    edge_tts.list_voices = failing_list_voices
+    try:
+        asyncio.run(run())
+    finally:
+        edge_tts.list_voices = original
+
+
+def test_snapshot_warm_start():
+    """测试语音列表写入快照，新客户端启动时从快照加载而不请求上游，快照过期后在后台刷新"""
+    calls = []
+
+    async def counting_list_voices():
+        calls.append(1)
+        return [dict(voice) for voice in VOICES]
+
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "voices.json")
+
+    async def fetch_and_save():
+        client = EdgeTTSClient(cache_ttl=60, snapshot_path=snapshot_path)
+        assert client.voices_cache is None
+        return await client.get_voices()
+
+    async def warm_start():
+        client = EdgeTTSClient(cache_ttl=60, snapshot_path=snapshot_path)
+        assert client.voices_cache == VOICES
+        assert (await client.get_voice_info("en-US-JennyNeural")).locale == "en-US"
+        return await client.get_voices()
+
+    original = edge_tts.list_voices
+    edge_tts.list_voices = counting_list_voices
+    try:
+        assert asyncio.run(fetch_and_save()) == VOICES
+        assert len(calls) == 1
+        with open(snapshot_path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        assert snapshot["voices"] == VOICES and time.time() - snapshot["fetched_at"] < 60
+
+        assert asyncio.run(warm_start()) == VOICES
+        assert len(calls) == 1
+
+        # 快照过期：先返回快照中的语音，同时在后台刷新并更新快照
+        snapshot["fetched_at"] = time.time() - 120
+        with open(snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+
+        async def stale_start():
+            client = EdgeTTSClient(cache_ttl=60, snapshot_path=snapshot_path)
+            assert await client.get_voices() == VOICES
+            await client._refresh_task
+            return client
+
+        client = asyncio.run(stale_start())
+        assert len(calls) == 2
+        with open(snapshot_path, encoding='utf-8') as f:
+            assert json.load(f)["fetched_at"] == client.last_cache_time
+
+        # 快照损坏时忽略并请求上游
+        with open(snapshot_path, 'w', encoding='utf-8') as f:
+            f.write("{broken")
+        assert asyncio.run(fetch_and_save()) == VOICES
+        assert len(calls) == 3
+    finally:
+        edge_tts.list_voices = original
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        test_lookup_by_name_and_short_name,
+        test_filter_intersects_indexes,
+        test_summary_statistics,
+        test_failed_refresh_backs_off,
+        test_snapshot_warm_start,
+    ]
+
+    for test in tests:
+        test()
+        print(f"✅ {test.__doc__}")
+
+    print("🎉 所有语音目录测试通过!")
+
+
+if __name__ == "__main__":
+    main()